@@ -10,6 +10,9 @@ from routes.spots import spots_bp
 from routes.matches import matches_bp
 from routes.chat import chat_bp
 from routes.profile import profile_bp
+from routes.swipes import swipes_bp
+from routes.debug import debug_bp
+from services import identity_map, query_trace
 
 def create_app():
     app = Flask(__name__)
@@ -17,6 +20,8 @@ def create_app():
     
     CORS(app, origins=["http://localhost:3000", "http://localhost:3001"])
     jwt = JWTManager(app)
+    identity_map.init_app(app, expose_header=Config.DEBUG_ENDPOINTS)
+    query_trace.init_app(app, expose_header=Config.DEBUG_ENDPOINTS)
     
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(onboarding_bp, url_prefix='/api/onboarding')
@@ -26,6 +31,10 @@ def create_app():
     app.register_blueprint(matches_bp, url_prefix='/api/matches')
     app.register_blueprint(chat_bp, url_prefix='/api/chat')
     app.register_blueprint(profile_bp, url_prefix='/api/profile')
+    app.register_blueprint(swipes_bp, url_prefix='/api/swipes')
+    
+    if Config.DEBUG_ENDPOINTS:
+        app.register_blueprint(debug_bp, url_prefix='/api/debug')
     
     @app.route('/api/health')
     def health_check():
@@ -0,0 +1,57 @@
+"""
+Micro-benchmark for the distance kernel.
+
+Compares the batched haversine kernel against the old per-item loop
+(one calculate_distance call per candidate) at 1k, 100k and 1M points.
+
+    python3 benchmarks/bench_distance.py
+"""
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.geo import haversine_km
+from services.ml_engine import MLEngine
+
+SIZES = [1_000, 100_000, 1_000_000]
+LOOP_LIMIT = 100_000
+ORIGIN = [30.2672, -97.7431]
+
+def best_of(fn, repeats=3):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    rng = np.random.default_rng(42)
+    ml_engine = MLEngine()
+    
+    print(f"{'points':>10} {'batch f64':>12} {'batch f32':>12} {'scalar loop':>12}")
+    for size in SIZES:
+        coords = np.column_stack([
+            ORIGIN[0] + rng.uniform(-1, 1, size),
+            ORIGIN[1] + rng.uniform(-1, 1, size),
+        ])
+        coords[::50] = np.nan
+        coords32 = coords.astype(np.float32)
+        
+        batch64 = best_of(lambda: haversine_km(ORIGIN, coords))
+        batch32 = best_of(lambda: haversine_km(ORIGIN, coords32))
+        
+        if size <= LOOP_LIMIT:
+            points = [[None, None] if np.isnan(lat) else [lat, lng] for lat, lng in coords.tolist()]
+            loop = best_of(lambda: [ml_engine.calculate_distance(ORIGIN, p) for p in points], repeats=1)
+            loop_text = f"{loop * 1000:10.1f}ms"
+        else:
+            loop_text = f"{'skipped':>12}"
+        
+        print(f"{size:>10} {batch64 * 1000:10.1f}ms {batch32 * 1000:10.1f}ms {loop_text}")
+
+if __name__ == "__main__":
+    main()
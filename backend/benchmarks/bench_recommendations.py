@@ -0,0 +1,136 @@
+"""
+Recommendation benchmark suite.
+
+Generates seeded synthetic users, apartments and spots, times every
+recommender path (per-candidate loop, batch, prebuilt-matrix batch and
+multi-user matrix) and reports p50/p99 latency and peak traced memory.
+Results are written as JSON so runs can be compared:
+
+    python3 benchmarks/bench_recommendations.py --output results.json
+    python3 benchmarks/bench_recommendations.py --baseline results.json
+
+No database is needed; everything runs against in-memory rows.
+"""
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tracemalloc
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.ml_engine import MLEngine
+from benchmarks.synthetic import generate_users, generate_apartments, generate_spots
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+MATRIX_USERS = 64
+
+def measure(fn, repeats):
+    """Time fn repeats times, then run it once more under tracemalloc."""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    return {
+        'runs': repeats,
+        'p50_ms': float(np.percentile(timings, 50)),
+        'p99_ms': float(np.percentile(timings, 99)),
+        'peak_mb': peak / (1024 * 1024),
+    }
+
+def build_paths(size, loop_limit):
+    """Yield (name, callable) pairs for one dataset size."""
+    ml_engine = MLEngine()
+    people = generate_users(size, seed=size)
+    apartments = generate_apartments(size, seed=size + 1)
+    spots = generate_spots(size, seed=size + 2)
+    
+    user = {'age': 27, 'budget_max': 2200, 'interests': ['coffee', 'tech', 'music']}
+    user_vector = ml_engine.create_user_vector(user)
+    user_location = [30.2672, -97.7431]
+    
+    candidate_matrix = ml_engine.build_candidate_matrix(people)
+    interest_masks = ml_engine.build_interest_masks(people)
+    apartment_matrix = ml_engine.build_apartment_matrix(apartments)
+    user_vectors, user_locations, user_masks = ml_engine.build_user_matrices(people[:MATRIX_USERS])
+    
+    if size <= loop_limit:
+        yield 'people.loop', lambda: ml_engine.people_recommendations(user_vector, people, user_location)
+    yield 'people.batch', lambda: ml_engine.people_recommendations_batch(user_vector, people, user_location)
+    yield 'people.batch_prebuilt', lambda: ml_engine.people_recommendations_batch(
+        user_vector, people, user_location, candidate_matrix=candidate_matrix, interest_masks=interest_masks
+    )
+    yield f'people.matrix_{MATRIX_USERS}_users', lambda: ml_engine.score_people_matrix(
+        user_vectors, user_locations, user_masks, candidate_matrix, interest_masks
+    )
+    yield 'apartments.batch', lambda: ml_engine.apartment_recommendations(user_vector, apartments, user_location)
+    yield f'apartments.matrix_{MATRIX_USERS}_users', lambda: ml_engine.score_apartments_matrix(
+        user_vectors, user_locations, apartment_matrix
+    )
+    yield 'spots.batch', lambda: ml_engine.spot_recommendations(
+        user_vector, spots, user_location, user['interests']
+    )
+
+def compare(results, baseline_path, threshold):
+    with open(baseline_path) as f:
+        baseline = {(r['size'], r['path']): r for r in json.load(f)['results']}
+    
+    regressions = []
+    for result in results:
+        previous = baseline.get((result['size'], result['path']))
+        if previous and result['p50_ms'] > previous['p50_ms'] * (1 + threshold):
+            regressions.append((result, previous))
+    
+    for result, previous in regressions:
+        print(f"REGRESSION {result['path']} @ {result['size']}: "
+              f"p50 {previous['p50_ms']:.2f}ms -> {result['p50_ms']:.2f}ms")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark MLEngine recommender paths")
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)))
+    parser.add_argument('--repeats', type=int, default=20)
+    parser.add_argument('--loop-limit', type=int, default=10_000, help="largest size to run the per-candidate loop on")
+    parser.add_argument('--output', help="write JSON results here")
+    parser.add_argument('--baseline', help="compare p50 against a previous JSON result file")
+    parser.add_argument('--threshold', type=float, default=0.2, help="allowed p50 slowdown vs baseline")
+    args = parser.parse_args()
+    
+    sizes = [int(size) for size in args.sizes.split(',')]
+    results = []
+    
+    print(f"{'size':>9}  {'path':<28} {'p50 ms':>10} {'p99 ms':>10} {'peak MB':>9}")
+    for size in sizes:
+        # Fewer repeats on big datasets keep the suite's runtime reasonable
+        repeats = max(3, min(args.repeats, args.repeats * 10_000 // size))
+        for name, fn in build_paths(size, args.loop_limit):
+            stats = measure(fn, repeats if not name.endswith('.loop') else 3)
+            results.append({'size': size, 'path': name, **stats})
+            print(f"{size:>9}  {name:<28} {stats['p50_ms']:>10.2f} {stats['p99_ms']:>10.2f} {stats['peak_mb']:>9.1f}")
+    
+    report = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {len(results)} results to {args.output}")
+    
+    if args.baseline and compare(results, args.baseline, args.threshold):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Seeded synthetic datasets for benchmarks.
+
+Rows have the same shape as the users, apartments and spots tables, scattered
+around the four mock-data cities so distance scoring sees realistic spreads.
+"""
+import numpy as np
+
+CITIES = [
+    (30.2672, -97.7431),   # Austin
+    (37.7749, -122.4194),  # San Francisco
+    (40.7128, -74.0060),   # New York
+    (47.6062, -122.3321),  # Seattle
+]
+
+INTERESTS = ['coffee', 'hiking', 'tech', 'food', 'music', 'sports',
+             'art', 'books', 'travel', 'fitness', 'nightlife', 'shopping']
+
+SPOT_CATEGORIES = ['Coffee Shop', 'Hiking Trail', 'Tech Meetup', 'Food Hall', 'Music Venue',
+                   'Sports Bar', 'Art Gallery', 'Bookstore', 'Fitness Studio', 'Nightclub',
+                   'Shopping Mall', 'Park', 'Museum', 'Cafe']
+
+def _coords(rng, count, spread=0.15):
+    centers = np.array(CITIES)[rng.integers(0, len(CITIES), count)]
+    coords = centers + rng.uniform(-spread, spread, (count, 2))
+    # A few rows without coordinates, like profiles that never set a location
+    coords[rng.random(count) < 0.02] = np.nan
+    return coords
+
+def _none_if_nan(value):
+    return None if value != value else value
+
+def generate_users(count, seed=0):
+    rng = np.random.default_rng(seed)
+    ages = rng.integers(18, 60, count).tolist()
+    budgets = rng.integers(800, 4500, count).tolist()
+    coords = _coords(rng, count).tolist()
+    interest_bits = rng.random((count, len(INTERESTS))) < 0.3
+    
+    return [
+        {
+            'id': f'user-{i}',
+            'age': ages[i],
+            'budget_max': budgets[i],
+            'interests': [INTERESTS[j] for j in np.flatnonzero(interest_bits[i])],
+            'lat': _none_if_nan(coords[i][0]),
+            'lng': _none_if_nan(coords[i][1]),
+            'updated_at': '2025-01-01T00:00:00+00:00',
+        }
+        for i in range(count)
+    ]
+
+def generate_apartments(count, seed=1):
+    rng = np.random.default_rng(seed)
+    prices = rng.integers(900, 4500, count).tolist()
+    amenity_counts = rng.integers(0, 6, count).tolist()
+    coords = _coords(rng, count).tolist()
+    amenities = ['Pool', 'Gym', 'Parking', 'Laundry', 'Balcony']
+    
+    return [
+        {
+            'id': f'apt-{i}',
+            'price': prices[i],
+            'amenities': amenities[:amenity_counts[i]],
+            'lat': _none_if_nan(coords[i][0]),
+            'lng': _none_if_nan(coords[i][1]),
+        }
+        for i in range(count)
+    ]
+
+def generate_spots(count, seed=2):
+    rng = np.random.default_rng(seed)
+    categories = rng.integers(0, len(SPOT_CATEGORIES), count).tolist()
+    ratings = np.round(rng.uniform(2.5, 5.0, count), 1).tolist()
+    coords = _coords(rng, count).tolist()
+    
+    return [
+        {
+            'id': f'spot-{i}',
+            'category': SPOT_CATEGORIES[categories[i]],
+            'rating': ratings[i],
+            'lat': _none_if_nan(coords[i][0]),
+            'lng': _none_if_nan(coords[i][1]),
+        }
+        for i in range(count)
+    ]
@@ -6,6 +6,8 @@ load_dotenv()
 class Config:
     SUPABASE_URL = os.getenv('SUPABASE_URL')
     SUPABASE_KEY = os.getenv('SUPABASE_KEY')
+    # 'supabase', or 'local' for the in-process backend in services/local_backend.py
+    DATABASE_BACKEND = os.getenv('DATABASE_BACKEND', 'supabase').lower()
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'dev-secret-key')
     GOOGLE_CLIENT_ID = os.getenv('GOOGLE_CLIENT_ID')
     GOOGLE_CLIENT_SECRET = os.getenv('GOOGLE_CLIENT_SECRET')
@@ -15,3 +17,44 @@ class Config:
     YELP_API_KEY = os.getenv('YELP_API_KEY')
     GENERATED_PHOTOS_API_KEY = os.getenv('GENERATED_PHOTOS_API_KEY')
     ENABLE_REAL_APIS = os.getenv('ENABLE_REAL_APIS', 'false').lower() == 'true'
+    FEED_RADIUS_KM = float(os.getenv('FEED_RADIUS_KM', '25'))
+    FEED_CACHE_MAX_AGE = int(os.getenv('FEED_CACHE_MAX_AGE', str(6 * 60 * 60)))
+    FEED_STREAM_PAGE_SIZE = int(os.getenv('FEED_STREAM_PAGE_SIZE', '500'))
+    QUERY_CACHE_ENABLED = os.getenv('QUERY_CACHE_ENABLED', 'false').lower() == 'true'
+    QUERY_CACHE_MAX_ENTRIES = int(os.getenv('QUERY_CACHE_MAX_ENTRIES', '2048'))
+    # Seconds each table's reads may be served from cache; tables not listed are never cached
+    QUERY_CACHE_TTLS = {
+        'users': int(os.getenv('QUERY_CACHE_TTL_USERS', '30')),
+        'conversations': int(os.getenv('QUERY_CACHE_TTL_CONVERSATIONS', '30')),
+        'apartments': int(os.getenv('QUERY_CACHE_TTL_APARTMENTS', '300')),
+        'spots': int(os.getenv('QUERY_CACHE_TTL_SPOTS', '300')),
+    }
+    DEBUG_ENDPOINTS = os.getenv('DEBUG_ENDPOINTS', 'false').lower() == 'true'
+    QUERY_TRACE_ENABLED = os.getenv('QUERY_TRACE_ENABLED', 'false').lower() == 'true'
+    # A query shape repeated this many times in one request is flagged as N+1
+    QUERY_TRACE_N_PLUS_ONE = int(os.getenv('QUERY_TRACE_N_PLUS_ONE', '3'))
+    DB_FANOUT_WORKERS = int(os.getenv('DB_FANOUT_WORKERS', '8'))
+    # How often re-encoded feature vectors are written to user_features (services/feature_store.py)
+    FEATURE_STORE_FLUSH_SECONDS = float(os.getenv('FEATURE_STORE_FLUSH_SECONDS', '2'))
+    FEATURE_STORE_MAX_ENTRIES = int(os.getenv('FEATURE_STORE_MAX_ENTRIES', '50000'))
+    # Write-behind buffering of swipe/match rows (services/write_buffer.py)
+    SWIPE_BUFFER_ENABLED = os.getenv('SWIPE_BUFFER_ENABLED', 'false').lower() == 'true'
+    SWIPE_BUFFER_FLUSH_MS = int(os.getenv('SWIPE_BUFFER_FLUSH_MS', '200'))
+    SWIPE_BUFFER_MAX_ROWS = int(os.getenv('SWIPE_BUFFER_MAX_ROWS', '500'))
+    SWIPE_BUFFER_SPILL_DIR = os.getenv('SWIPE_BUFFER_SPILL_DIR', '.swipe_buffer')
+    SWIPE_BATCH_MAX_ITEMS = int(os.getenv('SWIPE_BATCH_MAX_ITEMS', '100'))
+    # populate_database bulk loads (services/bulk_loader.py)
+    BULK_LOAD_WORKERS = int(os.getenv('BULK_LOAD_WORKERS', '4'))
+    BULK_LOAD_CHECKPOINT_DIR = os.getenv('BULK_LOAD_CHECKPOINT_DIR', '.bulk_load')
+    # Per-user swiped-item sets used for feed exclusion (services/swipe_index.py)
+    SWIPE_INDEX_MAX_USERS = int(os.getenv('SWIPE_INDEX_MAX_USERS', '10000'))
+    SWIPE_INDEX_EXACT_LIMIT = int(os.getenv('SWIPE_INDEX_EXACT_LIMIT', '5000'))
+    SWIPE_INDEX_FALSE_POSITIVE_RATE = float(os.getenv('SWIPE_INDEX_FALSE_POSITIVE_RATE', '0.01'))
+    SWIPE_INDEX_TTL = int(os.getenv('SWIPE_INDEX_TTL', '300'))
+    # Background Redfin ingestion for the apartment feed (services/listing_ingest.py)
+    LISTING_INGEST_IN_PROCESS = os.getenv('LISTING_INGEST_IN_PROCESS', 'false').lower() == 'true'
+    LISTING_REFRESH_SECONDS = int(os.getenv('LISTING_REFRESH_SECONDS', str(6 * 60 * 60)))
+    LISTING_ACTIVE_SECONDS = int(os.getenv('LISTING_ACTIVE_SECONDS', str(7 * 24 * 60 * 60)))
+    LISTING_POLL_SECONDS = int(os.getenv('LISTING_POLL_SECONDS', '60'))
+    LISTING_MAX_PER_CITY = int(os.getenv('LISTING_MAX_PER_CITY', '20'))
+    LISTING_RETRY_SECONDS = int(os.getenv('LISTING_RETRY_SECONDS', str(5 * 60)))
@@ -0,0 +1,27 @@
+"""Shared pytest fixtures: the suite runs against the in-process LocalClient."""
+import os
+
+os.environ['DATABASE_BACKEND'] = 'local'
+
+import pytest
+from services import supabase_client
+from services.local_backend import LocalClient
+from services.swipe_index import swipe_index
+
+@pytest.fixture
+def local_db(monkeypatch):
+    """A fresh LocalClient behind SupabaseService, with an empty swipe index."""
+    client = LocalClient.from_setup()
+    monkeypatch.setattr(supabase_client, 'supabase', client)
+    swipe_index.clear()
+    yield client
+    swipe_index.clear()
+
+@pytest.fixture
+def app(local_db):
+    from app import create_app
+    return create_app()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
@@ -0,0 +1,50 @@
+"""
+Standalone apartment listing ingestion.
+
+Rescrapes every city in listing_cache whose listings are missing or older
+than LISTING_REFRESH_SECONDS and has been asked for by the apartment feed
+recently. Run it from cron with --once, or as a long-lived worker. This is
+the only worker unless LISTING_INGEST_IN_PROCESS=true moves it into the web
+processes.
+
+    python3 ingest_listings.py --once
+    python3 ingest_listings.py --city "Austin, TX"
+"""
+import os
+import sys
+import time
+import argparse
+from dotenv import load_dotenv
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.listing_ingest import ListingStore, listing_ingestor
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape apartment listings into listing_cache")
+    parser.add_argument('--once', action='store_true', help="refresh due cities once and exit")
+    parser.add_argument('--city', action='append', default=[], help="refresh this location now (repeatable)")
+    args = parser.parse_args()
+    
+    load_dotenv()
+    
+    if args.city:
+        for location in args.city:
+            ListingStore.touch([location])
+            started = time.time()
+            count = listing_ingestor.refresh(location)
+            print(f"   {location}: {count} listings in {time.time() - started:.1f}s")
+        return True
+    
+    if args.once:
+        started = time.time()
+        refreshed = listing_ingestor.run_once()
+        print(f"Refreshed {refreshed} cities in {time.time() - started:.1f}s")
+        return True
+    
+    print(f"Refreshing listings every {listing_ingestor.refresh_seconds}s, "
+          f"checking every {listing_ingestor.poll_seconds}s...")
+    listing_ingestor.run()
+
+if __name__ == "__main__":
+    main()
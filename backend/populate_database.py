@@ -10,6 +10,9 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from data.mock_data import MOCK_APARTMENTS, MOCK_PEOPLE, MOCK_SPOTS
 from services.supabase_client import SupabaseService
+from services.ml_engine import MLEngine
+from services import pairs
+from services.bulk_loader import bulk_loader
 
 def generate_mock_users():
     users = []
@@ -24,6 +27,7 @@ def generate_mock_users():
     }
     
     interests_pool = ['coffee', 'hiking', 'tech', 'food', 'music', 'sports', 'art', 'books', 'travel', 'fitness', 'nightlife', 'shopping']
+    ml_engine = MLEngine()
     
     for i in range(20):
         city_name, (base_lat, base_lng) = list(cities.items())[i % len(cities)]
@@ -46,6 +50,7 @@ def generate_mock_users():
             'budget_min': budget_min,
             'budget_max': budget_max,
             'interests': user_interests,
+            'interest_mask': ml_engine.encode_interest_mask(user_interests),
             'photos': PhotoService.get_random_photos("people", 2),
             'onboarding_complete': True,
             'created_at': (datetime.now() - timedelta(days=random.randint(1, 30))).isoformat(),
@@ -162,19 +167,15 @@ def generate_mock_swipes_and_matches():
                 }
                 spot_matches.append(match)
     
-    print("Inserting apartment swipes and matches...")
-    insert_batch_data('apartment_swipes', apartment_swipes)
-    insert_batch_data('apartment_matches', apartment_matches)
-    
-    print("Inserting people swipes and matches...")
-    insert_batch_data('people_swipes', people_swipes)
-    insert_batch_data('people_matches', people_matches)
-    
-    print("Inserting spot swipes and matches...")
-    insert_batch_data('spot_swipes', spot_swipes)
-    insert_batch_data('spot_matches', spot_matches)
-    
-    return True
+    print("Inserting swipes and matches...")
+    return bulk_loader.load_all({
+        'apartment_swipes': apartment_swipes,
+        'apartment_matches': apartment_matches,
+        'people_swipes': people_swipes,
+        'people_matches': people_matches,
+        'spot_swipes': spot_swipes,
+        'spot_matches': spot_matches
+    })
 
 def generate_mock_conversations():
     matches_data = SupabaseService.get_data('people_matches', {})
@@ -193,6 +194,7 @@ def generate_mock_conversations():
             'id': str(uuid.uuid4()),
             'user1_id': match['user1_id'],
             'user2_id': match['user2_id'],
+            'pair_key': pairs.pair_key(match['user1_id'], match['user2_id']),
             'created_at': match['created_at'],
             'updated_at': (datetime.now() - timedelta(days=random.randint(1, 3))).isoformat()
         }
@@ -222,56 +224,30 @@ def generate_mock_conversations():
             }
             messages.append(message)
     
-    print("Inserting conversations...")
-    insert_batch_data('conversations', conversations)
-    
-    print("Inserting messages...")
-    insert_batch_data('messages', messages)
-    
-    return True
-
-def insert_batch_data(table, data, batch_size=50):
-    total_inserted = 0
-    
-    for i in range(0, len(data), batch_size):
-        batch = data[i:i + batch_size]
-        result = SupabaseService.insert_data(table, batch)
-        
-        if result['success']:
-            total_inserted += len(batch)
-        else:
-            print(f"   Failed to insert batch {i//batch_size + 1}: {result['error']}")
-            return False
-    
-    print(f"   Inserted {total_inserted} records into {table}")
-    return True
+    print("Inserting conversations and messages...")
+    return bulk_loader.load_all({'conversations': conversations, 'messages': messages})
 
 def insert_core_data():
-    print("Inserting apartments...")
-    if not insert_batch_data('apartments', MOCK_APARTMENTS):
-        return False
-    
-    print("Inserting people...")
-    if not insert_batch_data('people', MOCK_PEOPLE):
-        return False
-    
-    print(" Inserting spots...")
-    if not insert_batch_data('spots', MOCK_SPOTS):
-        return False
-    
-    print("Inserting users...")
-    users = generate_mock_users()
-    if not insert_batch_data('users', users):
-        return False
-    
-    return True
+    print("Inserting users, apartments, people and spots...")
+    return bulk_loader.load_all({
+        'apartments': MOCK_APARTMENTS,
+        'people': MOCK_PEOPLE,
+        'spots': MOCK_SPOTS,
+        'users': generate_mock_users()
+    })
+
+def print_load_report():
+    print("\n Load throughput:")
+    for stats in bulk_loader.report:
+        print(f"   {stats['table']}: {stats['loaded']} records in {stats['seconds']:.2f}s "
+              f"({stats['rows_per_sec']:.0f} rows/sec)")
 
 def check_existing_data():
     tables = ['users', 'apartments', 'people', 'spots', 'apartment_swipes', 'people_swipes', 'spot_swipes']
     existing_data = {}
     
     for table in tables:
-        result = SupabaseService.get_data(table, {})
+        result = SupabaseService.get_data(table, columns=['id'])
         if result['success']:
             count = len(result['data'])
             existing_data[table] = count
@@ -305,7 +281,9 @@ def main():
     print("\n Checking existing data...")
     existing_data = check_existing_data()
     
-    if any(count > 0 for count in existing_data.values()):
+    if bulk_loader.resuming():
+        print(f"\n Resuming the interrupted load checkpointed in {bulk_loader.checkpoint_dir}")
+    elif any(count > 0 for count in existing_data.values()):
         print("\n  Some tables already contain data.")
         response = input("Do you want to continue? This will add more data (y/N): ").strip().lower()
         if response != 'y':
@@ -327,6 +305,9 @@ def main():
         print(" Failed to generate conversations")
         return False
     
+    bulk_loader.finish()
+    print_load_report()
+    
     print("\n" + "=" * 60)
     print(" Comprehensive mock data insertion completed!")
     print("\n Data Summary:")
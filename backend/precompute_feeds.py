@@ -0,0 +1,165 @@
+"""
+Offline feed precomputation.
+
+Loads every user and candidate once, ranks users x candidates in chunks across
+a process pool, and writes each user's top-N people, apartments and spots to
+the feed_cache table. /api/people/feed serves from that table and only applies
+swipe exclusion at request time.
+
+    python3 precompute_feeds.py --top-n 50 --workers 4 --chunk-size 200
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from services.ml_engine import MLEngine
+from services.feed_cache import FeedCache
+from services.supabase_client import SupabaseService
+from config import Config
+
+# Per-worker state, filled once by _init_worker so chunks only ship user rows
+_worker = {}
+
+def _init_worker(people, apartments, spots, top_n):
+    ml_engine = MLEngine()
+    spot_matrix, spot_masks = ml_engine.build_spot_matrix(spots)
+    _worker.update({
+        'ml_engine': ml_engine,
+        'people': people,
+        'apartments': apartments,
+        'spots': spots,
+        'top_n': top_n,
+        'people_matrix': ml_engine.build_candidate_matrix(people),
+        'people_masks': ml_engine.build_interest_masks(people),
+        'people_positions': {person['id']: i for i, person in enumerate(people)},
+        'apartment_matrix': ml_engine.build_apartment_matrix(apartments),
+        'spot_matrix': spot_matrix,
+        'spot_masks': spot_masks,
+        'spot_categories': [(spot.get('category') or '').lower() for spot in spots],
+    })
+
+def _card(row, feed_type, **scores):
+    card = {field: row.get(field) for field in FeedCache.CARD_FIELDS[feed_type]}
+    card.update(scores)
+    return card
+
+def score_chunk(users):
+    """Rank all feeds for a chunk of users; returns feed_cache rows."""
+    ml_engine, top_n = _worker['ml_engine'], _worker['top_n']
+    people, apartments, spots = _worker['people'], _worker['apartments'], _worker['spots']
+    computed_at = datetime.now(timezone.utc).isoformat()
+    
+    # Users without a location keep NaN coordinates, which the distance kernels score as
+    # geo.MISSING_DISTANCE_KM from every candidate, just like the live feeds
+    user_vectors, user_locations, user_masks = ml_engine.build_user_matrices(users)
+    
+    people_feeds = [[] for _ in users]
+    if people:
+        own_positions = np.array([_worker['people_positions'].get(user['id'], -1) for user in users])
+        indices, scores, similarity = ml_engine.score_people_matrix(
+            user_vectors, user_locations, user_masks, _worker['people_matrix'], _worker['people_masks'],
+            k=top_n + 1, exclude=own_positions
+        )
+        for row in range(len(users)):
+            people_feeds[row] = [
+                _card(people[i], 'people', match_score=float(score), interest_similarity=float(sim))
+                for i, score, sim in zip(indices[row], scores[row], similarity[row])
+                if np.isfinite(score)
+            ][:top_n]
+    
+    apartment_feeds = [[] for _ in users]
+    if apartments:
+        indices, scores, distances = ml_engine.score_apartments_matrix(
+            user_vectors, user_locations, _worker['apartment_matrix'], k=top_n
+        )
+        for row in range(len(users)):
+            apartment_feeds[row] = [
+                _card(apartments[i], 'apartments', match_score=float(score), distance=float(distance))
+                for i, score, distance in zip(indices[row], scores[row], distances[row])
+            ]
+    
+    spot_feeds = [[] for _ in users]
+    if spots:
+        # Free-form interests outside the known categories still match by substring
+        extra_matches = {}
+        for row, user in enumerate(users):
+            extra = ml_engine.extra_interest_matches(user.get('interests'), _worker['spot_categories'])
+            if extra is not None:
+                extra_matches[row] = extra
+        indices, scores, distances = ml_engine.score_spots_matrix(
+            user_masks, user_locations, _worker['spot_matrix'], _worker['spot_masks'], k=top_n,
+            extra_matches=extra_matches
+        )
+        for row in range(len(users)):
+            spot_feeds[row] = [
+                _card(spots[i], 'spots', match_score=float(score), distance=float(distance))
+                for i, score, distance in zip(indices[row], scores[row], distances[row])
+            ]
+    
+    rows = []
+    for row, user in enumerate(users):
+        feeds = {
+            'people': people_feeds[row],
+            'apartments': apartment_feeds[row],
+            'spots': spot_feeds[row],
+        }
+        for feed_type, items in feeds.items():
+            rows.append({'user_id': user['id'], 'feed_type': feed_type, 'items': items, 'computed_at': computed_at})
+    
+    return rows
+
+def load_table(table):
+    """Every row of table, streamed page by page; a failed page raises."""
+    rows = []
+    for page in SupabaseService.stream_data(table, page_size=Config.FEED_STREAM_PAGE_SIZE):
+        rows.extend(page)
+    return rows
+
+def write_rows(rows, batch_size=100):
+    written = 0
+    for i in range(0, len(rows), batch_size):
+        result = FeedCache.save(rows[i:i + batch_size])
+        if not result['success']:
+            print(f"   Failed to write feed batch {i // batch_size + 1}: {result['error']}")
+            continue
+        written += len(rows[i:i + batch_size])
+    return written
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute ranked feeds for every user")
+    parser.add_argument('--top-n', type=int, default=50, help="items kept per user and feed")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--chunk-size', type=int, default=200, help="users scored per task")
+    args = parser.parse_args()
+    
+    load_dotenv()
+    
+    print("Loading users and candidates...")
+    started = time.time()
+    users = load_table('users')
+    apartments = [apt for apt in load_table('apartments') if apt.get('price')]
+    spots = load_table('spots')
+    print(f"   {len(users)} users, {len(apartments)} apartments, {len(spots)} spots")
+    
+    chunks = [users[i:i + args.chunk_size] for i in range(0, len(users), args.chunk_size)]
+    written = 0
+    
+    print(f"Scoring {len(chunks)} chunks on {args.workers} workers...")
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker,
+                             initargs=(users, apartments, spots, args.top_n)) as executor:
+        futures = [executor.submit(score_chunk, chunk) for chunk in chunks]
+        for future in as_completed(futures):
+            written += write_rows(future.result())
+    
+    print(f"Wrote {written} feed rows in {time.time() - started:.1f}s")
+    return True
+
+if __name__ == "__main__":
+    main()
@@ -2,35 +2,16 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from services.supabase_client import SupabaseService
 from services.ml_engine import MLEngine
-from services.scraper import scrape_redfin_rentals
+from services.listing_ingest import listing_ingestor
+from services.write_buffer import write_swipe_rows
+from services.swipe_index import swipe_index
 import uuid
-import re
 import random
 import traceback
 
 apartments_bp = Blueprint('apartments', __name__)
 ml_engine = MLEngine()
 
-def parse_price(price_str):
-    if not price_str or "contact" in price_str.lower():
-        return None
-    cleaned_price = re.sub(r'[$,+A-Za-z/]', '', price_str).strip()
-    try:
-        return int(cleaned_price.split('-')[0])
-    except (ValueError, IndexError):
-        return None
-
-def parse_integer_value(value):
-    if value is None:
-        return None
-    cleaned_value = re.sub(r'[^\d]', '', str(value))
-    if cleaned_value:
-        try:
-            return int(cleaned_value)
-        except ValueError:
-            return None
-    return None
-
 @apartments_bp.route('/feed', methods=['GET'])
 @jwt_required()
 def get_apartment_feed():
@@ -42,66 +23,36 @@ def get_apartment_feed():
         
         user = user_result['data'][0]
         
-        user_city = user.get('city', 'Orlando')
-        user_state = user.get('state', 'FL')
+        user_city = user.get('city') or 'Orlando'
+        user_state = user.get('state') or 'FL'
         location_query = f"{user_city}, {user_state}" if ',' not in user_city else user_city
         
-        
         user_lat = user.get('lat') or 28.5383
         user_lng = user.get('lng') or -81.3792
         
+        # Listings come from the background ingestion store; the browser never runs in this request
         data_source = "redfin_scraper"
+        stored = listing_ingestor.lookup(location_query)
+        formatted_scraped_data = []
+        for listing in (stored or {}).get('listings') or []:
+            apartment_data = dict(listing)
+            if apartment_data.get('lat') is None or apartment_data.get('lng') is None:
+                apartment_data['lat'] = float(user_lat) + random.uniform(-0.05, 0.05)
+                apartment_data['lng'] = float(user_lng) + random.uniform(-0.05, 0.05)
+            formatted_scraped_data.append(apartment_data)
+        
+        if stored is None:
+            # First request for this city: the worker has been asked for it, so the client should retry
+            return jsonify({
+                "success": True, "apartments": [], "status": "pending",
+                "message": f"Listings for {location_query} are being fetched",
+                "data_source": data_source, "location_searched": location_query, "listings_refreshed_at": None
+            })
+        
+        swiped_addresses = swipe_index.get('apartments', user_id)
         
-        try:
-            raw_scraped_data = scrape_redfin_rentals(location=location_query, max_listings=20)
-
-            formatted_scraped_data = []
-            for item in raw_scraped_data:
-                price = parse_price(item.get('price'))
-                address = item.get('address')
-
-                if not price or not address:
-                    continue
-
-                bedrooms = item.get('bedrooms')
-                bathrooms = item.get('bathrooms')
-                sqft_val = item.get('sqft')
-                
-                try:
-                    address_city = address.split(',')[1].strip()
-                except IndexError:
-                    address_city = user_city.split(',')[0]
-
-                apartment_data = {
-                    'id': str(uuid.uuid4()),
-                    'title': f"{bedrooms or 'Studio'}, {bathrooms or 1} {address_city}",
-                    'address': address,
-                    'price': price,
-                    'bedrooms': bedrooms if bedrooms is not None else 0,
-                    'bathrooms': bathrooms if bathrooms is not None else 1,
-                    'square_feet': sqft_val,
-                    'lat': float(user_lat) + random.uniform(-0.05, 0.05),
-                    'lng': float(user_lng) + random.uniform(-0.05, 0.05),
-                    'photos': [item.get('image')] if item.get('image') else [],
-                    'description': "A spacious apartment available for rent.",
-                    'amenities': [],
-                }
-                formatted_scraped_data.append(apartment_data)
-
-        except Exception as scraper_error:
-            print(f"Scraper threw an exception: {scraper_error}")
-            traceback.print_exc()
-
-        swipes_data = SupabaseService.get_data('apartment_swipes', {'user_id': user_id})
-        swiped_addresses = {swipe['address'] for swipe in swipes_data['data']} if swipes_data.get('success') else set()
-
         available_apartments = [apt for apt in formatted_scraped_data if apt['address'] not in swiped_addresses]
-
-        if not available_apartments:
-            print("No apartments found. Generating fallback data for a first-time user.")
-            data_source = "fallback_generator"
-            available_apartments = generate_and_save_apartments_for_city(user_city, user_state, user)
-
+        
         if not available_apartments:
             return jsonify({
                 "success": True, "apartments": [], "message": "No more apartments available",
@@ -123,7 +74,8 @@ def get_apartment_feed():
         
         return jsonify({
             "success": True, "apartments": available_apartments, "total_available": len(available_apartments),
-            "data_source": data_source, "location_searched": location_query
+            "data_source": data_source, "location_searched": location_query,
+            "listings_refreshed_at": stored['refreshed_at'] if stored else None
         })
         
     except Exception as e:
@@ -140,84 +92,36 @@ def record_apartment_swipe():
         apartment_id = data.get('apartment_id')
         direction = data.get('direction')
         address = data.get('address', 'Invalid Address')
-
+        
         if not apartment_id or not direction or not address:
             return jsonify({'success': False, 'error': 'Missing apartment_id or direction or address'}), 400
-
+        
         is_like = direction == 'right'
         
         swipe_data = {
             'id': str(uuid.uuid4()), 'user_id': user_id, 
             'is_like': is_like, 'address': address
         }
-
-        result = SupabaseService.insert_data('apartment_swipes', swipe_data)
-
-        if not result['success']:
+        rows = [('apartment_swipes', swipe_data)]
+        if is_like:
+            rows.append(('apartment_matches', {
+                'id': str(uuid.uuid4()), 'user_id': user_id, 'apartment_id': apartment_id, 'address': address
+            }))
+        
+        # Swipe and match go out in one write
+        if not write_swipe_rows(rows):
             return jsonify({'success': False, 'error': 'Failed to record swipe'}), 500
+        swipe_index.record('apartments', user_id, address)
         
         if is_like:
-            match_data = {
-                'id': str(uuid.uuid4()), 'user_id': user_id, 'apartment_id': apartment_id, 'address': address
-            }
-            SupabaseService.insert_data('apartment_matches', match_data)
             return jsonify({
                 'success': True, 'match': True,
                 'message': 'Apartment liked! Added to your matches.'
             }), 200
         
         return jsonify({'success': True, 'match': False, 'message': 'Swipe recorded'}), 200
-
+    
     except Exception as e:
         print(f"Apartment swipe error: {str(e)}")
         traceback.print_exc()
         return jsonify({'success': False, 'error': 'An internal server error occurred'}), 500
-
-def generate_and_save_apartments_for_city(city, state, user):
-    print(f"Generating and saving apartments for {city}, {state}")
-    apartments = generate_realistic_apartments_for_city(city, state, user)
-    
-    apartments_to_insert = [{k: v for k, v in apt.items() if k != 'match_score'} for apt in apartments]
-    
-    if apartments_to_insert:
-        result = SupabaseService.insert_data('apartments', apartments_to_insert)
-        if not result['success']:
-            print(f"Warning: Failed to save generated apartments: {result.get('error')}")
-    
-    return apartments
-
-def generate_realistic_apartments_for_city(city, state, user):
-    neighborhoods = {'orlando': ['Downtown', 'Lake Nona', 'Winter Park'], 'austin': ['Downtown', 'South Congress']}
-    city_neighborhoods = neighborhoods.get(city.lower(), ['Downtown', 'Midtown'])
-    
-    user_lat = user.get('lat', 28.5383)
-    user_lng = user.get('lng', -81.3792)
-    
-    apartments = []
-    apartment_photos = [
-        'https://images.unsplash.com/photo-1560448204-e02f11c3d0e2?w=600&h=400&fit=crop',
-        'https://images.unsplash.com/photo-1522708323590-d24dbb6b0267?w=600&h=400&fit=crop',
-        'https://images.unsplash.com/photo-1484154218962-a197022b5858?w=600&h=400&fit=crop',
-    ]
-    
-    for _ in range(20):
-        neighborhood = random.choice(city_neighborhoods)
-        bedrooms = random.choice([0, 1, 1, 2, 2, 3])
-        apartment = {
-            'id': str(uuid.uuid4()),
-            'title': f"Spacious {bedrooms if bedrooms > 0 else 'Studio'} in {neighborhood}",
-            'address': f"{random.randint(100, 9999)} Main St, {neighborhood}, {city}, {state}",
-            'price': random.randint(1400, 3500),
-            'bedrooms': bedrooms,
-            'bathrooms': max(1, bedrooms),
-            'square_feet': random.randint(500, 1800),
-            'lat': float(user_lat) + random.uniform(-0.1, 0.1),
-            'lng': float(user_lng) + random.uniform(-0.1, 0.1),
-            'photos': random.sample(apartment_photos, 2),
-            'description': f"A beautiful apartment in {neighborhood}.",
-            'amenities': ['Pool', 'Gym', 'Parking'],
-            'match_score': 0.0
-        }
-        apartments.append(apartment)
-    
-    return apartments
\ No newline at end of file
@@ -2,12 +2,14 @@ from flask import Blueprint, request, jsonify, redirect
 from flask_jwt_extended import create_access_token
 from services.supabase_client import SupabaseService
 from services.google_auth import GoogleAuthService
+from services.ml_engine import MLEngine
 from config import Config
 import uuid
 import hashlib
 import requests
 
 auth_bp = Blueprint('auth', __name__)
+ml_engine = MLEngine()
 
 @auth_bp.route('/register', methods=['POST'])
 def register():
@@ -19,13 +21,6 @@ def register():
             if field not in data:
                 return jsonify({'success': False, 'error': f'Missing field: {field}'}), 400
         
-        existing_result = SupabaseService.get_data('users', {'email': data['email']})
-        if not existing_result['success']:
-            return jsonify({'success': False, 'error': 'Database error'}), 500
-        
-        if existing_result['data']:
-            return jsonify({'success': False, 'error': 'User with this email already exists'}), 400
-        
         user_id = str(uuid.uuid4())
         user_data = {
             'id': user_id,
@@ -33,11 +28,15 @@ def register():
             'email': data['email'],
         }
         
-        result = SupabaseService.insert_data('users', user_data)
+        # Insert-on-conflict on the unique email: one round trip, and no duplicate under concurrent sign-ups
+        result = SupabaseService.upsert_data('users', user_data, on_conflict='email', ignore_duplicates=True)
 
         if not result['success']:
             return jsonify({'success': False, 'error': 'Failed to create user'}), 500
         
+        if not result['data']:
+            return jsonify({'success': False, 'error': 'User with this email already exists'}), 400
+        
         access_token = create_access_token(identity=user_id)
         
         return jsonify({
@@ -61,7 +60,7 @@ def login():
         if not email or not password:
             return jsonify({'success': False, 'error': 'Email and password required'}), 400
         
-        user_result = SupabaseService.get_data('users', {'email': email})
+        user_result = SupabaseService.get_data('users', {'email': email}, columns=['id'])
 
         if not user_result['success']:
             return jsonify({'success': False, 'error': 'Database error'}), 500
@@ -137,12 +136,33 @@ def google_callback():
         
         user_info = user_info_result['user_info']
         
-        existing_result = SupabaseService.get_data('users', {'email': user_info['email']})
+        user_id = str(uuid.uuid4())
+        user_data = {
+            'id': user_id,
+            'name': user_info['name'],
+            'email': user_info['email'],
+            'age': 25,
+            'city': 'San Francisco, CA',
+            'budget_min': 1000,
+            'budget_max': 3000,
+            'interests': ['Technology', 'Music', 'Travel'],
+            'interest_mask': ml_engine.encode_interest_mask(['Technology', 'Music', 'Travel']),
+            'bio': f"Hi! I'm {user_info['name']}",
+            'photos': [user_info['picture']] if user_info.get('picture') else []
+        }
+        
+        # Insert-on-conflict on the unique email: returning users get their existing row
+        # back, and concurrent first logins create one user
+        result = SupabaseService.insert_or_get('users', user_data, on_conflict='email')
+        if not result['success']:
+            print(f"User creation failed: {result['error']}")
+            print(f"User data: {user_data}")
+            return jsonify({'success': False, 'error': f"Failed to create user: {result['error']}"}), 500
+        
+        user = result['data']
+        access_token = create_access_token(identity=user['id'])
         
-        if existing_result['success'] and existing_result['data']:
-            user = existing_result['data'][0]
-            access_token = create_access_token(identity=user['id'])
-            
+        if not result['created']:
             return jsonify({
                 'success': True,
                 'message': 'Login successful',
@@ -150,37 +170,15 @@ def google_callback():
                 'user_id': user['id'],
                 'user': user
             }), 200
-        else:
-            user_id = str(uuid.uuid4())
-            user_data = {
-                'id': user_id,
-                'name': user_info['name'],
-                'email': user_info['email'],
-                'age': 25,
-                'city': 'San Francisco, CA',
-                'budget_min': 1000,
-                'budget_max': 3000,
-                'interests': ['Technology', 'Music', 'Travel'],
-                'bio': f"Hi! I'm {user_info['name']}",
-                'photos': [user_info['picture']] if user_info.get('picture') else []
-            }
-            
-            result = SupabaseService.insert_data('users', user_data)
-            if not result['success']:
-                print(f"User creation failed: {result['error']}")
-                print(f"User data: {user_data}")
-                return jsonify({'success': False, 'error': f"Failed to create user: {result['error']}"}), 500
-            
-            access_token = create_access_token(identity=user_id)
-            
-            return jsonify({
-                'success': True,
-                'message': 'User created successfully',
-                'token': access_token,
-                'user_id': user_id,
-                'user': user_data,
-                'needs_onboarding': True
-            }), 200
-            
+        
+        return jsonify({
+            'success': True,
+            'message': 'User created successfully',
+            'token': access_token,
+            'user_id': user['id'],
+            'user': user,
+            'needs_onboarding': True
+        }), 200
+        
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
\ No newline at end of file
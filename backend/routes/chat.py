@@ -1,6 +1,7 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from services.supabase_client import SupabaseService
+from services import pairs
 import uuid
 
 chat_bp = Blueprint('chat', __name__)
@@ -11,25 +12,18 @@ def get_conversations():
     try:
         user_id = get_jwt_identity()
         
-        conversations1 = SupabaseService.get_data('conversations', {'user1_id': user_id})
-        conversations2 = SupabaseService.get_data('conversations', {'user2_id': user_id})
+        conversations_data = SupabaseService.get_data('conversations', or_filters=pairs.involving(user_id))
+        all_conversations = conversations_data['data'] if conversations_data['success'] else []
         
-        all_conversations = []
-        if conversations1['success']:
-            all_conversations.extend(conversations1['data'])
-        if conversations2['success']:
-            all_conversations.extend(conversations2['data'])
+        other_user_ids = [pairs.other_user(conv, user_id) for conv in all_conversations]
+        other_users_data = SupabaseService.get_by_ids('users', other_user_ids, columns=['name', 'photos', 'age'])
+        other_users = other_users_data['data'] if other_users_data['success'] else {}
         
         conversation_list = []
-        for conv in all_conversations:
-            other_user_id = conv['user2_id'] if conv['user1_id'] == user_id else conv['user1_id']
+        for conv, other_user_id in zip(all_conversations, other_user_ids):
+            other_user = other_users.get(other_user_id)
             
-            other_user_data = SupabaseService.get_data('users', {'id': other_user_id})
-            other_user = None
-            
-            if other_user_data['success'] and other_user_data['data']:
-                other_user = other_user_data['data'][0]
-            else:
+            if other_user is None:
                 from data.mock_data import MOCK_PEOPLE
                 other_user = next((p for p in MOCK_PEOPLE if p['id'] == other_user_id), None)
             
@@ -95,7 +89,7 @@ def get_messages(conversation_id):
             messages = messages_data['data']
             messages.sort(key=lambda x: x['sent_at'])
         
-        other_user_id = conversation['user2_id'] if conversation['user1_id'] == user_id else conversation['user1_id']
+        other_user_id = pairs.other_user(conversation, user_id)
         
         other_user_data = SupabaseService.get_data('users', {'id': other_user_id})
         other_user = None
@@ -210,53 +204,36 @@ def start_conversation():
             landlord_hash = hashlib.md5(f"landlord-{other_user_id}".encode()).hexdigest()
             landlord_id = f"{landlord_hash[:8]}-{landlord_hash[8:12]}-{landlord_hash[12:16]}-{landlord_hash[16:20]}-{landlord_hash[20:32]}"
             
-            landlord_data = SupabaseService.get_data('users', {'id': landlord_id})
-            if not landlord_data['success'] or not landlord_data['data']:
-                landlord_user = {
-                    'id': landlord_id,
-                    'name': 'Property Manager',
-                    'email': f'landlord-{other_user_id}@locale.com',
-                    'photos': ['https://images.unsplash.com/photo-1507003211169-0a1dd7228f2d?w=150&h=150&fit=crop&crop=face'],
-                    'age': 35,
-                    'created_at': 'now()'
-                }
-                SupabaseService.insert_data('users', landlord_user)
+            landlord_user = {
+                'id': landlord_id,
+                'name': 'Property Manager',
+                'email': f'landlord-{other_user_id}@locale.com',
+                'photos': ['https://images.unsplash.com/photo-1507003211169-0a1dd7228f2d?w=150&h=150&fit=crop&crop=face'],
+                'age': 35,
+                'created_at': 'now()'
+            }
+            # No-op when the landlord already exists; one round trip either way
+            SupabaseService.upsert_data('users', landlord_user, on_conflict='id', ignore_duplicates=True)
             
             other_user_id = landlord_id
         
-        existing_conv1 = SupabaseService.get_data('conversations', {
-            'user1_id': user_id,
-            'user2_id': other_user_id
-        })
-        existing_conv2 = SupabaseService.get_data('conversations', {
-            'user1_id': other_user_id,
-            'user2_id': user_id
-        })
-        
-        if (existing_conv1['success'] and existing_conv1['data']) or \
-           (existing_conv2['success'] and existing_conv2['data']):
-            existing_conv = existing_conv1['data'][0] if existing_conv1['data'] else existing_conv2['data'][0]
-            return jsonify({
-                "success": True,
-                "conversation_id": existing_conv['id'],
-                "message": "Conversation already exists"
-            })
-        
         conversation_data = {
             'id': str(uuid.uuid4()),
             'user1_id': user_id,
             'user2_id': other_user_id,
+            'pair_key': pairs.pair_key(user_id, other_user_id),
             'created_at': 'now()',
             'last_message_at': 'now()'
         }
         
-        result = SupabaseService.insert_data('conversations', conversation_data)
+        # pair_key is unique, so this either starts the conversation or returns the existing one
+        result = SupabaseService.insert_or_get('conversations', conversation_data, on_conflict='pair_key', columns=['id'])
         
         if result['success']:
             return jsonify({
                 "success": True,
-                "conversation_id": conversation_data['id'],
-                "message": "Conversation started"
+                "conversation_id": result['data']['id'],
+                "message": "Conversation started" if result['created'] else "Conversation already exists"
             })
         else:
             print(f"Supabase insert error: {result.get('error')}")
@@ -0,0 +1,56 @@
+from flask import Blueprint, jsonify
+from services.supabase_client import SupabaseService
+from config import Config
+from services import identity_map, query_trace
+from services.write_buffer import swipe_buffer
+from services.swipe_index import swipe_index
+from services.listing_ingest import listing_ingestor
+
+debug_bp = Blueprint('debug', __name__)
+
+@debug_bp.route('/cache', methods=['GET'])
+def get_cache_stats():
+    stats = SupabaseService.cache_stats()
+    return jsonify({
+        "success": True,
+        "enabled": stats is not None,
+        "cache": stats
+    })
+
+@debug_bp.route('/identity-map', methods=['GET'])
+def get_identity_map_report():
+    return jsonify({
+        "success": True,
+        "endpoints": identity_map.report()
+    })
+
+@debug_bp.route('/queries', methods=['GET'])
+def get_query_report():
+    return jsonify({
+        "success": True,
+        "enabled": Config.QUERY_TRACE_ENABLED,
+        **query_trace.report()
+    })
+
+@debug_bp.route('/write-buffer', methods=['GET'])
+def get_write_buffer_stats():
+    return jsonify({
+        "success": True,
+        "enabled": Config.SWIPE_BUFFER_ENABLED,
+        "buffer": swipe_buffer.stats()
+    })
+
+@debug_bp.route('/swipe-index', methods=['GET'])
+def get_swipe_index_stats():
+    return jsonify({
+        "success": True,
+        "index": swipe_index.stats()
+    })
+
+@debug_bp.route('/listing-ingest', methods=['GET'])
+def get_listing_ingest_stats():
+    return jsonify({
+        "success": True,
+        "in_process": Config.LISTING_INGEST_IN_PROCESS,
+        "ingestor": listing_ingestor.stats()
+    })
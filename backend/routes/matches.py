@@ -1,6 +1,8 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from services.supabase_client import SupabaseService
+from services.concurrency import run_parallel
+from services import pairs
 from data.mock_data import MOCK_APARTMENTS, MOCK_PEOPLE, MOCK_SPOTS
 import uuid
 from datetime import datetime
@@ -35,45 +37,55 @@ def get_matches():
         user_id = get_jwt_identity()
         all_matches = []
         
-        apt_matches = SupabaseService.get_data('apartment_matches', {'user_id': user_id})
-        if apt_matches['success']:
-            for match in apt_matches['data']:
-                apartment_data = SupabaseService.get_data('apartments', {'id': match['apartment_id']})
-                apartment = None
-                
-                if apartment_data['success'] and apartment_data['data']:
-                    apartment = apartment_data['data'][0]
-                else:
-                    apartment = next((apt for apt in MOCK_APARTMENTS if apt['id'] == match['apartment_id']), None)
-                
-                if apartment:
-                    match_item = {
-                        'id': match['apartment_id'],
-                        'name': apartment.get('title', apartment.get('name', 'Apartment')),
-                        'type': 'apartment',
-                        'photo': apartment.get('photos', [create_fallback_photos('apartment', match['apartment_id'])[0]])[0],
-                        'timestamp': match.get('created_at', datetime.now().isoformat())
-                    }
-                    all_matches.append(match_item)
+        match_results = run_parallel({
+            'apartments': (SupabaseService.get_data, 'apartment_matches', {'user_id': user_id}),
+            'people': lambda: SupabaseService.get_data('people_matches', or_filters=pairs.involving(user_id)),
+            'spots': (SupabaseService.get_data, 'spot_matches', {'user_id': user_id}),
+        })
+        apt_matches = match_results['apartments']
+        people_matches = match_results['people']
+        spot_matches = match_results['spots']
         
-        people_matches1 = SupabaseService.get_data('people_matches', {'user1_id': user_id})
-        people_matches2 = SupabaseService.get_data('people_matches', {'user2_id': user_id})
+        apartment_match_rows = apt_matches['data'] if apt_matches['success'] else []
+        spot_match_rows = spot_matches['data'] if spot_matches['success'] else []
+        all_people_matches = people_matches['data'] if people_matches['success'] else []
         
-        all_people_matches = []
-        if people_matches1['success']:
-            all_people_matches.extend(people_matches1['data'])
-        if people_matches2['success']:
-            all_people_matches.extend(people_matches2['data'])
+        # One IN query per table instead of one lookup per match, all three in parallel
+        other_user_ids = [pairs.other_user(match, user_id) for match in all_people_matches]
+        lookups = run_parallel({
+            'apartments': lambda: SupabaseService.get_by_ids(
+                'apartments', [match['apartment_id'] for match in apartment_match_rows], columns=['title', 'photos']
+            ),
+            'people': lambda: SupabaseService.get_by_ids('users', other_user_ids, columns=['name', 'photos']),
+            'spots': lambda: SupabaseService.get_by_ids(
+                'spots', [match['spot_id'] for match in spot_match_rows], columns=['name', 'photos']
+            ),
+        })
+        apartments, people, spots = lookups['apartments'], lookups['people'], lookups['spots']
+        apartment_lookup = apartments['data'] if apartments['success'] else {}
+        people_lookup = people['data'] if people['success'] else {}
+        spot_lookup = spots['data'] if spots['success'] else {}
         
-        for match in all_people_matches:
-            other_user_id = match['user2_id'] if match['user1_id'] == user_id else match['user1_id']
+        for match in apartment_match_rows:
+            apartment = apartment_lookup.get(match['apartment_id'])
+            if apartment is None:
+                apartment = next((apt for apt in MOCK_APARTMENTS if apt['id'] == match['apartment_id']), None)
             
-            person_data = SupabaseService.get_data('users', {'id': other_user_id})
-            person = None
+            if apartment:
+                match_item = {
+                    'id': match['apartment_id'],
+                    'name': apartment.get('title', apartment.get('name', 'Apartment')),
+                    'type': 'apartment',
+                    'photo': apartment.get('photos', [create_fallback_photos('apartment', match['apartment_id'])[0]])[0],
+                    'timestamp': match.get('created_at', datetime.now().isoformat())
+                }
+                all_matches.append(match_item)
+        
+        for match in all_people_matches:
+            other_user_id = pairs.other_user(match, user_id)
             
-            if person_data['success'] and person_data['data']:
-                person = person_data['data'][0]
-            else:
+            person = people_lookup.get(other_user_id)
+            if person is None:
                 person = next((p for p in MOCK_PEOPLE if p['id'] == other_user_id), None)
             
             if person:
@@ -86,26 +98,20 @@ def get_matches():
                 }
                 all_matches.append(match_item)
         
-        spot_matches = SupabaseService.get_data('spot_matches', {'user_id': user_id})
-        if spot_matches['success']:
-            for match in spot_matches['data']:
-                spot_data = SupabaseService.get_data('spots', {'id': match['spot_id']})
-                spot = None
-                
-                if spot_data['success'] and spot_data['data']:
-                    spot = spot_data['data'][0]
-                else:
-                    spot = next((s for s in MOCK_SPOTS if s['id'] == match['spot_id']), None)
-                
-                if spot:
-                    match_item = {
-                        'id': match['spot_id'],
-                        'name': spot.get('name', 'Spot'),
-                        'type': 'spot',
-                        'photo': spot.get('photos', [create_fallback_photos('spot', match['spot_id'])[0]])[0],
-                        'timestamp': match.get('created_at', datetime.now().isoformat())
-                    }
-                    all_matches.append(match_item)
+        for match in spot_match_rows:
+            spot = spot_lookup.get(match['spot_id'])
+            if spot is None:
+                spot = next((s for s in MOCK_SPOTS if s['id'] == match['spot_id']), None)
+            
+            if spot:
+                match_item = {
+                    'id': match['spot_id'],
+                    'name': spot.get('name', 'Spot'),
+                    'type': 'spot',
+                    'photo': spot.get('photos', [create_fallback_photos('spot', match['spot_id'])[0]])[0],
+                    'timestamp': match.get('created_at', datetime.now().isoformat())
+                }
+                all_matches.append(match_item)
         
         all_matches.sort(key=lambda x: x['timestamp'], reverse=True)
         
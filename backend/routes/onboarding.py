@@ -1,8 +1,11 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from services.supabase_client import SupabaseService
+from services.feature_store import feature_store
+from services.ml_engine import MLEngine
 
 onboarding_bp = Blueprint('onboarding', __name__)
+ml_engine = MLEngine()
 
 @onboarding_bp.route('', methods=['POST'])
 @jwt_required()
@@ -27,14 +30,18 @@ def save_onboarding_data():
             'budget_min': int(data.get('budgetMin')),
             'budget_max': int(data.get('budgetMax')),
             'interests': data.get('interests'),
+            'interest_mask': ml_engine.encode_interest_mask(data.get('interests')),
             'photos': data.get('photos', []),
-            'onboarding_complete': True
+            'onboarding_complete': True,
+            'updated_at': 'now()'
         }
         
         result = SupabaseService.update_data('users', update_data, {'id': user_id})
 
         
         if result['success']:
+            if result['data']:
+                feature_store.refresh(result['data'][0])
             return jsonify({
                 "success": True, 
                 "message": "Onboarding completed successfully",
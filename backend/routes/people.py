@@ -2,11 +2,24 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from services.supabase_client import SupabaseService
 from services.ml_engine import MLEngine
+from services.feature_store import feature_store
+from services.geo import bounding_box
+from services.feed_cache import FeedCache
+from services.concurrency import run_parallel
+from services import pairs
+from services.write_buffer import write_swipe_rows
+from services.swipe_index import swipe_index
+from config import Config
 import uuid
 
 people_bp = Blueprint('people', __name__)
 ml_engine = MLEngine()
 
+# Only what ranking needs; display fields are fetched for the winners afterwards
+SCORING_COLUMNS = ['id', 'age', 'budget_max', 'interests', 'interest_mask', 'lat', 'lng', 'updated_at']
+# Widen the search area until at least this many unswiped candidates are in it
+FEED_MIN_CANDIDATES = 20
+
 @people_bp.route('/feed', methods=['GET'])
 @jwt_required()
 def get_people_feed():
@@ -14,40 +27,71 @@ def get_people_feed():
     try:
         user_id = get_jwt_identity()
         
-        user_data = SupabaseService.get_data('users', {'id': user_id})
+        results = run_parallel({
+            'user': (SupabaseService.get_data, 'users', {'id': user_id}),
+            'swiped': (swipe_index.get, 'people', user_id),
+            'cached_feed': (FeedCache.get, user_id, 'people', Config.FEED_CACHE_MAX_AGE),
+        })
+        
+        user_data = results['user']
         if not user_data['success'] or not user_data['data']:
             return jsonify({"error": "User not found"}), 404
         
         user = user_data['data'][0]
         
-        user_lat = user.get('lat', 30.2672)
-        user_lng = user.get('lng', -97.7431)
+        # Without a location every candidate is geo.MISSING_DISTANCE_KM away, as in precompute_feeds
+        user_lat = user.get('lat')
+        user_lng = user.get('lng')
         user_location = [user_lat, user_lng]
         
-        swipes_data = SupabaseService.get_data('people_swipes', {'swiper_id': user_id})
-        swiped_ids = []
-        if swipes_data['success']:
-            swiped_ids = [swipe['swiped_id'] for swipe in swipes_data['data']]
-        
-        people_data = SupabaseService.get_data('users', {})
-        if not people_data['success']:
-            return jsonify({"error": "Failed to fetch people"}), 500
-        
-        all_people = people_data['data']
-        
-        available_people = [person for person in all_people 
-                           if person['id'] not in swiped_ids 
-                           and person['id'] != user_id]
-        
-        if not available_people:
+        # Everyone the user has swiped on, plus the user themselves
+        excluded = results['swiped']
+        
+        cached_feed = results['cached_feed']
+        if cached_feed:
+            cached_people = [person for person in cached_feed['items'] if person['id'] not in excluded]
+            if cached_people:
+                return jsonify({
+                    "success": True,
+                    "people": cached_people[:10],
+                    "total_available": len(cached_people),
+                    "precomputed_at": cached_feed['computed_at']
+                })
+        
+        user_vector = feature_store.get_vector(user)
+        has_location = user_lat is not None and user_lng is not None
+        
+        # Stream candidates inside a box around the user, doubling it while the area is
+        # sparse and finally scanning everyone; only the running top 10 are kept in memory
+        radii = ([Config.FEED_RADIUS_KM * 2 ** step for step in range(4)] + [None]) if has_location else [None]
+        for radius_km in radii:
+            pages = SupabaseService.stream_data(
+                'users',
+                columns=SCORING_COLUMNS,
+                range_filters=bounding_box(user_lat, user_lng, radius_km) if radius_km else None,
+                page_size=Config.FEED_STREAM_PAGE_SIZE
+            )
+            top_recommendations, total_available = ml_engine.stream_people_recommendations(
+                user_vector, pages, user_location, k=10, encode=feature_store.candidates, exclude=excluded
+            )
+            if total_available >= FEED_MIN_CANDIDATES:
+                break
+        
+        if not top_recommendations:
             return jsonify({"success": True, "people": []})
         
-        user_vector = ml_engine.create_user_vector(user)
-        recommendations = ml_engine.people_recommendations(user_vector, available_people, user_location)
+        cards_data = SupabaseService.get_data(
+            'users',
+            in_filters={'id': [rec['person_id'] for rec in top_recommendations]},
+            columns=FeedCache.CARD_FIELDS['people']
+        )
+        if not cards_data['success']:
+            return jsonify({"error": "Failed to fetch people"}), 500
         
+        people_lookup = {p['id']: p for p in cards_data['data']}
         result_people = []
-        for rec in recommendations[:10]:
-            person = next((p for p in available_people if p['id'] == rec['person_id']), None)
+        for rec in top_recommendations:
+            person = people_lookup.get(rec['person_id'])
             if person:
                 person['match_score'] = rec['score']
                 person['interest_similarity'] = rec['interest_similarity']
@@ -56,7 +100,7 @@ def get_people_feed():
         return jsonify({
             "success": True,
             "people": result_people,
-            "total_available": len(available_people)
+            "total_available": total_available
         })
         
     except Exception as e:
@@ -76,55 +120,39 @@ def record_people_swipe():
         if not swiped_id or direction not in ['left', 'right']:
             return jsonify({"error": "Invalid swipe data"}), 400
         
-        swipe_data = {
-            'id': str(uuid.uuid4()),
-            'swiper_id': user_id,
-            'swiped_id': swiped_id,
-            'direction': direction,
-            'created_at': 'now()'
-        }
-        
-        result = SupabaseService.insert_data('people_swipes', swipe_data)
-        
-        if result['success'] and is_like:
-            mutual_swipe = SupabaseService.get_data('people_swipes', {
-                'swiper_id': swiped_id,
-                'swiped_id': user_id,
-                'direction': 'right'
-            })
-            
-            is_mutual = mutual_swipe['success'] and len(mutual_swipe['data']) > 0
-            
-            match_data = {
+        if not is_like:
+            # A pass needs no answer from the database, so it can go through the write buffer
+            write_swipe_rows([('people_swipes', {
                 'id': str(uuid.uuid4()),
-                'user1_id': user_id,
-                'user2_id': swiped_id,
+                'swiper_id': user_id,
+                'swiped_id': swiped_id,
+                'is_like': False,
                 'created_at': 'now()'
-            }
-            SupabaseService.insert_data('people_matches', match_data)
-            
-            if is_mutual:
-                conversation_data = {
-                    'id': str(uuid.uuid4()),
-                    'user1_id': user_id,
-                    'user2_id': swiped_id,
-                    'created_at': 'now()',
-                    'last_message_at': 'now()'
-                }
-                SupabaseService.insert_data('conversations', conversation_data)
-            
-            return jsonify({
-                "success": True,
-                "match": True,
-                "message": "Person liked!" + (" It's a mutual match!" if is_mutual else ""),
-                "is_mutual": is_mutual
-            })
-        else:
+            })])
+            swipe_index.record('people', user_id, swiped_id)
             return jsonify({
                 "success": True,
                 "match": False,
                 "message": "Person passed"
             })
+        
+        # Swipe, reciprocity check, match and conversation in one atomic round trip
+        result = SupabaseService.rpc('record_people_swipe', {
+            'p_swiper_id': user_id,
+            'p_swiped_id': swiped_id,
+            'p_is_like': True
+        }, tables=['people_swipes', 'people_matches', 'conversations'])
+        if not result['success']:
+            return jsonify({"error": result['error']}), 500
+        swipe_index.record('people', user_id, swiped_id)
+        
+        is_mutual = result['data']['is_mutual']
+        return jsonify({
+            "success": True,
+            "match": True,
+            "message": "Person liked!" + (" It's a mutual match!" if is_mutual else ""),
+            "is_mutual": is_mutual
+        })
             
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -135,18 +163,12 @@ def get_people_matches():
     try:
         user_id = get_jwt_identity()
         
-        matches_data1 = SupabaseService.get_data('people_matches', {'user1_id': user_id})
-        matches_data2 = SupabaseService.get_data('people_matches', {'user2_id': user_id})
-        
-        all_matches = []
-        if matches_data1['success']:
-            all_matches.extend(matches_data1['data'])
-        if matches_data2['success']:
-            all_matches.extend(matches_data2['data'])
+        matches_data = SupabaseService.get_data('people_matches', or_filters=pairs.involving(user_id))
+        all_matches = matches_data['data'] if matches_data['success'] else []
         
         matched_people = []
         for match in all_matches:
-            other_user_id = match['user2_id'] if match['user1_id'] == user_id else match['user1_id']
+            other_user_id = pairs.other_user(match, user_id)
             person = next((p for p in MOCK_PEOPLE if p['id'] == other_user_id), None)
             if person:
                 person['match_score'] = match['match_score']
@@ -1,8 +1,11 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from services.supabase_client import SupabaseService
+from services.feature_store import feature_store
+from services.ml_engine import MLEngine
 
 profile_bp = Blueprint('profile', __name__)
+ml_engine = MLEngine()
 
 @profile_bp.route('', methods=['GET'])
 @jwt_required()
@@ -32,11 +35,15 @@ def update_profile():
         
         allowed_fields = ['name', 'age', 'bio', 'interests', 'budget_min', 'budget_max', 'city']
         update_data = {key: value for key, value in data.items() if key in allowed_fields}
+        if 'interests' in update_data:
+            update_data['interest_mask'] = ml_engine.encode_interest_mask(update_data['interests'])
         update_data['updated_at'] = 'now()'
         
         result = SupabaseService.update_data('users', update_data, {'id': user_id})
         
         if result['success']:
+            if result['data']:
+                feature_store.refresh(result['data'][0])
             return jsonify({
                 "success": True,"message": "Profile updated successfully"
             })
@@ -57,7 +64,7 @@ def add_profile_photos():
         if not photo_urls:
             return jsonify({"error": "No photos provided"}), 400
         
-        user_data = SupabaseService.get_data('users', {'id': user_id})
+        user_data = SupabaseService.get_data('users', {'id': user_id}, columns=['photos'])
         if not user_data['success']:
             return jsonify({"error": "User not found"}), 404
         
@@ -89,7 +96,7 @@ def delete_profile_photo(photo_index):
         user_id = get_jwt_identity()
         photo_idx = int(photo_index)
         
-        user_data = SupabaseService.get_data('users', {'id': user_id})
+        user_data = SupabaseService.get_data('users', {'id': user_id}, columns=['photos'])
         if not user_data['success']:
             return jsonify({"error": "User not found"}), 404
         
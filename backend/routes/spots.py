@@ -3,6 +3,8 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from services.supabase_client import SupabaseService
 from services.ml_engine import MLEngine
 from config import Config
+from services.write_buffer import write_swipe_rows
+from services.swipe_index import swipe_index
 from external_apis.google_places_api import GooglePlacesAPI 
 from external_apis.yelp_api import YelpAPI
 import uuid
@@ -49,8 +51,7 @@ def get_spots_feed():
                 all_spots.extend(yelp_result['spots'])
                 data_source = "yelp"
 
-        swipes_data = SupabaseService.get_data('spot_swipes', {'user_id': user_id})
-        swiped_addresses = {swipe['address'] for swipe in swipes_data['data']} if swipes_data.get('success') else set()
+        swiped_addresses = swipe_index.get('spots', user_id)
 
         available_spots = [spot for spot in all_spots if spot['address'] not in swiped_addresses]
 
@@ -109,17 +110,18 @@ def record_spot_swipe():
             'is_like': is_like,
             'address': address
         }
-        result = SupabaseService.insert_data('spot_swipes', swipe_data)
-
-        if not result['success']:
-            print(f"Failed to record spot swipe: {result.get('error')}")
+        rows = [('spot_swipes', swipe_data)]
+        if is_like:
+            rows.append(('spot_matches', {
+                'id': str(uuid.uuid4()), 'user_id': user_id, 'spot_id': spot_id, 'address': address
+            }))
+        
+        # Swipe and match go out in one write
+        if not write_swipe_rows(rows):
             return jsonify({'success': False, 'error': 'Failed to record swipe'}), 500
+        swipe_index.record('spots', user_id, address)
         
         if is_like:
-            match_data = {
-                'id': str(uuid.uuid4()), 'user_id': user_id, 'spot_id': spot_id, 'address': address
-            }
-            SupabaseService.insert_data('spot_matches', match_data)
             return jsonify({
                 'success': True, 'match': True,
                 'message': 'Spot liked! Added to your matches.'
@@ -0,0 +1,150 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from services.supabase_client import SupabaseService
+from services.concurrency import run_parallel
+from services.swipe_index import swipe_index
+from services.write_buffer import write_swipe_rows
+from config import Config
+import uuid
+
+swipes_bp = Blueprint('swipes', __name__)
+
+# type -> (swipe index kind, field naming the swiped item, whether an address is required)
+SWIPE_TYPES = {
+    'apartment': ('apartments', 'apartment_id', True),
+    'person': ('people', 'person_id', False),
+    'spot': ('spots', 'spot_id', True),
+}
+
+def validate_swipe(item):
+    """Error message for one batch item, or None if it is valid."""
+    if not isinstance(item, dict):
+        return "Swipe must be an object"
+    if not isinstance(item.get('seq'), int) or isinstance(item.get('seq'), bool):
+        return "Missing integer seq"
+    if item.get('type') not in SWIPE_TYPES:
+        return f"type must be one of {', '.join(SWIPE_TYPES)}"
+    if item.get('direction') not in ['left', 'right']:
+        return "direction must be 'left' or 'right'"
+    _, id_field, needs_address = SWIPE_TYPES[item['type']]
+    if not item.get(id_field):
+        return f"Missing {id_field}"
+    if needs_address and not item.get('address'):
+        return "Missing address"
+    return None
+
+def place_swipe_rows(user_id, item):
+    """Swipe and match rows for an apartment or spot swipe, shaped like the single-swipe routes write them."""
+    table = item['type']
+    is_like = item['direction'] == 'right'
+    rows = [(f'{table}_swipes', {
+        'id': str(uuid.uuid4()), 'user_id': user_id, 'is_like': is_like, 'address': item['address']
+    })]
+    if is_like:
+        rows.append((f'{table}_matches', {
+            'id': str(uuid.uuid4()), 'user_id': user_id, f'{table}_id': item[f'{table}_id'],
+            'address': item['address']
+        }))
+    return rows
+
+@swipes_bp.route('/batch', methods=['POST'])
+@jwt_required()
+def record_swipe_batch():
+    """
+    Record several apartment, person and spot swipes in one request.
+
+    Body: {"swipes": [{"seq", "type", "direction", "apartment_id"|"person_id"|"spot_id", "address"?}, ...]}.
+    Items are applied in seq order; when one card is swiped more than once in a
+    batch only the last swipe counts. Returns one result per item, sorted by seq.
+    """
+    try:
+        user_id = get_jwt_identity()
+        data = request.get_json() or {}
+        items = data.get('swipes')
+        
+        if not isinstance(items, list) or not items:
+            return jsonify({"error": "swipes must be a non-empty list"}), 400
+        if len(items) > Config.SWIPE_BATCH_MAX_ITEMS:
+            return jsonify({"error": f"At most {Config.SWIPE_BATCH_MAX_ITEMS} swipes per batch"}), 400
+        
+        seqs = [item.get('seq') for item in items if isinstance(item, dict) and item.get('seq') is not None]
+        duplicates = sorted({str(seq) for seq in seqs if seqs.count(seq) > 1})
+        if duplicates:
+            return jsonify({"error": f"Duplicate seq {', '.join(duplicates)}"}), 400
+        
+        # (sort key, result) pairs; items without a usable seq keep their position after the numbered ones
+        results, ordered_results, valid = {}, [], []
+        for position, item in enumerate(items):
+            error = validate_swipe(item)
+            if error is not None:
+                seq = item.get('seq') if isinstance(item, dict) else None
+                sort_key = (0, seq, position) if isinstance(seq, int) and not isinstance(seq, bool) else (1, 0, position)
+                ordered_results.append((sort_key, {"seq": seq, "success": False, "error": error}))
+            else:
+                results[item['seq']] = {"seq": item['seq'], "type": item['type']}
+                ordered_results.append(((0, item['seq'], position), results[item['seq']]))
+                valid.append(item)
+        
+        # Last swipe on each card wins
+        latest = {}
+        for item in sorted(valid, key=lambda item: item['seq']):
+            _, id_field, _ = SWIPE_TYPES[item['type']]
+            target = (item['type'], item[id_field])
+            if target in latest:
+                results[latest[target]['seq']].update(success=True, match=False, superseded_by=item['seq'])
+            latest[target] = item
+        
+        place_rows = {'apartment': [], 'spot': []}
+        passes, likes = [], []
+        for item in latest.values():
+            if item['type'] != 'person':
+                place_rows[item['type']].append(item)
+            elif item['direction'] == 'right':
+                likes.append(item)
+            else:
+                passes.append(item)
+        
+        # One bulk write per item type; likes on people each need the mutual-match RPC
+        writes = {}
+        for swipe_type, type_items in place_rows.items():
+            if type_items:
+                rows = [row for item in type_items for row in place_swipe_rows(user_id, item)]
+                writes[swipe_type] = (write_swipe_rows, rows)
+        if passes:
+            writes['person'] = (write_swipe_rows, [('people_swipes', {
+                'id': str(uuid.uuid4()), 'swiper_id': user_id, 'swiped_id': item['person_id'],
+                'is_like': False, 'created_at': 'now()'
+            }) for item in passes])
+        for item in likes:
+            writes[('like', item['seq'])] = (SupabaseService.rpc, 'record_people_swipe', {
+                'p_swiper_id': user_id, 'p_swiped_id': item['person_id'], 'p_is_like': True
+            }, ['people_swipes', 'people_matches', 'conversations'])
+        outcomes = run_parallel(writes)
+        
+        for item in latest.values():
+            kind, _, _ = SWIPE_TYPES[item['type']]
+            result = results[item['seq']]
+            if item['type'] == 'person' and item['direction'] == 'right':
+                outcome = outcomes[('like', item['seq'])]
+                if not outcome['success']:
+                    result.update(success=False, error=outcome['error'])
+                    continue
+                result.update(success=True, match=True, is_mutual=outcome['data']['is_mutual'])
+            elif not outcomes[item['type']]:
+                result.update(success=False, error="Failed to record swipe")
+                continue
+            else:
+                result.update(success=True, match=item['direction'] == 'right')
+            # The feeds exclude apartments and spots by address, people by id
+            swipe_index.record(kind, user_id, item['person_id'] if item['type'] == 'person' else item['address'])
+        
+        ordered = [result for _, result in sorted(ordered_results, key=lambda pair: pair[0])]
+        return jsonify({
+            "success": True,
+            "results": ordered,
+            "recorded": sum(1 for result in ordered if result.get('success') and 'superseded_by' not in result),
+            "matches": sum(1 for result in ordered if result.get('match'))
+        })
+    
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
@@ -0,0 +1,204 @@
+"""
+Bulk Loader - parallel, resumable table loads for populate_database
+
+Rows are written in batches by a bounded pool of workers per table. The batch
+size adapts as the load runs: each batch's latency is compared with
+target_seconds and the next batches are sized to match, a failed batch is
+split in half and retried, and a batch that still fails at min_batch rows
+after max_retries attempts stops the load.
+
+Before a table is loaded its rows are staged to a JSONL file in
+checkpoint_dir, and every batch that lands is appended to a progress file. A
+rerun after an interruption reloads the staged rows (the generators are
+random, so fresh rows would not line up with what is already in the
+database) and only sends the spans not yet recorded. Batches are written
+with ON CONFLICT DO NOTHING on the primary key, so a batch that landed just
+before the crash but was never recorded is harmlessly sent again.
+"""
+import json
+import os
+import shutil
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from config import Config
+
+def table_order(tables):
+    """tables sorted so every table comes after the tables its foreign keys reference."""
+    from setup import SQL_SCHEMA
+    from services.local_backend import parse_schema
+    schema = parse_schema(SQL_SCHEMA)
+    
+    ordered, visiting = [], set()
+    def visit(table):
+        if table in ordered or table in visiting:
+            return
+        visiting.add(table)
+        parent_tables = set(schema[table].references.values()) if table in schema else set()
+        for parent in sorted(parent_tables & set(tables)):
+            visit(parent)
+        visiting.discard(table)
+        ordered.append(table)
+    
+    for table in tables:
+        visit(table)
+    return ordered
+
+class _Checkpoint:
+    """Staged rows and committed spans for one table."""
+    
+    def __init__(self, directory, table):
+        self.rows_path = os.path.join(directory, f"{table}.rows.jsonl")
+        self.progress_path = os.path.join(directory, f"{table}.progress")
+    
+    def stage(self, rows):
+        """The rows to load: the staged copy if one exists, otherwise rows, staged now."""
+        if os.path.exists(self.rows_path):
+            with open(self.rows_path, encoding='utf-8') as staged:
+                return [json.loads(line) for line in staged]
+        
+        partial = self.rows_path + '.tmp'
+        with open(partial, 'w', encoding='utf-8') as staged:
+            for row in rows:
+                staged.write(json.dumps(row, default=str) + '\n')
+        os.replace(partial, self.rows_path)
+        return list(rows)
+    
+    def pending(self, total):
+        """[(start, stop), ...] spans of rows not yet recorded as loaded."""
+        done = []
+        if os.path.exists(self.progress_path):
+            with open(self.progress_path, encoding='utf-8') as progress:
+                for line in progress:
+                    try:
+                        start, stop = map(int, line.split())
+                    except ValueError:
+                        # A torn last line from the crash
+                        continue
+                    done.append((start, stop))
+        
+        spans, cursor = [], 0
+        for start, stop in sorted(done):
+            if start > cursor:
+                spans.append((cursor, start))
+            cursor = max(cursor, stop)
+        if cursor < total:
+            spans.append((cursor, total))
+        return spans
+    
+    def mark(self, start, stop):
+        with open(self.progress_path, 'a', encoding='utf-8') as progress:
+            progress.write(f"{start} {stop}\n")
+
+class BulkLoader:
+    def __init__(self, checkpoint_dir='.bulk_load', workers=4, initial_batch=100, min_batch=10,
+                 max_batch=2000, target_seconds=1.0, max_retries=3):
+        self.checkpoint_dir = checkpoint_dir
+        self.workers = workers
+        self.initial_batch = initial_batch
+        self.min_batch = min_batch
+        self.max_batch = max_batch
+        self.target_seconds = target_seconds
+        self.max_retries = max_retries
+        self.report = []
+    
+    def resuming(self):
+        """Whether an earlier, interrupted load left checkpoints behind."""
+        return os.path.isdir(self.checkpoint_dir) and bool(os.listdir(self.checkpoint_dir))
+    
+    def load_all(self, tables):
+        """Load {table: rows} in foreign-key order; stops at the first table that fails."""
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        # Stage every table up front so a resumed run sees the whole batch it was given
+        staged = {table: _Checkpoint(self.checkpoint_dir, table).stage(rows) for table, rows in tables.items()}
+        for table in table_order(list(tables)):
+            if not self._load(table, staged[table])['success']:
+                return False
+        return True
+    
+    def load(self, table, rows):
+        """
+        Load rows into table. Returns {"success", "table", "rows", "loaded",
+        "seconds", "rows_per_sec", "batch_size"} and appends it to report.
+        """
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        return self._load(table, _Checkpoint(self.checkpoint_dir, table).stage(rows))
+    
+    def _load(self, table, rows):
+        checkpoint = _Checkpoint(self.checkpoint_dir, table)
+        queue = deque(checkpoint.pending(len(rows)))
+        already = len(rows) - sum(stop - start for start, stop in queue)
+        if already:
+            print(f"   Resuming {table}: {already} of {len(rows)} records already loaded")
+        
+        batch_size, loaded, error = self.initial_batch, 0, None
+        attempts, in_flight = {}, {}
+        started = time.perf_counter()
+        
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=f'load-{table}') as pool:
+            while (queue and error is None) or in_flight:
+                while queue and error is None and len(in_flight) < self.workers:
+                    start, end = queue.popleft()
+                    stop = min(end, start + batch_size)
+                    if stop < end:
+                        queue.appendleft((stop, end))
+                    in_flight[pool.submit(self._write, table, rows[start:stop])] = (start, stop)
+                
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    start, stop = in_flight.pop(future)
+                    result, seconds = future.result()
+                    size = stop - start
+                    if result['success']:
+                        checkpoint.mark(start, stop)
+                        loaded += size
+                        batch_size = self._next_batch_size(batch_size, size, seconds)
+                        continue
+                    
+                    batch_size = max(self.min_batch, min(batch_size, size // 2))
+                    if size > self.min_batch:
+                        middle = start + size // 2
+                        queue.extendleft([(middle, stop), (start, middle)])
+                        continue
+                    attempts[start] = attempts.get(start, 0) + 1
+                    if attempts[start] < self.max_retries:
+                        queue.appendleft((start, stop))
+                    else:
+                        error = result['error']
+        
+        seconds = time.perf_counter() - started
+        stats = {
+            'success': error is None,
+            'table': table,
+            'rows': len(rows),
+            'loaded': loaded,
+            'seconds': round(seconds, 3),
+            'rows_per_sec': round(loaded / seconds, 1) if seconds > 0 else 0.0,
+            'batch_size': batch_size,
+        }
+        self.report.append(stats)
+        if error is not None:
+            print(f"   Failed to load {table} after {loaded} records: {error}")
+        else:
+            print(f"   Inserted {loaded} records into {table} "
+                  f"({stats['rows_per_sec']:.0f} rows/sec, final batch size {batch_size})")
+        return stats
+    
+    def _write(self, table, batch):
+        from services.supabase_client import SupabaseService
+        started = time.perf_counter()
+        result = SupabaseService.upsert_data(table, batch, ignore_duplicates=True)
+        return result, time.perf_counter() - started
+    
+    def _next_batch_size(self, current, size, seconds):
+        """Move halfway toward the size that would have taken target_seconds."""
+        if seconds <= 0:
+            return min(self.max_batch, current * 2)
+        estimate = size * self.target_seconds / seconds
+        return int(max(self.min_batch, min(self.max_batch, (current + estimate) / 2)))
+    
+    def finish(self):
+        """Drop the checkpoints once the whole load has succeeded."""
+        shutil.rmtree(self.checkpoint_dir, ignore_errors=True)
+
+bulk_loader = BulkLoader(Config.BULK_LOAD_CHECKPOINT_DIR, Config.BULK_LOAD_WORKERS)
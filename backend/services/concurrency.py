@@ -0,0 +1,46 @@
+"""
+Concurrent fan-out for independent SupabaseService calls.
+
+run_parallel runs a declared set of calls on a shared thread pool and joins
+the results, so a handler's latency is the slowest round trip rather than
+the sum of them. Worker threads share the caller's flask.g, so the request's
+identity map and instrumentation still see every read.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app, g, has_app_context
+from config import Config
+
+_executor = ThreadPoolExecutor(max_workers=Config.DB_FANOUT_WORKERS, thread_name_prefix='db-fanout')
+
+def _bind_context(fn):
+    if not has_app_context():
+        return fn
+    app = current_app._get_current_object()
+    shared_g = g._get_current_object()
+    
+    def run(*args, **kwargs):
+        ctx = app.app_context()
+        ctx.g = shared_g
+        with ctx:
+            return fn(*args, **kwargs)
+    return run
+
+def _split(call):
+    if callable(call):
+        return call, ()
+    return call[0], tuple(call[1:])
+
+def run_parallel(calls):
+    """
+    Run independent calls concurrently.
+
+    calls: {name: (fn, *args)} or {name: zero-argument callable}, e.g.
+        {'sent': (SupabaseService.get_data, 'people_matches', {'user1_id': user_id}),
+         'swipes': lambda: SupabaseService.get_data('people_swipes', {...}, columns=['swiped_id'])}
+    Returns {name: result}. An exception in any call is re-raised when results are joined.
+    """
+    calls = {name: _split(call) for name, call in calls.items()}
+    if len(calls) <= 1:
+        return {name: fn(*args) for name, (fn, args) in calls.items()}
+    futures = {name: _executor.submit(_bind_context(fn), *args) for name, (fn, args) in calls.items()}
+    return {name: future.result() for name, future in futures.items()}
@@ -0,0 +1,164 @@
+"""
+Feature Store - cached ML feature vectors per user
+
+Each user's encoded vector is kept next to the users.updated_at value it was
+computed from, in memory and in the user_features table. Profile writes
+refresh the entry; feeds read vectors in bulk and only re-encode rows whose
+updated_at no longer matches. The in-memory map keeps the max_entries most
+recently used users.
+
+Re-encoded vectors are queued and written to user_features by a background
+thread every flush_seconds, so no request waits on the upsert. The table only
+saves re-encoding after a restart; a queued vector lost in a crash is simply
+encoded again.
+"""
+import atexit
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from config import Config
+from services.geo import coords_array
+from services.ml_engine import MLEngine
+from services.supabase_client import SupabaseService
+
+class FeatureStore:
+    TABLE = 'user_features'
+    
+    def __init__(self, ml_engine=None, flush_seconds=2.0, max_entries=50000):
+        self.ml_engine = ml_engine or MLEngine()
+        self.flush_seconds = flush_seconds
+        self.max_entries = max_entries
+        # user_id -> (updated_at, vector), least recently used first
+        self._entries = OrderedDict()
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        # user_id -> user_features row waiting for the next flush
+        self._dirty = {}
+        self._thread = None
+    
+    def _load(self):
+        if self._loaded:
+            return
+        with self._load_lock:
+            if self._loaded:
+                return
+            try:
+                for page in SupabaseService.stream_data(self.TABLE, columns=['vector', 'updated_at'], key='user_id',
+                                                        page_size=Config.FEED_STREAM_PAGE_SIZE):
+                    with self._lock:
+                        for row in page:
+                            # Vectors encoded while the load was running are newer
+                            if row['user_id'] not in self._entries:
+                                self._entries[row['user_id']] = (
+                                    row.get('updated_at'), np.asarray(row['vector'], dtype=np.float32)
+                                )
+                                self._entries.move_to_end(row['user_id'], last=False)
+                        if len(self._entries) >= self.max_entries:
+                            self._evict()
+                            break
+            except Exception as e:
+                print(f"Warning: Failed to load user features: {e}")
+            self._loaded = True
+    
+    def _put(self, user_id, entry):
+        """Store an entry as most recently used; the caller holds the lock."""
+        self._entries[user_id] = entry
+        self._entries.move_to_end(user_id)
+        self._evict()
+    
+    def _evict(self):
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def _encode(self, user):
+        return np.asarray(self.ml_engine.create_user_vector(user), dtype=np.float32)
+    
+    def _save(self, users, vectors):
+        """Queue rows for the background writer; returns without touching the database."""
+        with self._lock:
+            for user, vector in zip(users, vectors):
+                self._dirty[user['id']] = {
+                    'user_id': user['id'], 'vector': vector.tolist(), 'updated_at': user.get('updated_at')
+                }
+        self._start()
+    
+    def _start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='feature-store', daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+    
+    def _run(self):
+        while True:
+            time.sleep(self.flush_seconds)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Warning: Feature store flush failed: {e}")
+    
+    def flush(self):
+        """Write every queued vector in one upsert; returns the number of rows written."""
+        with self._lock:
+            rows, self._dirty = list(self._dirty.values()), {}
+        if not rows:
+            return 0
+        result = SupabaseService.upsert_data(self.TABLE, rows, on_conflict='user_id')
+        if not result['success']:
+            print(f"Warning: Failed to persist user features: {result.get('error')}")
+            with self._lock:
+                # Retry next flush unless a newer vector was queued meanwhile
+                for row in rows:
+                    self._dirty.setdefault(row['user_id'], row)
+            return 0
+        return len(rows)
+    
+    def refresh(self, user):
+        """Re-encode one user row after a profile write; the row must include updated_at."""
+        if not user or 'id' not in user:
+            return None
+        vector = self._encode(user)
+        with self._lock:
+            self._put(user['id'], (user.get('updated_at'), vector))
+        self._save([user], [vector])
+        return vector
+    
+    def get_vectors(self, users):
+        """Return an (N, 14) float32 matrix of feature vectors for the given user rows."""
+        self._load()
+        vectors = np.empty((len(users), 2 + len(self.ml_engine.interest_categories)), dtype=np.float32)
+        stale_users, stale_vectors = [], []
+        
+        with self._lock:
+            for row, user in enumerate(users):
+                entry = self._entries.get(user['id'])
+                if entry is not None and entry[0] == user.get('updated_at'):
+                    self._entries.move_to_end(user['id'])
+                    vectors[row] = entry[1]
+                    continue
+                vector = self._encode(user)
+                self._put(user['id'], (user.get('updated_at'), vector))
+                vectors[row] = vector
+                stale_users.append(user)
+                stale_vectors.append(vector)
+        
+        if stale_users:
+            self._save(stale_users, stale_vectors)
+        return vectors
+    
+    def get_vector(self, user):
+        return self.get_vectors([user])[0]
+    
+    def candidates(self, people):
+        """Build MLEngine candidate inputs (matrix, interest masks) from stored vectors and users.interest_mask."""
+        vectors = self.get_vectors(people)
+        matrix = np.empty((len(people), 4), dtype=np.float32)
+        matrix[:, :2] = vectors[:, :2]
+        matrix[:, 2:] = coords_array(people)
+        return matrix, self.ml_engine.build_interest_masks(people)
+
+feature_store = FeatureStore(flush_seconds=Config.FEATURE_STORE_FLUSH_SECONDS,
+                             max_entries=Config.FEATURE_STORE_MAX_ENTRIES)
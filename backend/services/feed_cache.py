@@ -0,0 +1,47 @@
+"""
+Feed Cache - precomputed ranked feeds per user
+
+Written by precompute_feeds.py, read by the feed routes. Each row holds a
+user's ranked top-N items for one feed type ('people', 'apartments', 'spots')
+plus the time it was computed.
+"""
+from datetime import datetime, timezone
+from services.supabase_client import SupabaseService
+
+class FeedCache:
+    TABLE = 'feed_cache'
+    FEED_TYPES = ('people', 'apartments', 'spots')
+    
+    # Row fields copied into each cached item so feeds can be served without refetching rows
+    CARD_FIELDS = {
+        'people': ['id', 'name', 'age', 'bio', 'city', 'photos', 'interests', 'lat', 'lng'],
+        'apartments': ['id', 'title', 'address', 'price', 'bedrooms', 'bathrooms', 'square_feet',
+                       'lat', 'lng', 'photos', 'description', 'amenities'],
+        'spots': ['id', 'name', 'category', 'rating', 'price_level', 'address', 'lat', 'lng',
+                  'photos', 'description'],
+    }
+    
+    @staticmethod
+    def save(rows):
+        """Upsert rows of {'user_id', 'feed_type', 'items', 'computed_at'}."""
+        return SupabaseService.upsert_data(FeedCache.TABLE, rows, on_conflict='user_id,feed_type')
+    
+    @staticmethod
+    def get(user_id, feed_type, max_age_seconds=None):
+        """Return the cached feed row, or None if missing or older than max_age_seconds."""
+        result = SupabaseService.get_data(FeedCache.TABLE, {'user_id': user_id, 'feed_type': feed_type},
+                                          columns=['items', 'computed_at'])
+        if not result['success'] or not result['data']:
+            return None
+        
+        row = result['data'][0]
+        if max_age_seconds is not None:
+            try:
+                computed_at = datetime.fromisoformat(row['computed_at'].replace('Z', '+00:00'))
+            except (TypeError, ValueError, AttributeError):
+                return None
+            if computed_at.tzinfo is None:
+                computed_at = computed_at.replace(tzinfo=timezone.utc)
+            if (datetime.now(timezone.utc) - computed_at).total_seconds() > max_age_seconds:
+                return None
+        return row
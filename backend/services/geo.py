@@ -0,0 +1,81 @@
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+# Distance assumed when either side has no location; every feed scores missing locations this way
+MISSING_DISTANCE_KM = 20.0
+
+def coords_array(items, lat_key='lat', lng_key='lng'):
+    """Collect item coordinates into an (N, 2) float array; missing values become NaN."""
+    return np.array([(item.get(lat_key), item.get(lng_key)) for item in items], dtype=np.float64).reshape(-1, 2)
+
+def haversine_km(origin, coords, missing_distance=MISSING_DISTANCE_KM):
+    """
+    Great-circle distance in km from one origin to every row of an (N, 2) lat/lng array.
+
+    Rows with a NaN coordinate (or a missing origin) get missing_distance instead.
+    The computation keeps the dtype of coords, so float32 matrices stay float32.
+    """
+    coords = np.asarray(coords)
+    if coords.dtype.kind != 'f':
+        coords = coords.astype(np.float64)
+    dtype = coords.dtype
+    
+    if origin is None or any(c is None for c in origin):
+        return np.full(len(coords), missing_distance, dtype=dtype)
+    
+    lat1, lng1 = np.radians(np.asarray(origin, dtype=dtype))
+    lat2 = np.radians(coords[:, 0])
+    lng2 = np.radians(coords[:, 1])
+    
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    distance = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+    
+    missing = np.isnan(distance)
+    if missing.any():
+        distance[missing] = missing_distance
+    return distance.astype(dtype, copy=False)
+
+def haversine_pairs_km(origins, coords, missing_distance=MISSING_DISTANCE_KM):
+    """
+    Element-wise great-circle distance between two broadcastable (..., 2) arrays.
+
+    Any pair with a NaN on either side gets missing_distance. Keeps the dtype of coords.
+    """
+    coords = np.asarray(coords)
+    if coords.dtype.kind != 'f':
+        coords = coords.astype(np.float64)
+    dtype = coords.dtype
+    origins = np.asarray(origins, dtype=dtype)
+    
+    lat1, lng1 = np.radians(origins[..., 0]), np.radians(origins[..., 1])
+    lat2, lng2 = np.radians(coords[..., 0]), np.radians(coords[..., 1])
+    
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    distance = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+    
+    missing = np.isnan(distance)
+    if missing.any():
+        distance[missing] = missing_distance
+    return distance.astype(dtype, copy=False)
+
+def haversine_matrix_km(origins, coords, missing_distance=MISSING_DISTANCE_KM):
+    """Pairwise distances, shape (U, M), between U origins and M coordinates."""
+    origins = np.asarray(origins).reshape(-1, 2)
+    coords = np.asarray(coords).reshape(-1, 2)
+    return haversine_pairs_km(origins[:, None, :], coords[None, :, :], missing_distance)
+
+def bounding_box(lat, lng, radius_km):
+    """
+    get_data range_filters for a lat/lng box enclosing the radius_km circle.
+
+    The longitude bound is dropped near the poles or where the box would
+    cross the antimeridian, leaving only the latitude band.
+    """
+    lat_delta = np.degrees(radius_km / EARTH_RADIUS_KM)
+    ranges = {'lat': {'gte': max(lat - lat_delta, -90.0), 'lte': min(lat + lat_delta, 90.0)}}
+    
+    if abs(lat) + lat_delta < 90.0:
+        lng_delta = np.degrees(radius_km / (EARTH_RADIUS_KM * np.cos(np.radians(lat))))
+        if -180.0 <= lng - lng_delta and lng + lng_delta <= 180.0:
+            ranges['lng'] = {'gte': lng - lng_delta, 'lte': lng + lng_delta}
+    return {column: {op: float(value) for op, value in bounds.items()} for column, bounds in ranges.items()}
@@ -0,0 +1,86 @@
+"""
+Identity Map - per-request deduplication of SupabaseService reads
+
+Identical get_data calls within one request are served from a map stored on
+flask.g, so each distinct read hits Supabase at most once per request. Writes
+drop the map's entries for the written table. Absorbed duplicate reads are
+counted per endpoint for the debug report.
+
+run_parallel's pool threads share the request's g, so the map and its
+counters are only touched under a lock created with them at request start.
+"""
+import copy
+import threading
+from flask import g, has_app_context, request
+
+_stats = {}
+_stats_lock = threading.Lock()
+# Guards creating a map in app contexts that never went through before_request
+_create_lock = threading.Lock()
+
+def _current_map():
+    """The context's (map, lock), created on first use, or None outside an app context."""
+    if not has_app_context():
+        return None
+    if 'identity_map' not in g:
+        with _create_lock:
+            if 'identity_map' not in g:
+                g.identity_map_reads = 0
+                g.identity_map_absorbed = 0
+                g.identity_map_lock = threading.Lock()
+                g.identity_map = {}
+    return g.identity_map, g.identity_map_lock
+
+def lookup(key):
+    """Return a copy of a result already read in this request, or None."""
+    current = _current_map()
+    if current is None:
+        return None
+    identity_map, lock = current
+    with lock:
+        g.identity_map_reads += 1
+        if key not in identity_map:
+            return None
+        g.identity_map_absorbed += 1
+        result = identity_map[key]
+    return copy.deepcopy(result)
+
+def store(key, result):
+    current = _current_map()
+    if current is not None and result.get('success'):
+        identity_map, lock = current
+        result = copy.deepcopy(result)
+        with lock:
+            identity_map[key] = result
+
+def invalidate(table):
+    current = _current_map()
+    if current is not None:
+        identity_map, lock = current
+        with lock:
+            for key in [key for key in identity_map if key[0] == table]:
+                del identity_map[key]
+
+def report():
+    """Per-endpoint totals: requests, reads and duplicate reads absorbed."""
+    with _stats_lock:
+        return {endpoint: dict(counts) for endpoint, counts in _stats.items()}
+
+def init_app(app, expose_header=False):
+    @app.before_request
+    def create_identity_map():
+        _current_map()
+    
+    @app.after_request
+    def record_identity_map(response):
+        if 'identity_map' not in g:
+            return response
+        endpoint = request.endpoint or request.path
+        with _stats_lock:
+            counts = _stats.setdefault(endpoint, {'requests': 0, 'reads': 0, 'absorbed': 0})
+            counts['requests'] += 1
+            counts['reads'] += g.identity_map_reads
+            counts['absorbed'] += g.identity_map_absorbed
+        if expose_header:
+            response.headers['X-Identity-Map-Absorbed'] = str(g.identity_map_absorbed)
+        return response
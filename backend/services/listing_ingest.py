@@ -0,0 +1,308 @@
+"""
+Listing Ingest - background Redfin scraping into a per-city listing store
+
+The apartment feed used to drive headless Chrome through Redfin on every
+request. Scraping now happens here instead: ListingStore keeps the formatted
+listings for each city in the listing_cache table with the time they were
+refreshed, and ListingIngestor is a worker that rescrapes cities whose
+listings are older than refresh_seconds.
+
+The feed only reads the store. A miss or a stale row calls request(), which
+queues the city and returns; a background thread writes queued requests to
+listing_cache, where the worker picks them up, and the feed answers with what
+it has. Cities nobody has asked for in active_seconds drop off the schedule,
+and a city whose scrape fails is retried after retry_seconds, doubling with
+each consecutive failure up to refresh_seconds.
+
+The worker runs on its own with ingest_listings.py. Setting
+LISTING_INGEST_IN_PROCESS=true runs it as a daemon thread in the web process
+instead, which needs Chrome on every web server.
+"""
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from services.supabase_client import SupabaseService
+from config import Config
+
+def parse_price(price_str):
+    if not price_str or "contact" in price_str.lower():
+        return None
+    cleaned_price = re.sub(r'[$,+A-Za-z/]', '', price_str).strip()
+    try:
+        return int(cleaned_price.split('-')[0])
+    except (ValueError, IndexError):
+        return None
+
+def parse_integer_value(value):
+    if value is None:
+        return None
+    cleaned_value = re.sub(r'[^\d]', '', str(value))
+    if cleaned_value:
+        try:
+            return int(cleaned_value)
+        except ValueError:
+            return None
+    return None
+
+def city_key(location):
+    return ' '.join(location.lower().replace(',', ' ').split())
+
+def format_listings(raw_listings, location):
+    """
+    Apartment cards from raw scraper rows. Listings without a price or address
+    are dropped; lat/lng are left for the feed to place, since the scraper
+    does not return coordinates.
+    """
+    listings = []
+    for item in raw_listings:
+        price = parse_price(item.get('price'))
+        address = item.get('address')
+        if not price or not address:
+            continue
+        
+        bedrooms = item.get('bedrooms')
+        bathrooms = item.get('bathrooms')
+        try:
+            address_city = address.split(',')[1].strip()
+        except IndexError:
+            address_city = location.split(',')[0]
+        
+        listings.append({
+            # Stable per address, so a refresh does not turn every card into a new apartment
+            'id': str(uuid.uuid5(uuid.NAMESPACE_URL, f"redfin:{address}")),
+            'title': f"{bedrooms or 'Studio'}, {bathrooms or 1} {address_city}",
+            'address': address,
+            'price': price,
+            'bedrooms': bedrooms if bedrooms is not None else 0,
+            'bathrooms': bathrooms if bathrooms is not None else 1,
+            'square_feet': item.get('sqft'),
+            'lat': None,
+            'lng': None,
+            'photos': [item.get('image')] if item.get('image') else [],
+            'description': "A spacious apartment available for rent.",
+            'amenities': [],
+        })
+    return listings
+
+def _age_seconds(timestamp):
+    if not timestamp:
+        return None
+    try:
+        moment = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+    except (TypeError, ValueError, AttributeError):
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return (datetime.now(timezone.utc) - moment).total_seconds()
+
+class ListingStore:
+    TABLE = 'listing_cache'
+    
+    @staticmethod
+    def get(location):
+        """
+        {'listings', 'refreshed_at', 'requested_at', 'age_seconds'} for a city, or
+        None if it was never scraped successfully.
+        """
+        result = SupabaseService.get_data(ListingStore.TABLE, {'city_key': city_key(location)},
+                                          columns=['listings', 'refreshed_at', 'requested_at'])
+        if not result['success'] or not result['data'] or not result['data'][0].get('refreshed_at'):
+            return None
+        row = result['data'][0]
+        return dict(row, age_seconds=_age_seconds(row['refreshed_at']))
+    
+    @staticmethod
+    def touch(locations):
+        """Record that cities were asked for, adding them to the refresh schedule."""
+        rows = {city_key(location): {'city_key': city_key(location), 'location': location, 'requested_at': 'now()'}
+                for location in locations}
+        return SupabaseService.upsert_data(ListingStore.TABLE, list(rows.values()), on_conflict='city_key')
+    
+    @staticmethod
+    def failures(location):
+        """Consecutive failed scrapes recorded for a city."""
+        result = SupabaseService.get_data(ListingStore.TABLE, {'city_key': city_key(location)}, columns=['failures'])
+        if not result['success'] or not result['data']:
+            return 0
+        return result['data'][0].get('failures') or 0
+    
+    @staticmethod
+    def save(location, listings, error=None, failures=0):
+        """Store a successful scrape, or record a failed one (failures counts it) without touching the listings."""
+        now = datetime.now(timezone.utc).isoformat()
+        row = {'city_key': city_key(location), 'location': location, 'last_error': error, 'failures': failures,
+               'failed_at': now if error is not None else None}
+        if error is None:
+            row.update(listings=listings, refreshed_at=now)
+        return SupabaseService.upsert_data(ListingStore.TABLE, row, on_conflict='city_key')
+    
+    @staticmethod
+    def due(refresh_seconds, active_seconds, retry_seconds=None):
+        """
+        Locations never scraped or older than refresh_seconds, among those asked
+        for recently. A city that failed n times in a row waits
+        retry_seconds * 2**(n-1), at most refresh_seconds, before its next try.
+        """
+        result = SupabaseService.get_data(ListingStore.TABLE,
+                                          columns=['location', 'refreshed_at', 'requested_at', 'failures', 'failed_at'])
+        if not result['success']:
+            print(f"Warning: Failed to read listing schedule: {result.get('error')}")
+            return []
+        
+        due = []
+        for row in result['data']:
+            requested_age = _age_seconds(row.get('requested_at'))
+            if requested_age is not None and requested_age > active_seconds:
+                continue
+            failures = row.get('failures') or 0
+            if failures and retry_seconds is not None:
+                failed_age = _age_seconds(row.get('failed_at'))
+                backoff = min(refresh_seconds, retry_seconds * 2 ** (failures - 1))
+                if failed_age is not None and failed_age < backoff:
+                    continue
+            refreshed_age = _age_seconds(row.get('refreshed_at'))
+            if refreshed_age is None or refreshed_age > refresh_seconds:
+                due.append((refreshed_age is not None, row['location']))
+        # Cities with nothing to show go first
+        return [location for _, location in sorted(due)]
+
+class ListingIngestor:
+    def __init__(self, refresh_seconds=6 * 60 * 60, active_seconds=7 * 24 * 60 * 60, poll_seconds=60,
+                 max_listings=20, retry_seconds=5 * 60, scrape=None):
+        self.refresh_seconds = refresh_seconds
+        self.active_seconds = active_seconds
+        self.poll_seconds = poll_seconds
+        self.max_listings = max_listings
+        self.retry_seconds = retry_seconds
+        self._scrape = scrape
+        # location -> time.monotonic() of the last request() that was queued
+        self._requested = {}
+        # Locations requested but not yet written to the store
+        self._unsent = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._send = threading.Event()
+        self._thread = None
+        self._sender = None
+        self.refreshed = 0
+        self.failed = 0
+    
+    def scrape(self, location):
+        if self._scrape is None:
+            # Selenium and Chrome are only needed where the worker actually runs
+            from services.scraper import scrape_redfin_rentals
+            self._scrape = scrape_redfin_rentals
+        return self._scrape(location=location, max_listings=self.max_listings)
+    
+    def request(self, location):
+        """Ask for a city to be (re)scraped soon; queues it and returns without writing."""
+        with self._lock:
+            last = self._requested.get(location)
+            if last is not None and time.monotonic() - last < self.poll_seconds:
+                return
+            self._requested[location] = time.monotonic()
+            self._unsent.add(location)
+            if self._sender is None:
+                self._sender = threading.Thread(target=self._send_requests, name='listing-requests', daemon=True)
+                self._sender.start()
+        self._send.set()
+    
+    def flush_requests(self):
+        """Write queued requests to the store in one upsert; returns how many were written."""
+        with self._lock:
+            locations, self._unsent = sorted(self._unsent), set()
+        if not locations:
+            return 0
+        result = ListingStore.touch(locations)
+        if not result['success']:
+            print(f"Warning: Failed to record listing requests: {result.get('error')}")
+            with self._lock:
+                self._unsent.update(locations)
+            return 0
+        return len(locations)
+    
+    def _send_requests(self):
+        while True:
+            self._send.wait()
+            self._send.clear()
+            try:
+                self.flush_requests()
+            except Exception as e:
+                print(f"Warning: Failed to record listing requests: {e}")
+            self.start()
+            self._wake.set()
+    
+    def lookup(self, location):
+        """
+        The stored listings for a city (see ListingStore.get), or None. Never
+        scrapes or writes: a missing or stale city is requested from the
+        worker, and a city in use is kept on the schedule.
+        """
+        entry = ListingStore.get(location)
+        if entry is None or entry['age_seconds'] is None or entry['age_seconds'] > self.refresh_seconds:
+            self.request(location)
+            return entry
+        requested_age = _age_seconds(entry.get('requested_at'))
+        if requested_age is None or requested_age > self.refresh_seconds:
+            self.request(location)
+        return entry
+    
+    def refresh(self, location):
+        """Scrape one city now and store the result; returns the number of listings stored."""
+        try:
+            listings = format_listings(self.scrape(location), location)
+        except Exception as e:
+            print(f"Warning: Listing scrape failed for {location}: {e}")
+            ListingStore.save(location, None, error=str(e), failures=ListingStore.failures(location) + 1)
+            self.failed += 1
+            return 0
+        finally:
+            with self._lock:
+                self._requested.pop(location, None)
+        
+        result = ListingStore.save(location, listings)
+        if not result['success']:
+            print(f"Warning: Failed to store listings for {location}: {result.get('error')}")
+            self.failed += 1
+            return 0
+        self.refreshed += 1
+        return len(listings)
+    
+    def run_once(self):
+        """Refresh every due city; returns how many were refreshed."""
+        self.flush_requests()
+        locations = ListingStore.due(self.refresh_seconds, self.active_seconds, self.retry_seconds)
+        for location in locations:
+            self.refresh(location)
+        return len(locations)
+    
+    def run(self):
+        while True:
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Warning: Listing ingestion pass failed: {e}")
+            self._wake.wait(self.poll_seconds)
+            self._wake.clear()
+    
+    def start(self):
+        """Start the in-process worker thread, unless disabled or already running."""
+        if not Config.LISTING_INGEST_IN_PROCESS:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self.run, name='listing-ingest', daemon=True)
+        self._thread.start()
+    
+    def stats(self):
+        with self._lock:
+            return {'requested': sorted(self._requested), 'unsent': sorted(self._unsent), 'refreshed': self.refreshed,
+                    'failed': self.failed, 'running': self._thread is not None,
+                    'refresh_seconds': self.refresh_seconds, 'retry_seconds': self.retry_seconds}
+
+listing_ingestor = ListingIngestor(Config.LISTING_REFRESH_SECONDS, Config.LISTING_ACTIVE_SECONDS,
+                                   Config.LISTING_POLL_SECONDS, Config.LISTING_MAX_PER_CITY,
+                                   Config.LISTING_RETRY_SECONDS)
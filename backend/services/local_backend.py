@@ -0,0 +1,554 @@
+"""
+Local Backend - in-process stand-in for the Supabase client
+
+Tables are built from the CREATE TABLE / CREATE INDEX statements in
+setup.SQL_SCHEMA and held in dicts. LocalClient mimics the slice of the
+postgrest query builder SupabaseService uses (table/select/insert/upsert/
+update/delete, eq/neq/gt/gte/lt/lte/in_/or_, order/range/limit, execute), so
+the routes run unchanged with DATABASE_BACKEND=local: no network, no project.
+
+Primary key and UNIQUE constraints are enforced. Column types, NOT NULL and
+foreign keys are not, since route payloads only loosely track the schema.
+Primary key, unique, foreign key and CREATE INDEX columns get hash indexes
+that eq/in_ filters use to avoid scanning the table.
+
+Stored procedures in the schema are not parsed; rpc() dispatches to Python
+twins in PROCEDURES, each run under the client lock so it is atomic with
+respect to every other query.
+"""
+import copy
+import re
+import threading
+import uuid
+from datetime import datetime, timezone
+
+class LocalBackendError(Exception):
+    pass
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+def _text(value):
+    """Comparison form of a value; PostgREST sends every filter value as text."""
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+def _split_top_level(text, separator=','):
+    """Split on separator outside parentheses and double quotes."""
+    parts, depth, quoted, current = [], 0, False, []
+    escaped = False
+    for char in text:
+        if escaped:
+            current.append(char)
+            escaped = False
+            continue
+        if char == '\\' and quoted:
+            current.append(char)
+            escaped = True
+            continue
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == '(':
+            depth += 1
+        elif not quoted and char == ')':
+            depth -= 1
+        elif not quoted and depth == 0 and char == separator:
+            parts.append(''.join(current).strip())
+            current = []
+            continue
+        current.append(char)
+    if current:
+        parts.append(''.join(current).strip())
+    return [part for part in parts if part]
+
+def _unquote(value):
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return value[1:-1].replace('\\"', '"').replace('\\\\', '\\')
+    return value
+
+def _default_value(expression):
+    if expression is None:
+        return None
+    lowered = expression.lower()
+    if lowered == 'gen_random_uuid()':
+        return str(uuid.uuid4())
+    if lowered in ('now()', 'current_timestamp'):
+        return _now()
+    if lowered in ('true', 'false'):
+        return lowered == 'true'
+    if lowered == 'null':
+        return None
+    if expression.startswith("'"):
+        return expression.strip("'")
+    try:
+        return int(expression)
+    except ValueError:
+        try:
+            return float(expression)
+        except ValueError:
+            return None
+
+# Predicates ---------------------------------------------------------------
+
+def _compare(op, actual, expected):
+    if op == 'is':
+        return _text(actual).lower() == expected.lower() if actual is not None else expected.lower() == 'null'
+    if actual is None:
+        return False
+    if op == 'eq':
+        return _text(actual) == _text(expected)
+    if op == 'neq':
+        return _text(actual) != _text(expected)
+    if op == 'in':
+        return _text(actual) in {_text(value) for value in expected}
+    
+    if isinstance(actual, (int, float)) and not isinstance(actual, bool):
+        expected = float(expected)
+    else:
+        actual, expected = _text(actual), _text(expected)
+    if op == 'gt':
+        return actual > expected
+    if op == 'gte':
+        return actual >= expected
+    if op == 'lt':
+        return actual < expected
+    if op == 'lte':
+        return actual <= expected
+    raise LocalBackendError(f"Unsupported operator: {op}")
+
+def _parse_or(expression):
+    """Parse a PostgREST or=(...) body into a predicate over rows."""
+    branches = []
+    for part in _split_top_level(expression):
+        if part.startswith('and(') and part.endswith(')'):
+            branches.append(('and', _parse_or_terms(part[4:-1])))
+        elif part.startswith('or(') and part.endswith(')'):
+            branches.append(('or', [_parse_or(part[3:-1])]))
+        else:
+            branches.append(('and', _parse_or_terms(part)))
+    
+    def predicate(row):
+        for kind, terms in branches:
+            if kind == 'or' and terms[0](row):
+                return True
+            if kind == 'and' and all(term(row) for term in terms):
+                return True
+        return False
+    return predicate
+
+def _parse_or_terms(text):
+    terms = []
+    for part in _split_top_level(text):
+        if part.startswith('or(') and part.endswith(')'):
+            terms.append(_parse_or(part[3:-1]))
+            continue
+        column, op, value = part.split('.', 2)
+        if op == 'in':
+            value = [_unquote(v) for v in _split_top_level(value.strip('()'))]
+        else:
+            value = _unquote(value)
+        terms.append(lambda row, column=column, op=op, value=value: _compare(op, row.get(column), value))
+    return terms
+
+# Schema --------------------------------------------------------------------
+
+class LocalTable:
+    def __init__(self, name, columns, primary_key, unique, references, indexed):
+        self.name = name
+        self.columns = columns  # {column: default expression or None}
+        self.primary_key = tuple(primary_key)
+        self.unique = [tuple(cols) for cols in unique]
+        self.references = references  # {column: referenced table}
+        self.rows = {}
+        self._next_rowid = 0
+        
+        self.constraints = {}
+        if self.primary_key:
+            self.constraints[self.primary_key] = f"{name}_pkey"
+        for cols in self.unique:
+            self.constraints.setdefault(cols, f"{name}_{'_'.join(cols)}_key")
+        self._unique_maps = {cols: {} for cols in self.constraints}
+        self.indexes = {}
+        for column in indexed:
+            self.create_index(column)
+    
+    def create_index(self, column):
+        if column in self.indexes:
+            return
+        index = {}
+        for rowid, row in self.rows.items():
+            if row.get(column) is not None:
+                index.setdefault(_text(row[column]), set()).add(rowid)
+        self.indexes[column] = index
+    
+    def _constraint_key(self, cols, row):
+        values = [row.get(column) for column in cols]
+        # NULLs never conflict, as in Postgres
+        return None if any(value is None for value in values) else tuple(_text(value) for value in values)
+    
+    def find_conflict(self, cols, row):
+        key = self._constraint_key(cols, row)
+        return None if key is None else self._unique_maps[cols].get(key)
+    
+    def check_unique(self, row, rowid=None):
+        for cols, name in self.constraints.items():
+            existing = self.find_conflict(cols, row)
+            if existing is not None and existing != rowid:
+                values = ', '.join(_text(row[column]) for column in cols)
+                raise LocalBackendError(
+                    f'duplicate key value violates unique constraint "{name}" '
+                    f"(Key ({', '.join(cols)})=({values}) already exists.)"
+                )
+    
+    def check_batch(self, rows):
+        """check_unique for several new rows, including conflicts between them."""
+        seen = {cols: set() for cols in self.constraints}
+        for row in rows:
+            self.check_unique(row)
+            for cols, name in self.constraints.items():
+                key = self._constraint_key(cols, row)
+                if key is not None and key in seen[cols]:
+                    raise LocalBackendError(f'duplicate key value violates unique constraint "{name}"')
+                seen[cols].add(key)
+    
+    def new_row(self, data):
+        row = {column: _default_value(default) for column, default in self.columns.items()}
+        row.update(data)
+        return row
+    
+    def add(self, row):
+        rowid = self._next_rowid
+        self._next_rowid += 1
+        self.rows[rowid] = row
+        self._index(rowid, row)
+        return rowid
+    
+    def remove(self, rowid):
+        self._unindex(rowid, self.rows[rowid])
+        return self.rows.pop(rowid)
+    
+    def replace(self, rowid, row):
+        self._unindex(rowid, self.rows[rowid])
+        self.rows[rowid] = row
+        self._index(rowid, row)
+    
+    def _index(self, rowid, row):
+        for cols, unique_map in self._unique_maps.items():
+            key = self._constraint_key(cols, row)
+            if key is not None:
+                unique_map[key] = rowid
+        for column, index in self.indexes.items():
+            if row.get(column) is not None:
+                index.setdefault(_text(row[column]), set()).add(rowid)
+    
+    def _unindex(self, rowid, row):
+        for cols, unique_map in self._unique_maps.items():
+            key = self._constraint_key(cols, row)
+            if key is not None and unique_map.get(key) == rowid:
+                del unique_map[key]
+        for column, index in self.indexes.items():
+            if row.get(column) is not None:
+                bucket = index.get(_text(row[column]))
+                if bucket is not None:
+                    bucket.discard(rowid)
+                    if not bucket:
+                        del index[_text(row[column])]
+    
+    def candidates(self, eq_filters, in_filters):
+        """Row ids that can match, narrowed with the smallest usable index bucket."""
+        best = None
+        for column, value in eq_filters:
+            if column in self.indexes:
+                bucket = self.indexes[column].get(_text(value), set())
+                if best is None or len(bucket) < len(best):
+                    best = bucket
+        for column, values in in_filters:
+            if column in self.indexes:
+                index = self.indexes[column]
+                bucket = set().union(*(index.get(_text(value), set()) for value in values))
+                if best is None or len(bucket) < len(best):
+                    best = bucket
+        return sorted(best) if best is not None else list(self.rows)
+
+def parse_schema(sql):
+    """Build LocalTables from the CREATE TABLE and CREATE INDEX statements in sql."""
+    sql = re.sub(r'--[^\n]*', '', sql)
+    tables = {}
+    
+    for match in re.finditer(r'CREATE TABLE\s+(?:IF NOT EXISTS\s+)?(\w+)\s*\((.*?)\n\s*\);', sql, re.S | re.I):
+        name, body = match.group(1), match.group(2)
+        columns, primary_key, unique, references = {}, [], [], {}
+        
+        for definition in _split_top_level(' '.join(body.split())):
+            upper = definition.upper()
+            if upper.startswith('PRIMARY KEY'):
+                primary_key = [c.strip() for c in re.search(r'\((.*?)\)', definition).group(1).split(',')]
+            elif upper.startswith('UNIQUE'):
+                unique.append([c.strip() for c in re.search(r'\((.*?)\)', definition).group(1).split(',')])
+            elif upper.startswith(('FOREIGN KEY', 'CONSTRAINT', 'CHECK')):
+                continue
+            else:
+                column = definition.split()[0]
+                default = re.search(r'\bDEFAULT\s+(\'[^\']*\'|[\w.]+(?:\(\))?)', definition, re.I)
+                columns[column] = default.group(1) if default else None
+                if 'PRIMARY KEY' in upper:
+                    primary_key = [column]
+                elif re.search(r'\bUNIQUE\b', upper):
+                    unique.append([column])
+                reference = re.search(r'\bREFERENCES\s+(\w+)', definition, re.I)
+                if reference:
+                    references[column] = reference.group(1)
+        
+        indexed = set(primary_key) | {cols[0] for cols in unique} | set(references)
+        tables[name] = LocalTable(name, columns, primary_key, unique, references, indexed)
+    
+    for match in re.finditer(r'CREATE\s+(UNIQUE\s+)?INDEX\s+(?:IF NOT EXISTS\s+)?\w+\s+ON\s+(\w+)\s*\(([^)]*)\)', sql, re.I):
+        is_unique, table, cols = match.group(1), match.group(2), [c.strip() for c in match.group(3).split(',')]
+        if table not in tables:
+            continue
+        if is_unique and tuple(cols) not in tables[table].unique:
+            tables[table].unique.append(tuple(cols))
+            tables[table].constraints.setdefault(tuple(cols), f"{table}_{'_'.join(cols)}_key")
+            tables[table]._unique_maps.setdefault(tuple(cols), {})
+        tables[table].create_index(cols[0])
+    return tables
+
+# Query builder ----------------------------------------------------------------
+
+class LocalResponse:
+    def __init__(self, data):
+        self.data = data
+        self.count = len(data)
+
+class LocalQuery:
+    def __init__(self, client, table):
+        self._client = client
+        self._table = table
+        self._action = 'select'
+        self._columns = None
+        self._payload = None
+        self._on_conflict = None
+        self._ignore_duplicates = False
+        self._predicates = []
+        self._eq = []
+        self._in = []
+        self._order = []
+        self._offset = 0
+        self._limit = None
+    
+    # Actions
+    def select(self, columns='*', **kwargs):
+        self._action = 'select'
+        self._columns = None if columns.strip() == '*' else [c.strip() for c in columns.split(',')]
+        return self
+    
+    def insert(self, data, **kwargs):
+        self._action, self._payload = 'insert', data
+        return self
+    
+    def upsert(self, data, on_conflict=None, ignore_duplicates=False, **kwargs):
+        self._action, self._payload = 'upsert', data
+        self._on_conflict = on_conflict
+        self._ignore_duplicates = ignore_duplicates
+        return self
+    
+    def update(self, data, **kwargs):
+        self._action, self._payload = 'update', data
+        return self
+    
+    def delete(self, **kwargs):
+        self._action = 'delete'
+        return self
+    
+    # Filters
+    def eq(self, column, value):
+        self._eq.append((column, value))
+        return self._filter('eq', column, value)
+    
+    def neq(self, column, value):
+        return self._filter('neq', column, value)
+    
+    def gt(self, column, value):
+        return self._filter('gt', column, value)
+    
+    def gte(self, column, value):
+        return self._filter('gte', column, value)
+    
+    def lt(self, column, value):
+        return self._filter('lt', column, value)
+    
+    def lte(self, column, value):
+        return self._filter('lte', column, value)
+    
+    def in_(self, column, values):
+        values = list(values)
+        self._in.append((column, values))
+        return self._filter('in', column, values)
+    
+    def or_(self, expression, **kwargs):
+        self._predicates.append(_parse_or(expression))
+        return self
+    
+    def _filter(self, op, column, value):
+        self._predicates.append(lambda row: _compare(op, row.get(column), value))
+        return self
+    
+    # Modifiers
+    def order(self, column, desc=False, **kwargs):
+        self._order.append((column, desc))
+        return self
+    
+    def range(self, start, end):
+        self._offset, self._limit = start, end - start + 1
+        return self
+    
+    def limit(self, count, **kwargs):
+        self._limit = count
+        return self
+    
+    def execute(self):
+        with self._client.lock:
+            table = self._client.get_table(self._table)
+            rows = getattr(self, f'_execute_{self._action}')(table)
+        return LocalResponse(rows)
+    
+    def _matching(self, table):
+        return [rowid for rowid in table.candidates(self._eq, self._in)
+                if all(predicate(table.rows[rowid]) for predicate in self._predicates)]
+    
+    def _execute_select(self, table):
+        rows = [table.rows[rowid] for rowid in self._matching(table)]
+        for column, desc in reversed(self._order):
+            present = [row for row in rows if row.get(column) is not None]
+            missing = [row for row in rows if row.get(column) is None]
+            present.sort(key=lambda row: row[column], reverse=desc)
+            # Postgres puts NULLs last ascending and first descending
+            rows = missing + present if desc else present + missing
+        
+        end = None if self._limit is None else self._offset + self._limit
+        rows = rows[self._offset:end]
+        if self._columns is None:
+            return [dict(row) for row in rows]
+        return [{column: row.get(column) for column in self._columns} for row in rows]
+    
+    def _prepare(self, data):
+        return {key: _now() if isinstance(value, str) and value.lower() == 'now()' else copy.deepcopy(value)
+                for key, value in data.items()}
+    
+    def _execute_insert(self, table):
+        payload = self._payload if isinstance(self._payload, list) else [self._payload]
+        rows = [table.new_row(self._prepare(data)) for data in payload]
+        
+        # Validate the whole batch before writing so a failed insert changes nothing
+        table.check_batch(rows)
+        for row in rows:
+            table.add(row)
+        return [dict(row) for row in rows]
+    
+    def _execute_upsert(self, table):
+        payload = self._payload if isinstance(self._payload, list) else [self._payload]
+        target = tuple(c.strip() for c in self._on_conflict.split(',')) if self._on_conflict else table.primary_key
+        if target not in table.constraints:
+            raise LocalBackendError("there is no unique or exclusion constraint matching the ON CONFLICT specification")
+        
+        written = []
+        for data in payload:
+            data = self._prepare(data)
+            existing = table.find_conflict(target, data)
+            if existing is None:
+                row = table.new_row(data)
+                table.check_unique(row)
+                table.add(row)
+            elif self._ignore_duplicates:
+                continue
+            else:
+                row = dict(table.rows[existing], **data)
+                table.check_unique(row, rowid=existing)
+                table.replace(existing, row)
+            written.append(dict(row))
+        return written
+    
+    def _execute_update(self, table):
+        changes = self._prepare(self._payload)
+        updated = []
+        for rowid in self._matching(table):
+            row = dict(table.rows[rowid], **changes)
+            table.check_unique(row, rowid=rowid)
+            table.replace(rowid, row)
+            updated.append(dict(row))
+        return updated
+    
+    def _execute_delete(self, table):
+        return [table.remove(rowid) for rowid in self._matching(table)]
+
+# Stored procedures ---------------------------------------------------------
+
+def record_people_swipe(client, p_swiper_id, p_swiped_id, p_is_like):
+    """Python twin of the record_people_swipe function in setup.SQL_SCHEMA; runs under client.lock."""
+    client.table('people_swipes').upsert(
+        {'swiper_id': p_swiper_id, 'swiped_id': p_swiped_id, 'is_like': p_is_like},
+        on_conflict='swiper_id,swiped_id'
+    ).execute()
+    if not p_is_like:
+        return {'is_mutual': False, 'conversation_id': None}
+    
+    reverse = client.table('people_swipes').select('id').eq('swiper_id', p_swiped_id) \
+        .eq('swiped_id', p_swiper_id).eq('is_like', True).execute().data
+    client.table('people_matches').upsert(
+        {'user1_id': p_swiper_id, 'user2_id': p_swiped_id}, on_conflict='user1_id,user2_id', ignore_duplicates=True
+    ).execute()
+    if not reverse:
+        return {'is_mutual': False, 'conversation_id': None}
+    
+    pair_key = ':'.join(sorted((str(p_swiper_id), str(p_swiped_id))))
+    client.table('conversations').upsert(
+        {'user1_id': p_swiper_id, 'user2_id': p_swiped_id, 'pair_key': pair_key},
+        on_conflict='pair_key', ignore_duplicates=True
+    ).execute()
+    conversation = client.table('conversations').select('id').eq('pair_key', pair_key).execute().data
+    return {'is_mutual': True, 'conversation_id': conversation[0]['id']}
+
+PROCEDURES = {'record_people_swipe': record_people_swipe}
+
+class LocalClient:
+    """Dict-backed replacement for the object returned by supabase.create_client."""
+    
+    def __init__(self, schema_sql):
+        self.tables = parse_schema(schema_sql)
+        self.lock = threading.RLock()
+        self.procedures = dict(PROCEDURES)
+    
+    @classmethod
+    def from_setup(cls):
+        from setup import SQL_SCHEMA
+        return cls(SQL_SCHEMA)
+    
+    def get_table(self, name):
+        table = self.tables.get(name)
+        if table is None:
+            raise LocalBackendError(f'relation "public.{name}" does not exist')
+        return table
+    
+    def table(self, name):
+        return LocalQuery(self, name)
+    
+    def create_index(self, table, column):
+        with self.lock:
+            self.get_table(table).create_index(column)
+    
+    def rpc(self, name, params=None):
+        procedure = self.procedures.get(name)
+        if procedure is None:
+            raise LocalBackendError(f"Could not find the function public.{name} in the schema cache")
+        return _LocalCall(self, procedure, params or {})
+
+class _LocalCall:
+    def __init__(self, client, procedure, params):
+        self._client, self._procedure, self._params = client, procedure, params
+    
+    def execute(self):
+        with self._client.lock:
+            return LocalResponse(self._procedure(self._client, **self._params))
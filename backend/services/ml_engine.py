@@ -1,7 +1,52 @@
+import heapq
 import numpy as np
 from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.neighbors import NearestNeighbors
 import pandas as pd
+from services.geo import coords_array, haversine_km, haversine_matrix_km, haversine_pairs_km
+
+# Number of set bits for every byte value; popcount16 looks up both bytes of a uint16
+POPCOUNT_8 = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+def popcount16(values):
+    values = np.asarray(values, dtype=np.uint16)
+    return POPCOUNT_8[values & 0xFF] + POPCOUNT_8[values >> 8]
+
+def top_k_indices(scores, k=20):
+    """
+    Indices of the k highest scores, best first, in O(N) via argpartition.
+
+    Ties are broken by original position, so the result matches a stable
+    descending sort followed by [:k].
+    """
+    scores = np.asarray(scores)
+    n = len(scores)
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.intp)
+    
+    if k < n:
+        kth_score = scores[np.argpartition(-scores, k - 1)[k - 1]]
+        # Keep every candidate tied with the k-th score so ties resolve by position
+        candidates = np.flatnonzero(scores >= kth_score)
+    else:
+        candidates = np.arange(n)
+    
+    order = np.lexsort((candidates, -scores[candidates]))
+    return candidates[order][:k]
+
+def merge_top_k(best_scores, best_indices, chunk_scores, chunk_offset, k):
+    """
+    Fold a (U, C) score chunk into running (U, k') top-k arrays.
+
+    Candidate indices are global (chunk_offset + column), and ties are broken by
+    lower index so results match top_k_indices on the full row.
+    """
+    users, width = chunk_scores.shape
+    chunk_indices = np.broadcast_to(np.arange(chunk_offset, chunk_offset + width), (users, width))
+    scores = np.concatenate([best_scores, chunk_scores], axis=1)
+    indices = np.concatenate([best_indices, chunk_indices], axis=1)
+    
+    order = np.lexsort((indices, -scores), axis=-1)[:, :k]
+    return np.take_along_axis(scores, order, axis=1), np.take_along_axis(indices, order, axis=1)
 
 class MLEngine:
     def __init__(self):
@@ -30,73 +75,350 @@ class MLEngine:
         feature_vector = [age_norm, budget_norm] + interests_vector
         return feature_vector
     
-    def apartment_recommendations(self, user_vector, apartments_data, user_location):
-        # ... (no changes needed here)
-        recommendations = []
-        
-        for apt in apartments_data:
-            distance = self.calculate_distance(user_location, [apt['lat'], apt['lng']])
-            user_budget = user_vector[1] * (5000 - 500) + 500
-            price_score = max(0, 1 - abs(apt['price'] - user_budget) / user_budget)
-            distance_score = max(0, 1 - distance / 20)
-            amenities_score = len(apt.get('amenities', [])) / 10
-            total_score = (price_score * 0.4 + distance_score * 0.4 + amenities_score * 0.2)
+    def encode_interest_mask(self, interests):
+        """Pack interests into a 12-bit mask (bit i = interest_categories[i]); stored as users.interest_mask."""
+        mask = 0
+        for bit, interest in enumerate(self.interest_categories):
+            if interests and interest in interests:
+                mask |= 1 << bit
+        return mask
+    
+    def mask_from_vector(self, vector):
+        """Interest mask for a create_user_vector output."""
+        return sum(1 << bit for bit, value in enumerate(vector[2:2 + len(self.interest_categories)]) if value)
+    
+    def build_interest_masks(self, people_data):
+        """uint16 interest masks for candidates, using the stored interest_mask column when present."""
+        return np.array([
+            person['interest_mask'] if person.get('interest_mask') is not None
+            else self.encode_interest_mask(person.get('interests'))
+            for person in people_data
+        ], dtype=np.uint16)
+    
+    def interest_similarity(self, user_mask, interest_masks, metric='cosine'):
+        """Cosine or Jaccard similarity between one mask and an array of masks via popcount."""
+        interest_masks = np.asarray(interest_masks, dtype=np.uint16)
+        user_mask = np.uint16(user_mask)
+        shared = popcount16(interest_masks & user_mask).astype(np.float32)
+        
+        if metric == 'jaccard':
+            denom = popcount16(interest_masks | user_mask).astype(np.float32)
+        else:
+            denom = np.sqrt(popcount16(interest_masks).astype(np.float32) * float(popcount16(user_mask)))
+        return np.divide(shared, denom, out=np.zeros_like(shared), where=denom > 0)
+    
+    def category_mask(self, category):
+        """Bits for every interest category named inside a spot's category string."""
+        category = (category or '').lower()
+        mask = 0
+        for bit, interest in enumerate(self.interest_categories):
+            if interest in category:
+                mask |= 1 << bit
+        return mask
+    
+    def build_candidate_matrix(self, people_data):
+        """Encode candidates into one float32 matrix: [age, budget, lat, lng].
+
+        Interests live separately as uint16 masks (see build_interest_masks).
+        Missing coordinates are stored as NaN so distance code can mask them.
+        """
+        matrix = np.empty((len(people_data), 4), dtype=np.float32)
+        
+        for row, person in enumerate(people_data):
+            matrix[row, :2] = self.create_user_vector(person)[:2]
+        matrix[:, 2:] = coords_array(people_data)
+        
+        return matrix
+    
+    def people_scores(self, user_vector, candidate_matrix, user_location, interest_masks):
+        """Score every candidate at once; returns (scores, interest_similarity)."""
+        interest_similarity = self.interest_similarity(self.mask_from_vector(user_vector), interest_masks)
+        
+        age_score = np.maximum(0, 1 - np.abs(candidate_matrix[:, 0] - np.float32(user_vector[0])) * 2)
+        
+        distance = haversine_km(user_location, candidate_matrix[:, 2:4])
+        distance_score = np.maximum(0, 1 - distance / 10)
+        
+        scores = interest_similarity * 0.5 + age_score * 0.3 + distance_score * 0.2
+        return scores, interest_similarity
+    
+    def people_recommendations_batch(self, user_vector, people_data, user_location,
+                                     candidate_matrix=None, interest_masks=None, k=20):
+        """Vectorized equivalent of people_recommendations; same top-k ordering."""
+        if not people_data:
+            return []
+        if candidate_matrix is None:
+            candidate_matrix = self.build_candidate_matrix(people_data)
+        if interest_masks is None:
+            interest_masks = self.build_interest_masks(people_data)
+        
+        scores, interest_similarity = self.people_scores(user_vector, candidate_matrix, user_location, interest_masks)
+        
+        return [
+            {'person_id': people_data[i]['id'], 'score': float(scores[i]), 'interest_similarity': float(interest_similarity[i])}
+            for i in top_k_indices(scores, k)
+        ]
+    
+    def stream_people_recommendations(self, user_vector, pages, user_location, k=20, encode=None, exclude=None):
+        """
+        Rank candidates arriving as an iterable of row pages, holding at most k at a time.
+
+        Each page is scored with people_scores and folded into a bounded min-heap,
+        so memory is O(page + k) however many pages there are. Ties are broken by
+        stream position, matching people_recommendations_batch over the
+        concatenated pages. encode(page) -> (candidate_matrix, interest_masks)
+        defaults to build_candidate_matrix/build_interest_masks.
+
+        Returns (recommendations, scanned) where scanned counts non-excluded candidates.
+        """
+        exclude = exclude or set()
+        heap = []
+        scanned = 0
+        
+        for page in pages:
+            page = [person for person in page if person['id'] not in exclude]
+            if not page:
+                continue
+            if encode is None:
+                candidate_matrix, interest_masks = self.build_candidate_matrix(page), self.build_interest_masks(page)
+            else:
+                candidate_matrix, interest_masks = encode(page)
+            scores, interest_similarity = self.people_scores(user_vector, candidate_matrix, user_location, interest_masks)
             
-            recommendations.append({'apartment_id': apt['id'], 'score': total_score, 'distance': distance})
+            for i in top_k_indices(scores, k):
+                # Heap root is the weakest kept entry: lowest score, then latest position
+                entry = (float(scores[i]), -(scanned + i), page[i]['id'], float(interest_similarity[i]))
+                if len(heap) < k:
+                    heapq.heappush(heap, entry)
+                elif entry > heap[0]:
+                    heapq.heapreplace(heap, entry)
+            scanned += len(page)
         
-        recommendations.sort(key=lambda x: x['score'], reverse=True)
-        return recommendations[:20]
+        return [
+            {'person_id': person_id, 'score': score, 'interest_similarity': similarity}
+            for score, _, person_id, similarity in sorted(heap, reverse=True)
+        ], scanned
+    
+    def build_user_matrices(self, users):
+        """Vectors (U, 14), locations (U, 2) and interest masks (U,) for a batch of users."""
+        vectors = np.array([self.create_user_vector(user) for user in users], dtype=np.float32)
+        vectors = vectors.reshape(len(users), 2 + len(self.interest_categories))
+        locations = coords_array(users).astype(np.float32)
+        masks = self.build_interest_masks(users)
+        return vectors, locations, masks
+    
+    def score_people_matrix(self, user_vectors, user_locations, user_masks, candidate_matrix, interest_masks,
+                            k=20, chunk_size=4096, exclude=None):
+        """
+        Rank M people candidates for U users at once with the people weights
+        (0.5 interest, 0.3 age, 0.2 distance).
 
-    def people_recommendations(self, user_vector, people_data, user_location):
-        # ... (no changes needed here)
-        recommendations = []
+        Candidates are processed chunk_size columns at a time, so peak memory is
+        O(U * chunk_size) rather than O(U * M). exclude is an optional (U,) array
+        of candidate positions to drop per user (e.g. the user themself), -1 for none.
+
+        Returns (indices, scores, interest_similarity), each (U, min(k, M)), best first.
+        """
+        user_vectors = np.asarray(user_vectors, dtype=np.float32)
+        user_masks = np.asarray(user_masks, dtype=np.uint16)
+        users, candidates = len(user_vectors), len(candidate_matrix)
+        k = min(k, candidates)
+        
+        best_scores = np.empty((users, 0), dtype=np.float32)
+        best_indices = np.empty((users, 0), dtype=np.intp)
+        user_counts = popcount16(user_masks).astype(np.float32)[:, None]
+        rows = np.arange(users)
         
-        for person in people_data:
+        for start in range(0, candidates, chunk_size):
+            chunk = candidate_matrix[start:start + chunk_size]
+            masks = interest_masks[start:start + chunk_size]
+            
+            shared = popcount16(user_masks[:, None] & masks[None, :]).astype(np.float32)
+            norms = np.sqrt(user_counts * popcount16(masks).astype(np.float32)[None, :])
+            similarity = np.divide(shared, norms, out=np.zeros_like(shared), where=norms > 0)
+            
+            age_score = np.maximum(0, 1 - np.abs(chunk[None, :, 0] - user_vectors[:, 0:1]) * 2)
+            distance = haversine_matrix_km(user_locations, chunk[:, 2:4])
+            distance_score = np.maximum(0, 1 - distance / 10)
+            
+            scores = similarity * 0.5 + age_score * 0.3 + distance_score * 0.2
+            if exclude is not None:
+                local = np.asarray(exclude) - start
+                hit = (local >= 0) & (local < len(chunk))
+                scores[rows[hit], local[hit]] = -np.inf
+            
+            best_scores, best_indices = merge_top_k(best_scores, best_indices, scores, start, k)
+        
+        # Interest similarity for the winners only
+        winner_masks = interest_masks[best_indices]
+        shared = popcount16(user_masks[:, None] & winner_masks).astype(np.float32)
+        norms = np.sqrt(user_counts * popcount16(winner_masks).astype(np.float32))
+        similarity = np.divide(shared, norms, out=np.zeros_like(shared), where=norms > 0)
+        return best_indices, best_scores, similarity
+    
+    def build_apartment_matrix(self, apartments_data):
+        """float32 matrix [price, amenity count, lat, lng] for apartments."""
+        matrix = np.empty((len(apartments_data), 4), dtype=np.float32)
+        matrix[:, 0] = [apt['price'] for apt in apartments_data]
+        matrix[:, 1] = [len(apt.get('amenities') or []) for apt in apartments_data]
+        matrix[:, 2:] = coords_array(apartments_data)
+        return matrix
+    
+    def score_apartments_matrix(self, user_vectors, user_locations, apartment_matrix, k=20, chunk_size=4096):
+        """
+        Rank M apartments for U users at once with the apartment weights
+        (0.4 price, 0.4 distance, 0.2 amenities), chunked along M like
+        score_people_matrix. Returns (indices, scores, distances), each (U, min(k, M)).
+        """
+        user_vectors = np.asarray(user_vectors, dtype=np.float32)
+        users, candidates = len(user_vectors), len(apartment_matrix)
+        k = min(k, candidates)
+        budgets = (user_vectors[:, 1:2] * (5000 - 500) + 500)
+        
+        best_scores = np.empty((users, 0), dtype=np.float32)
+        best_indices = np.empty((users, 0), dtype=np.intp)
+        
+        for start in range(0, candidates, chunk_size):
+            chunk = apartment_matrix[start:start + chunk_size]
+            price_score = np.maximum(0, 1 - np.abs(chunk[None, :, 0] - budgets) / budgets)
+            distance = haversine_matrix_km(user_locations, chunk[:, 2:4])
+            distance_score = np.maximum(0, 1 - distance / 20)
+            amenities_score = chunk[None, :, 1] / 10
+            
+            scores = price_score * 0.4 + distance_score * 0.4 + amenities_score * 0.2
+            best_scores, best_indices = merge_top_k(best_scores, best_indices, scores, start, k)
+        
+        winner_distances = haversine_pairs_km(np.asarray(user_locations)[:, None, :], apartment_matrix[best_indices, 2:4])
+        return best_indices, best_scores, winner_distances
+    
+    def build_spot_matrix(self, spots_data):
+        """float32 matrix [rating score, lat, lng] and uint16 category masks for spots."""
+        ratings = np.array([spot.get('rating', 3.0) for spot in spots_data], dtype=np.float64)
+        matrix = np.empty((len(spots_data), 3), dtype=np.float32)
+        matrix[:, 0] = np.where(np.isnan(ratings), 3.0, ratings) / 5.0
+        matrix[:, 1:] = coords_array(spots_data)
+        masks = np.array([self.category_mask(spot.get('category')) for spot in spots_data], dtype=np.uint16)
+        return matrix, masks
+    
+    def extra_interest_matches(self, user_interests, categories):
+        """
+        Which lowercased category strings contain one of the user's free-form
+        interests (those outside interest_categories); None if there are none.
+        """
+        extra_interests = [interest for interest in user_interests or [] if interest not in self.interest_categories]
+        if not extra_interests:
+            return None
+        return np.array([any(interest in category for interest in extra_interests) for category in categories], dtype=bool)
+    
+    def score_spots_matrix(self, user_masks, user_locations, spot_matrix, spot_masks, k=20, chunk_size=4096,
+                           extra_matches=None):
+        """
+        Rank S spots for U users at once with the spot weights (0.4 category,
+        0.3 rating, 0.3 distance), chunked along S like score_people_matrix.
+        extra_matches maps a user row to its (S,) extra_interest_matches.
+        Returns (indices, scores, distances), each (U, min(k, S)).
+        """
+        user_masks = np.asarray(user_masks, dtype=np.uint16)
+        users, candidates = len(user_masks), len(spot_matrix)
+        k = min(k, candidates)
+        extra_matches = extra_matches or {}
+        
+        best_scores = np.empty((users, 0), dtype=np.float32)
+        best_indices = np.empty((users, 0), dtype=np.intp)
+        
+        for start in range(0, candidates, chunk_size):
+            chunk = spot_matrix[start:start + chunk_size]
+            matched = (user_masks[:, None] & spot_masks[None, start:start + chunk_size]) != 0
+            for row, extra in extra_matches.items():
+                matched[row] |= extra[start:start + chunk_size]
+            
+            category_score = np.where(matched, np.float32(0.8), np.float32(0))
+            distance = haversine_matrix_km(user_locations, chunk[:, 1:3])
+            distance_score = np.maximum(0, 1 - distance / 15)
+            
+            scores = category_score * 0.4 + chunk[None, :, 0] * 0.3 + distance_score * 0.3
+            best_scores, best_indices = merge_top_k(best_scores, best_indices, scores, start, k)
+        
+        winner_distances = haversine_pairs_km(np.asarray(user_locations)[:, None, :], spot_matrix[best_indices, 1:3])
+        return best_indices, best_scores, winner_distances
+    
+    def apartment_recommendations(self, user_vector, apartments_data, user_location, k=20):
+        if not apartments_data:
+            return []
+        
+        distances = haversine_km(user_location, coords_array(apartments_data))
+        prices = np.array([apt['price'] for apt in apartments_data], dtype=np.float64)
+        amenity_counts = np.array([len(apt.get('amenities') or []) for apt in apartments_data], dtype=np.float64)
+        
+        user_budget = user_vector[1] * (5000 - 500) + 500
+        price_score = np.maximum(0, 1 - np.abs(prices - user_budget) / user_budget)
+        distance_score = np.maximum(0, 1 - distances / 20)
+        amenities_score = amenity_counts / 10
+        scores = price_score * 0.4 + distance_score * 0.4 + amenities_score * 0.2
+        
+        return [
+            {'apartment_id': apartments_data[i]['id'], 'score': float(scores[i]), 'distance': float(distances[i])}
+            for i in top_k_indices(scores, k)
+        ]
+
+    def people_recommendations(self, user_vector, people_data, user_location, k=20):
+        """Reference per-candidate implementation; people_recommendations_batch is the fast path."""
+        if not people_data:
+            return []
+        
+        distances = haversine_km(user_location, coords_array(people_data))
+        scores = np.empty(len(people_data))
+        similarities = np.empty(len(people_data))
+        
+        for i, (person, distance) in enumerate(zip(people_data, distances)):
             person_vector = self.create_user_vector(person)
             user_interests = user_vector[2:]
             person_interests = person_vector[2:]
             interest_similarity = cosine_similarity([user_interests], [person_interests])[0][0]
             age_diff = abs(user_vector[0] - person_vector[0])
             age_score = max(0, 1 - age_diff * 2)
-            distance = self.calculate_distance(user_location, [person.get('lat'), person.get('lng')])
             distance_score = max(0, 1 - distance / 10)
-            total_score = (interest_similarity * 0.5 + age_score * 0.3 + distance_score * 0.2)
-            
-            recommendations.append({'person_id': person['id'], 'score': total_score, 'interest_similarity': interest_similarity})
+            scores[i] = (interest_similarity * 0.5 + age_score * 0.3 + distance_score * 0.2)
+            similarities[i] = interest_similarity
         
-        recommendations.sort(key=lambda x: x['score'], reverse=True)
-        return recommendations[:20]
+        return [
+            {'person_id': people_data[i]['id'], 'score': float(scores[i]), 'interest_similarity': float(similarities[i])}
+            for i in top_k_indices(scores, k)
+        ]
 
     # --- MODIFIED --- Fixed bug and added user_interests parameter
-    def spot_recommendations(self, user_vector, spots_data, user_location, user_interests):
+    def spot_recommendations(self, user_vector, spots_data, user_location, user_interests, k=20):
         """Get spot recommendations using the actual user's interests."""
-        recommendations = []
+        if not spots_data:
+            return []
+        
+        distances = haversine_km(user_location, coords_array(spots_data))
         
         # --- FIX --- user_interests is now passed in, not using the default list
+        # Check if any of the user's actual interests are in the spot's category string.
+        # Known categories compare as bitmasks; other free-form interests fall back to substrings.
+        user_interests = user_interests or []
+        user_mask = self.encode_interest_mask(user_interests)
+        spot_masks = np.array([self.category_mask(spot.get('category')) for spot in spots_data], dtype=np.uint16)
+        matched = (spot_masks & np.uint16(user_mask)) != 0
         
-        for spot in spots_data:
-            category_score = 0
-            spot_category = spot.get('category', '').lower()
-            # Check if any of the user's actual interests are in the spot's category string
-            if any(interest in spot_category for interest in user_interests):
-                category_score = 0.8
-            
-            rating_score = spot.get('rating', 3.0) / 5.0
-            
-            distance = self.calculate_distance(user_location, [spot.get('lat'), spot.get('lng')])
-            distance_score = max(0, 1 - distance / 15)
-            
-            total_score = (category_score * 0.4 + rating_score * 0.3 + distance_score * 0.3)
-            
-            recommendations.append({'spot_id': spot['id'], 'score': total_score, 'distance': distance})
+        extra = self.extra_interest_matches(
+            user_interests, [(spot.get('category') or '').lower() for spot in spots_data]
+        )
+        if extra is not None:
+            matched |= extra
+        category_score = np.where(matched, 0.8, 0.0)
+        ratings = np.array([spot.get('rating', 3.0) for spot in spots_data], dtype=np.float64)
+        rating_score = np.where(np.isnan(ratings), 3.0, ratings) / 5.0
+        distance_score = np.maximum(0, 1 - distances / 15)
+        
+        scores = category_score * 0.4 + rating_score * 0.3 + distance_score * 0.3
         
-        recommendations.sort(key=lambda x: x['score'], reverse=True)
-        return recommendations[:20]
+        return [
+            {'spot_id': spots_data[i]['id'], 'score': float(scores[i]), 'distance': float(distances[i])}
+            for i in top_k_indices(scores, k)
+        ]
     
     def calculate_distance(self, coord1, coord2):
-        if any(c is None for c in coord1) or any(c is None for c in coord2):
-            return 20.0 # Return a large default distance if coordinates are missing
-        
-        lat_diff = coord1[0] - coord2[0]
-        lng_diff = coord1[1] - coord2[1]
-        return np.sqrt(lat_diff**2 + lng_diff**2) * 111
\ No newline at end of file
+        """Great-circle distance in km between two points; geo.MISSING_DISTANCE_KM if either is missing."""
+        return float(haversine_km(coord1, [coord2])[0])
\ No newline at end of file
@@ -0,0 +1,22 @@
+"""
+Pairs - helpers for tables that link two users symmetrically
+
+people_matches and conversations store a pair as (user1_id, user2_id) in
+whichever order it was created, so lookups have to match either column.
+"""
+
+def involving(user_id):
+    """OR groups matching rows where user_id is on either side of the pair."""
+    return [{'user1_id': user_id}, {'user2_id': user_id}]
+
+def between(user_a, user_b):
+    """OR groups matching the pair (user_a, user_b) stored in either order."""
+    return [{'user1_id': user_a, 'user2_id': user_b}, {'user1_id': user_b, 'user2_id': user_a}]
+
+def pair_key(user_a, user_b):
+    """Order-independent key for a pair, stored in conversations.pair_key."""
+    return ':'.join(sorted([str(user_a), str(user_b)]))
+
+def other_user(row, user_id):
+    """The id on the opposite side of the pair from user_id."""
+    return row['user2_id'] if row['user1_id'] == user_id else row['user1_id']
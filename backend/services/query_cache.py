@@ -0,0 +1,109 @@
+"""
+Query Cache - read-through cache for SupabaseService.get_data
+
+Results are memoized per (table, query) with a per-table TTL and a bounded
+LRU. Writes through SupabaseService invalidate every cached query on the same
+table whose equality/IN filters could match the written rows.
+"""
+import copy
+import json
+import threading
+import time
+from collections import OrderedDict
+
+class QueryCache:
+    def __init__(self, table_ttls, max_entries=2048):
+        self.table_ttls = dict(table_ttls)
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+    
+    def is_cacheable(self, table):
+        return self.table_ttls.get(table, 0) > 0
+    
+    @staticmethod
+    def make_key(table, **query):
+        return table, json.dumps(query, sort_keys=True, default=str)
+    
+    def get(self, key):
+        """Return a copy of the cached result, or None on a miss or expired entry."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry['expires_at'] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(entry['result'])
+    
+    def set(self, key, result, filters=None, in_filters=None):
+        table = key[0]
+        with self._lock:
+            self._entries[key] = {
+                'result': copy.deepcopy(result),
+                'expires_at': time.monotonic() + self.table_ttls[table],
+                'filters': dict(filters or {}),
+                'in_filters': {column: set(values) for column, values in (in_filters or {}).items()},
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    @staticmethod
+    def _may_match(entry, row):
+        """False only if the row provably falls outside the entry's filters."""
+        for column, value in entry['filters'].items():
+            if column in row and row[column] != value:
+                return False
+        for column, values in entry['in_filters'].items():
+            if column in row and row[column] not in values:
+                return False
+        return True
+    
+    def invalidate(self, table, rows=None, filters=None, changed_columns=None):
+        """
+        Drop cached queries on table that a write could have affected.
+
+        rows: inserted/upserted rows; filters: the update/delete filters;
+        changed_columns: columns an update sets (queries filtering on them are always dropped).
+        With no rows or filters, every entry for the table is dropped.
+        """
+        changed_columns = set(changed_columns or [])
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == table]:
+                entry = self._entries[key]
+                filtered_columns = set(entry['filters']) | set(entry['in_filters'])
+                if rows is not None:
+                    affected = any(self._may_match(entry, row) for row in rows)
+                elif filters:
+                    affected = bool(changed_columns & filtered_columns) or self._may_match(entry, filters)
+                else:
+                    affected = True
+                if affected:
+                    del self._entries[key]
+                    self.invalidations += 1
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'invalidations': self.invalidations,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'table_ttls': self.table_ttls,
+            }
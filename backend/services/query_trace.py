@@ -0,0 +1,126 @@
+"""
+Query Trace - per-request record of SupabaseService round trips
+
+When QUERY_TRACE_ENABLED is set, every call SupabaseService makes to the
+database is appended to a trace on flask.g: table, operation, filter keys,
+rows returned, latency and payload size. Reads answered by the identity map or
+query cache are recorded too, with their source, but cost no round trip.
+
+After each request the trace is folded into per-endpoint totals, and any query
+shape (table, operation, filter keys) repeated N_PLUS_ONE_THRESHOLD or more
+times is flagged as a likely N+1 loop. The summary is exposed through the
+X-Query-Trace header and the /api/debug/queries report.
+"""
+import json
+import threading
+import time
+from collections import Counter, deque
+from flask import g, has_app_context, request
+from config import Config
+
+N_PLUS_ONE_THRESHOLD = Config.QUERY_TRACE_N_PLUS_ONE
+# Operations that repeat by design and are never flagged
+UNFLAGGED_OPERATIONS = ('stream',)
+
+_endpoints = {}
+_recent = deque(maxlen=50)
+_stats_lock = threading.Lock()
+
+def enabled():
+    return Config.QUERY_TRACE_ENABLED and has_app_context()
+
+def filter_keys(filters=None, in_filters=None, range_filters=None, or_filters=None):
+    """Column names a query filters on, tagged with how, e.g. ['id', 'city IN', 'lat RANGE']."""
+    keys = sorted(filters or {})
+    keys += sorted(f"{column} IN" for column in in_filters or {})
+    keys += sorted(f"{column} RANGE" for column in range_filters or {})
+    if or_filters:
+        keys.append(f"OR({','.join(sorted({column for group in or_filters for column in group}))})")
+    return keys
+
+def payload_bytes(data):
+    if data is None:
+        return 0
+    return len(json.dumps(data, default=str))
+
+def record(table, operation, keys, rows=0, seconds=0.0, size=0, source='db'):
+    if not enabled():
+        return
+    # setdefault keeps concurrent run_parallel workers from each creating a trace
+    g.setdefault('query_trace', []).append({
+        'table': table,
+        'operation': operation,
+        'filters': keys,
+        'rows': rows,
+        'ms': round(seconds * 1000, 3),
+        'bytes': size,
+        'source': source,
+    })
+
+def timed(table, operation, keys, execute, payload=None):
+    """Run execute() (which returns rows) and record it; payload is the written data, if any."""
+    if not enabled():
+        return execute()
+    started = time.perf_counter()
+    rows = execute()
+    seconds = time.perf_counter() - started
+    size = payload_bytes(payload) + payload_bytes(rows)
+    record(table, operation, keys, rows=len(rows or []), seconds=seconds, size=size)
+    return rows
+
+def _shape(entry):
+    return f"{entry['table']}.{entry['operation']}({', '.join(entry['filters'])})"
+
+def summarize(trace):
+    """Counts, DB time and repeated query shapes for one request's trace."""
+    round_trips = [entry for entry in trace if entry['source'] == 'db']
+    shapes = Counter(_shape(entry) for entry in round_trips if entry['operation'] not in UNFLAGGED_OPERATIONS)
+    return {
+        'queries': len(round_trips),
+        'absorbed': len(trace) - len(round_trips),
+        'db_ms': round(sum(entry['ms'] for entry in round_trips), 3),
+        'rows': sum(entry['rows'] for entry in round_trips),
+        'bytes': sum(entry['bytes'] for entry in round_trips),
+        'repeated': {shape: count for shape, count in shapes.items() if count >= N_PLUS_ONE_THRESHOLD},
+    }
+
+def report():
+    """Per-endpoint totals plus the most recent request traces."""
+    with _stats_lock:
+        return {
+            'endpoints': {endpoint: dict(totals, repeated=dict(totals['repeated']))
+                          for endpoint, totals in _endpoints.items()},
+            'recent': list(_recent),
+        }
+
+def reset():
+    with _stats_lock:
+        _endpoints.clear()
+        _recent.clear()
+
+def init_app(app, expose_header=False):
+    @app.after_request
+    def record_query_trace(response):
+        if not Config.QUERY_TRACE_ENABLED or 'query_trace' not in g:
+            return response
+        endpoint = request.endpoint or request.path
+        summary = summarize(g.query_trace)
+        with _stats_lock:
+            totals = _endpoints.setdefault(endpoint, {
+                'requests': 0, 'queries': 0, 'absorbed': 0, 'db_ms': 0.0, 'rows': 0, 'bytes': 0,
+                'max_queries': 0, 'repeated': Counter(),
+            })
+            totals['requests'] += 1
+            for field in ('queries', 'absorbed', 'rows', 'bytes'):
+                totals[field] += summary[field]
+            totals['db_ms'] = round(totals['db_ms'] + summary['db_ms'], 3)
+            totals['max_queries'] = max(totals['max_queries'], summary['queries'])
+            totals['repeated'].update(summary['repeated'].keys())
+            _recent.append({'endpoint': endpoint, 'method': request.method, 'path': request.path,
+                            'summary': summary, 'trace': g.query_trace})
+        if expose_header:
+            header = f"queries={summary['queries']}; absorbed={summary['absorbed']}; db_ms={summary['db_ms']}"
+            if summary['repeated']:
+                header += '; repeated=' + ', '.join(f"{shape} x{count}" for shape, count in summary['repeated'].items())
+            response.headers['X-Query-Trace'] = header
+        return response
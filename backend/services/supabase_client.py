@@ -1,9 +1,21 @@
-from supabase import create_client
 from config import Config
+from services.query_cache import QueryCache
+from services import identity_map, query_trace
 
-supabase = create_client(Config.SUPABASE_URL, Config.SUPABASE_KEY)
+def create_database_client():
+    """Supabase client, or the in-process LocalClient when DATABASE_BACKEND=local."""
+    if Config.DATABASE_BACKEND == 'local':
+        from services.local_backend import LocalClient
+        return LocalClient.from_setup()
+    from supabase import create_client
+    return create_client(Config.SUPABASE_URL, Config.SUPABASE_KEY)
+
+supabase = create_database_client()
+query_cache = QueryCache(Config.QUERY_CACHE_TTLS, Config.QUERY_CACHE_MAX_ENTRIES) if Config.QUERY_CACHE_ENABLED else None
 
 class SupabaseService:
+    RANGE_OPERATORS = ('gt', 'gte', 'lt', 'lte', 'neq')
+    
     @staticmethod
     def get_client():
         return supabase
@@ -11,33 +23,219 @@ class SupabaseService:
     @staticmethod
     def insert_data(table, data):
         try:
-            result = supabase.table(table).insert(data).execute()
-            return {"success": True, "data": result.data}
+            rows = query_trace.timed(table, 'insert', [], lambda: supabase.table(table).insert(data).execute().data,
+                                     payload=data)
+            return {"success": True, "data": rows}
         except Exception as e:
             return {"success": False, "error": str(e)}
+        finally:
+            SupabaseService._invalidate(table, rows=data if isinstance(data, list) else [data])
     
     @staticmethod
-    def get_data(table, filters=None):
+    def upsert_data(table, data, on_conflict=None, ignore_duplicates=False):
+        """
+        Insert rows, resolving conflicts on on_conflict (a unique column list, default
+        the primary key) by updating the existing row, or by skipping the row when
+        ignore_duplicates is set. data holds the rows actually written.
+        """
         try:
-            query = supabase.table(table).select("*")
+            options = {'ignore_duplicates': True} if ignore_duplicates else {}
+            if on_conflict:
+                options['on_conflict'] = on_conflict
+            query = supabase.table(table).upsert(data, **options)
+            rows = query_trace.timed(table, 'upsert', [], lambda: query.execute().data, payload=data)
+            return {"success": True, "data": rows}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+        finally:
+            SupabaseService._invalidate(table, rows=data if isinstance(data, list) else [data])
+    
+    @staticmethod
+    def insert_or_get(table, data, on_conflict, columns=None):
+        """
+        Insert one row unless a row with the same on_conflict columns exists.
+
+        Returns {"success", "data": row, "created": bool}. The insert is a single
+        INSERT ... ON CONFLICT DO NOTHING, so concurrent callers cannot create
+        duplicates; only the caller that loses the race pays a second round trip
+        to read the row that won.
+        """
+        inserted = SupabaseService.upsert_data(table, data, on_conflict=on_conflict, ignore_duplicates=True)
+        if not inserted['success']:
+            return inserted
+        if inserted['data']:
+            return {"success": True, "data": inserted['data'][0], "created": True}
+        
+        key = {column.strip(): data[column.strip()] for column in on_conflict.split(',')}
+        existing = SupabaseService._select(table, filters=key, columns=columns, limit=1)
+        if not existing['success']:
+            return existing
+        if not existing['data']:
+            return {"success": False, "error": f"Conflicting {table} row disappeared"}
+        return {"success": True, "data": existing['data'][0], "created": False}
+    
+    @staticmethod
+    def get_data(table, filters=None, columns=None, in_filters=None, range_filters=None,
+                 order_by=None, desc=False, limit=None, offset=None, or_filters=None):
+        """
+        Select rows from a table.
+
+        filters: {column: value} equality filters
+        columns: list of columns to return (default all)
+        in_filters: {column: [values]} membership filters
+        range_filters: {column: {'gt'|'gte'|'lt'|'lte'|'neq': value}}
+        or_filters: [{column: value, ...}, ...] rows matching any group (each group is ANDed)
+        order_by/desc, limit/offset: ordering and paging
+
+        Identical reads within one request are answered from the request's identity
+        map; reads on tables with a configured TTL also go through the query cache
+        when it is enabled.
+        """
+        query_args = dict(filters=filters, columns=columns, in_filters=in_filters, range_filters=range_filters,
+                          order_by=order_by, desc=desc, limit=limit, offset=offset, or_filters=or_filters)
+        key = QueryCache.make_key(table, **query_args)
+        
+        seen = identity_map.lookup(key)
+        if seen is not None:
+            SupabaseService._trace_hit(table, query_args, seen, 'identity_map')
+            return seen
+        
+        if query_cache is None or not query_cache.is_cacheable(table):
+            result = SupabaseService._select(table, **query_args)
+        else:
+            result = query_cache.get(key)
+            if result is None:
+                result = SupabaseService._select(table, **query_args)
+                if result['success']:
+                    query_cache.set(key, result, filters=filters, in_filters=in_filters)
+            else:
+                SupabaseService._trace_hit(table, query_args, result, 'cache')
+        
+        identity_map.store(key, result)
+        return result
+    
+    @staticmethod
+    def _select(table, filters=None, columns=None, in_filters=None, range_filters=None,
+                order_by=None, desc=False, limit=None, offset=None, or_filters=None, operation='select'):
+        try:
+            if in_filters and any(len(values) == 0 for values in in_filters.values()):
+                return {"success": True, "data": []}
+            
+            select = ",".join(columns) if isinstance(columns, (list, tuple)) else (columns or "*")
+            query = supabase.table(table).select(select)
             if filters:
                 for key, value in filters.items():
                     query = query.eq(key, value)
-            result = query.execute()
-            return {"success": True, "data": result.data}
+            if in_filters:
+                for key, values in in_filters.items():
+                    query = query.in_(key, list(values))
+            if range_filters:
+                for key, conditions in range_filters.items():
+                    for op, value in conditions.items():
+                        if op not in SupabaseService.RANGE_OPERATORS:
+                            raise ValueError(f"Unsupported range operator: {op}")
+                        query = getattr(query, op)(key, value)
+            if or_filters:
+                query = query.or_(SupabaseService._or_expression(or_filters))
+            if order_by:
+                query = query.order(order_by, desc=desc)
+            if limit is not None:
+                start = offset or 0
+                query = query.range(start, start + limit - 1)
+            elif offset:
+                raise ValueError("offset requires limit")
+            keys = query_trace.filter_keys(filters, in_filters, range_filters, or_filters)
+            rows = query_trace.timed(table, operation, keys, lambda: query.execute().data)
+            return {"success": True, "data": rows}
         except Exception as e:
             return {"success": False, "error": str(e)}
     
+    @staticmethod
+    def _trace_hit(table, query_args, result, source):
+        keys = query_trace.filter_keys(query_args['filters'], query_args['in_filters'],
+                                       query_args['range_filters'], query_args['or_filters'])
+        query_trace.record(table, 'select', keys, rows=len(result.get('data') or []), source=source)
+    
+    @staticmethod
+    def _or_expression(groups):
+        """Render [{'a': 1}, {'b': 2, 'c': 3}] as PostgREST 'a.eq.1,and(b.eq.2,c.eq.3)'."""
+        def condition(column, value):
+            value = str(value)
+            if any(char in value for char in ',.:()" '):
+                value = '"' + value.replace('"', '\\"') + '"'
+            return f"{column}.eq.{value}"
+        
+        parts = []
+        for group in groups:
+            conditions = [condition(column, value) for column, value in group.items()]
+            parts.append(conditions[0] if len(conditions) == 1 else f"and({','.join(conditions)})")
+        return ",".join(parts)
+    
+    @staticmethod
+    def get_by_ids(table, ids, columns=None, key='id', chunk_size=100):
+        """
+        Fetch many rows by key with one IN query per chunk of ids.
+
+        Returns {"success": True, "data": {key_value: row}}; ids with no row are
+        simply absent. Chunking keeps the request URL bounded for large id sets.
+        """
+        unique_ids = list(dict.fromkeys(i for i in ids if i is not None))
+        if columns and key not in columns:
+            columns = [key] + list(columns)
+        
+        rows = {}
+        for start in range(0, len(unique_ids), chunk_size):
+            result = SupabaseService.get_data(
+                table, columns=columns, in_filters={key: unique_ids[start:start + chunk_size]}
+            )
+            if not result['success']:
+                return result
+            rows.update((row[key], row) for row in result['data'])
+        return {"success": True, "data": rows}
+    
+    @staticmethod
+    def stream_data(table, filters=None, columns=None, range_filters=None, page_size=500, key='id'):
+        """
+        Yield a table's matching rows page by page using keyset pagination.
+
+        Pages are ordered by key and each one starts after the last key seen, so
+        every page is an indexed range scan no matter how deep the stream goes.
+        Pages bypass the query cache and identity map; a failed page raises.
+        """
+        if columns and key not in columns:
+            columns = [key] + list(columns)
+        
+        last_key = None
+        while True:
+            page_ranges = {column: dict(conditions) for column, conditions in (range_filters or {}).items()}
+            if last_key is not None:
+                page_ranges.setdefault(key, {})['gt'] = last_key
+            
+            result = SupabaseService._select(table, filters=filters, columns=columns, range_filters=page_ranges,
+                                             order_by=key, limit=page_size, operation='stream')
+            if not result['success']:
+                raise RuntimeError(f"Failed to stream {table}: {result.get('error')}")
+            
+            rows = result['data']
+            if rows:
+                yield rows
+            if len(rows) < page_size:
+                return
+            last_key = rows[-1][key]
+    
     @staticmethod
     def update_data(table, data, filters):
         try:
             query = supabase.table(table).update(data)
             for key, value in filters.items():
                 query = query.eq(key, value)
-            result = query.execute()
-            return {"success": True, "data": result.data}
+            rows = query_trace.timed(table, 'update', query_trace.filter_keys(filters), lambda: query.execute().data,
+                                     payload=data)
+            return {"success": True, "data": rows}
         except Exception as e:
             return {"success": False, "error": str(e)}
+        finally:
+            SupabaseService._invalidate(table, filters=filters, changed_columns=data.keys())
     
     @staticmethod
     def delete_data(table, filters=None):
@@ -46,7 +244,36 @@ class SupabaseService:
             if filters:
                 for key, value in filters.items():
                     query = query.eq(key, value)
-            result = query.execute()
-            return {"success": True, "data": result.data}
+            rows = query_trace.timed(table, 'delete', query_trace.filter_keys(filters), lambda: query.execute().data)
+            return {"success": True, "data": rows}
         except Exception as e:
-            return {"success": False, "error": str(e)}
\ No newline at end of file
+            return {"success": False, "error": str(e)}
+        finally:
+            SupabaseService._invalidate(table, filters=filters)
+    
+    @staticmethod
+    def rpc(name, params=None, tables=()):
+        """
+        Call a stored procedure; tables lists the tables it writes, whose cached
+        reads are invalidated. data is whatever the procedure returns.
+        """
+        try:
+            data = query_trace.timed(name, 'rpc', sorted(params or {}),
+                                     lambda: supabase.rpc(name, params or {}).execute().data, payload=params)
+            return {"success": True, "data": data}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+        finally:
+            for table in tables:
+                SupabaseService._invalidate(table)
+    
+    @staticmethod
+    def _invalidate(table, rows=None, filters=None, changed_columns=None):
+        identity_map.invalidate(table)
+        if query_cache is not None:
+            query_cache.invalidate(table, rows=rows, filters=filters, changed_columns=changed_columns)
+    
+    @staticmethod
+    def cache_stats():
+        """Hit/miss counters for the query cache, or None when it is disabled."""
+        return query_cache.stats() if query_cache is not None else None
\ No newline at end of file
@@ -0,0 +1,187 @@
+"""
+Swipe Index - per-user sets of already-swiped items for feed exclusion
+
+Each user's swipe history is loaded once per kind and kept current through
+record(). Past exact_limit it moves to stacked Bloom filters, which never miss a
+swiped item. Entries are evicted LRU beyond max_users and reloaded after ttl.
+"""
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+from config import Config
+
+class BloomFilter:
+    def __init__(self, capacity, false_positive_rate=0.01):
+        self.capacity = max(1, capacity)
+        self.size = max(8, int(-self.capacity * math.log(false_positive_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+    
+    def _positions(self, key):
+        # Double hashing: h1 + i*h2 stands in for k independent hash functions
+        digest = hashlib.blake2b(str(key).encode(), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+    
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+    
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+class SwipedSet:
+    """Exact set of swiped keys that turns into a stack of Bloom filters past exact_limit."""
+    
+    def __init__(self, exact_limit=5000, false_positive_rate=0.01):
+        self.exact_limit = exact_limit
+        self.false_positive_rate = false_positive_rate
+        self._exact = set()
+        self._blooms = []
+    
+    def _add_bloom(self, capacity):
+        # Filter i gets rate/2**(i+1), so the whole stack never exceeds rate
+        rate = self.false_positive_rate / 2 ** (len(self._blooms) + 1)
+        self._blooms.append(BloomFilter(capacity, rate))
+        return self._blooms[-1]
+    
+    def _to_bloom(self, expected):
+        # Twice the expected size, and never less than four times the limit
+        bloom = self._add_bloom(max(4 * self.exact_limit, 2 * expected))
+        for existing in self._exact:
+            bloom.add(existing)
+        self._exact = None
+    
+    def add(self, key):
+        if self._blooms:
+            bloom = self._blooms[-1]
+            if bloom.count >= bloom.capacity:
+                bloom = self._add_bloom(2 * bloom.capacity)
+            bloom.add(key)
+            return
+        self._exact.add(key)
+        if len(self._exact) > self.exact_limit:
+            self._to_bloom(len(self._exact))
+    
+    def update(self, keys):
+        """Add keys; a sized collection that crosses exact_limit sizes the Bloom filter for all of it."""
+        if not self._blooms and hasattr(keys, '__len__') and len(self._exact) + len(keys) > self.exact_limit:
+            self._to_bloom(len(self._exact) + len(keys))
+        for key in keys:
+            self.add(key)
+    
+    def __contains__(self, key):
+        if self._blooms:
+            return any(key in bloom for bloom in self._blooms)
+        return key in self._exact
+    
+    def __len__(self):
+        return sum(bloom.count for bloom in self._blooms) if self._blooms else len(self._exact)
+    
+    @property
+    def approximate(self):
+        return bool(self._blooms)
+
+class SwipeIndex:
+    # kind -> (swipe table, column holding the swiping user, column holding the swiped item)
+    KINDS = {
+        'people': ('people_swipes', 'swiper_id', 'swiped_id'),
+        'apartments': ('apartment_swipes', 'user_id', 'address'),
+        'spots': ('spot_swipes', 'user_id', 'address'),
+    }
+    
+    def __init__(self, max_users=10000, exact_limit=5000, false_positive_rate=0.01, ttl=300):
+        self.max_users = max_users
+        self.exact_limit = exact_limit
+        self.false_positive_rate = false_positive_rate
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        # Keys recorded while a load is streaming, merged in when it finishes
+        self._loading = {}
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.hits = 0
+    
+    def get(self, kind, user_id):
+        """The user's SwipedSet for kind, loading it on first use. For people it also holds user_id."""
+        key = (kind, user_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            owner = key not in self._loading
+            if owner:
+                self._loading[key] = set()
+        
+        started = time.monotonic()
+        failed = False
+        try:
+            swiped = self._load(kind, user_id)
+        except Exception as e:
+            print(f"Warning: Failed to load {kind} swipes for {user_id}: {e}")
+            swiped, failed = self._new_set(kind, user_id), True
+        
+        with self._lock:
+            if not owner:
+                return swiped
+            swiped.update(self._loading.pop(key))
+            if failed:
+                return swiped
+            self._entries[key] = (started, swiped)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+            self.loads += 1
+        return swiped
+    
+    def _new_set(self, kind, user_id):
+        swiped = SwipedSet(self.exact_limit, self.false_positive_rate)
+        if kind == 'people':
+            swiped.add(user_id)
+        return swiped
+    
+    def _load(self, kind, user_id):
+        from services.supabase_client import SupabaseService
+        from services.write_buffer import swipe_buffer
+        table, owner_column, item_column = self.KINDS[kind]
+        
+        keys = set()
+        for page in SupabaseService.stream_data(table, filters={owner_column: user_id}, columns=[item_column],
+                                                page_size=Config.FEED_STREAM_PAGE_SIZE):
+            keys.update(row[item_column] for row in page)
+        # Swipes still waiting in the write buffer are not in the table yet
+        keys.update(row[item_column] for row in swipe_buffer.find(table, **{owner_column: user_id}))
+        
+        # Added in one go so a long history gets a filter sized for it
+        swiped = self._new_set(kind, user_id)
+        swiped.update(keys)
+        return swiped
+    
+    def record(self, kind, user_id, item):
+        """Note a new swipe; users whose history is not loaded are picked up when it is."""
+        key = (kind, user_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry[1].add(item)
+            if key in self._loading:
+                self._loading[key].add(item)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.loads = self.hits = 0
+    
+    def stats(self):
+        with self._lock:
+            return {'users': len(self._entries), 'loads': self.loads, 'hits': self.hits,
+                    'approximate': sum(1 for _, swiped in self._entries.values() if swiped.approximate)}
+
+swipe_index = SwipeIndex(Config.SWIPE_INDEX_MAX_USERS, Config.SWIPE_INDEX_EXACT_LIMIT,
+                         Config.SWIPE_INDEX_FALSE_POSITIVE_RATE, Config.SWIPE_INDEX_TTL)
@@ -0,0 +1,228 @@
+"""
+Write Buffer - write-behind queue for swipe and match rows
+Rows are fsynced to a per-process JSONL spill file and flushed as one insert per table;
+spill files left by a dead process are claimed and replayed on startup
+"""
+import atexit
+import glob
+import json
+import os
+import threading
+import time
+from config import Config
+
+class WriteBuffer:
+    # Rows failing for reasons other than a duplicate key are retried this many flushes, then dropped
+    MAX_ATTEMPTS = 5
+    
+    def __init__(self, flush_interval_ms=200, max_rows=500, spill_dir='.swipe_buffer'):
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_rows = max_rows
+        self.spill_dir = spill_dir
+        self._pending = {}
+        self._count = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._spill = None
+        self._thread = None
+        self._stopped = False
+        self._attempts = {}
+        self.flushed = 0
+        self.dropped = 0
+    
+    def _spill_path(self):
+        return os.path.join(self.spill_dir, f"writes-{os.getpid()}.jsonl")
+    
+    def _start(self):
+        """Replay orphaned spill files, open ours and start the flusher; caller holds _lock."""
+        os.makedirs(self.spill_dir, exist_ok=True)
+        recovered, claimed = self._recover()
+        self._spill = open(self._spill_path(), 'a', encoding='utf-8')
+        for table, row in recovered:
+            self._append(table, row)
+        self._sync()
+        # Only now that the rows are safe in our own spill file
+        for path in claimed:
+            os.remove(path)
+        
+        self._thread = threading.Thread(target=self._run, name='write-buffer', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+    
+    def _recover(self):
+        """
+        ([(table, row), ...], claimed paths) from spill files whose owner is no
+        longer running. Files carrying our own pid are included: nothing has been
+        written yet, so they come from a previous process that had the same pid
+        (common in containers).
+
+        Each file is claimed with an atomic rename to a name carrying our pid, so
+        other processes see a live owner and leave it alone; a file that is gone
+        by the time we rename it was claimed by someone else. The caller removes
+        the claimed files once their rows are in its own spill file.
+        """
+        recovered, claimed = [], []
+        for path in sorted(glob.glob(os.path.join(self.spill_dir, 'writes-*.jsonl*'))):
+            pid = int(os.path.basename(path).split('-')[1].split('.')[0])
+            if pid != os.getpid() and _process_alive(pid):
+                continue
+            claimed_path = f"{self._spill_path()}.claimed-{time.time_ns()}"
+            try:
+                os.replace(path, claimed_path)
+            except FileNotFoundError:
+                continue
+            claimed.append(claimed_path)
+            with open(claimed_path, encoding='utf-8') as spill:
+                for line in spill:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # A torn last line from the crash
+                        continue
+                    recovered.append((entry['table'], entry['row']))
+        if recovered:
+            print(f"Write buffer: replaying {len(recovered)} rows from spill files")
+        return recovered, claimed
+    
+    def _sync(self):
+        self._spill.flush()
+        os.fsync(self._spill.fileno())
+    
+    def _append(self, table, row):
+        self._spill.write(json.dumps({'table': table, 'row': row}, default=str) + '\n')
+        self._pending.setdefault(table, []).append(row)
+        self._count += 1
+    
+    def write(self, rows):
+        """Accept [(table, row), ...]; the rows are durable in the spill file on return."""
+        with self._lock:
+            if self._thread is None:
+                self._stopped = False
+                self._start()
+            for table, row in rows:
+                self._append(table, row)
+            self._sync()
+            if self._count >= self.max_rows:
+                self._wake.set()
+    
+    def find(self, table, **filters):
+        """Buffered rows not yet flushed that match every filter."""
+        with self._lock:
+            return [row for row in self._pending.get(table, [])
+                    if all(row.get(column) == value for column, value in filters.items())]
+    
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            if self._stopped:
+                return
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Warning: Write buffer flush failed: {e}")
+    
+    def flush(self):
+        """Insert everything buffered so far, one multi-row insert per table."""
+        with self._flush_lock:
+            with self._lock:
+                if not self._count:
+                    return
+                pending, self._pending, self._count = self._pending, {}, 0
+                # New writes go to a fresh spill file while this batch is in flight
+                self._spill.close()
+                flushing_path = f"{self._spill_path()}.{time.time_ns()}"
+                os.replace(self._spill_path(), flushing_path)
+                self._spill = open(self._spill_path(), 'a', encoding='utf-8')
+            
+            retry = []
+            for table, rows in pending.items():
+                retry.extend((table, row) for row in self._insert(table, rows))
+            
+            with self._lock:
+                for table, row in retry:
+                    self._append(table, row)
+                self._sync()
+            os.remove(flushing_path)
+    
+    def _insert(self, table, rows):
+        """Write rows; returns the ones to retry later."""
+        from services.supabase_client import SupabaseService
+        result = SupabaseService.insert_data(table, rows)
+        if result['success']:
+            self.flushed += len(rows)
+            return []
+        
+        # One bad row fails the whole batch; find it row by row
+        retry = []
+        for row in rows:
+            result = SupabaseService.insert_data(table, row)
+            if result['success']:
+                self.flushed += 1
+            elif 'duplicate key' in str(result.get('error')):
+                self.dropped += 1
+            else:
+                key = (table, row.get('id'))
+                self._attempts[key] = self._attempts.get(key, 0) + 1
+                if self._attempts[key] < self.MAX_ATTEMPTS:
+                    print(f"Warning: Buffered {table} write failed, will retry: {result.get('error')}")
+                    retry.append(row)
+                    continue
+                print(f"Warning: Dropping buffered {table} row after {self.MAX_ATTEMPTS} attempts: {result.get('error')}")
+                self.dropped += 1
+            self._attempts.pop((table, row.get('id')), None)
+        return retry
+    
+    def close(self):
+        """Flush and stop the flusher; a later write starts it again."""
+        with self._lock:
+            if self._thread is None:
+                return
+            self._stopped = True
+            self._wake.set()
+        self.flush()
+        with self._lock:
+            self._thread = None
+            self._spill.close()
+            if self._count == 0 and os.path.getsize(self._spill_path()) == 0:
+                os.remove(self._spill_path())
+    
+    def stats(self):
+        with self._lock:
+            return {'pending': self._count, 'flushed': self.flushed, 'dropped': self.dropped,
+                    'flush_interval_ms': self.flush_interval * 1000, 'max_rows': self.max_rows}
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+swipe_buffer = WriteBuffer(Config.SWIPE_BUFFER_FLUSH_MS, Config.SWIPE_BUFFER_MAX_ROWS,
+                           Config.SWIPE_BUFFER_SPILL_DIR)
+
+def write_swipe_rows(rows):
+    """
+    Persist [(table, row), ...] for a swipe endpoint.
+
+    Buffered when SWIPE_BUFFER_ENABLED (always succeeds once spilled);
+    otherwise inserted now with one multi-row insert per table, in the order
+    tables first appear, stopping at the first failure. Returns success.
+    """
+    if Config.SWIPE_BUFFER_ENABLED:
+        swipe_buffer.write(rows)
+        return True
+    from services.supabase_client import SupabaseService
+    by_table = {}
+    for table, row in rows:
+        by_table.setdefault(table, []).append(row)
+    for table, table_rows in by_table.items():
+        result = SupabaseService.insert_data(table, table_rows if len(table_rows) > 1 else table_rows[0])
+        if not result['success']:
+            print(f"Failed to write {table}: {result.get('error')}")
+            return False
+    return True
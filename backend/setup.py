@@ -44,8 +44,8 @@ def check_env_variables():
     print("Environment variables configured")
     return True
 
-def run_sql_schema():
-    sql_schema = """
+# Schema for the Supabase project; services/local_backend.py builds its tables from it too
+SQL_SCHEMA = """
 -- Run this SQL in your Supabase SQL Editor:
 
 -- Users table
@@ -61,6 +61,7 @@ CREATE TABLE users (
     budget_min INTEGER,
     budget_max INTEGER,
     interests TEXT[],
+    interest_mask SMALLINT,
     photos TEXT[],
     onboarding_complete BOOLEAN DEFAULT FALSE,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
@@ -173,6 +174,7 @@ CREATE TABLE conversations (
     id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
     user1_id UUID REFERENCES users(id),
     user2_id UUID REFERENCES people(id),
+    pair_key TEXT,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
@@ -185,6 +187,124 @@ CREATE TABLE messages (
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
+-- Everything below was added after the first release and is safe to re-run,
+-- so existing projects can apply it on its own to pick up new tables and columns
+
+-- ML feature store
+CREATE TABLE IF NOT EXISTS user_features (
+    user_id UUID PRIMARY KEY REFERENCES users(id),
+    vector REAL[] NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE
+);
+
+-- Precomputed feeds (written by precompute_feeds.py)
+CREATE TABLE IF NOT EXISTS feed_cache (
+    user_id UUID REFERENCES users(id),
+    feed_type TEXT NOT NULL,
+    items JSONB NOT NULL,
+    computed_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY(user_id, feed_type)
+);
+
+-- Scraped apartment listings per city, refreshed by services/listing_ingest.py
+CREATE TABLE IF NOT EXISTS listing_cache (
+    city_key TEXT PRIMARY KEY,
+    location TEXT NOT NULL,
+    listings JSONB NOT NULL DEFAULT '[]',
+    refreshed_at TIMESTAMP WITH TIME ZONE,
+    requested_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    last_error TEXT,
+    failures INTEGER NOT NULL DEFAULT 0,
+    failed_at TIMESTAMP WITH TIME ZONE
+);
+ALTER TABLE listing_cache ADD COLUMN IF NOT EXISTS failures INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE listing_cache ADD COLUMN IF NOT EXISTS failed_at TIMESTAMP WITH TIME ZONE;
+
+ALTER TABLE users ADD COLUMN IF NOT EXISTS interest_mask SMALLINT;
+
+-- Backfill interest_mask from interests (bit i = MLEngine.interest_categories[i])
+UPDATE users
+SET interest_mask = COALESCE((
+    SELECT BIT_OR(1 << (category.position::int - 1))
+    FROM unnest(ARRAY['coffee', 'hiking', 'tech', 'food', 'music', 'sports',
+                      'art', 'books', 'travel', 'fitness', 'nightlife', 'shopping'])
+         WITH ORDINALITY AS category(name, position)
+    WHERE category.name = ANY(users.interests)
+), 0)::SMALLINT
+WHERE interest_mask IS NULL;
+
+ALTER TABLE conversations ADD COLUMN IF NOT EXISTS pair_key TEXT;
+-- The only unique index on pair_key, for new and upgraded projects alike. Created
+-- before the backfill below so every key it writes is checked for uniqueness
+CREATE UNIQUE INDEX IF NOT EXISTS conversations_pair_key_idx ON conversations(pair_key);
+
+-- Symmetric pair lookups (user1_id OR user2_id)
+CREATE INDEX IF NOT EXISTS conversations_user1_idx ON conversations(user1_id);
+CREATE INDEX IF NOT EXISTS conversations_user2_idx ON conversations(user2_id);
+CREATE INDEX IF NOT EXISTS people_matches_user2_idx ON people_matches(user2_id);
+
+-- The people feed streams candidates inside a lat/lng box (geo.bounding_box) around
+-- the user; this lets each page range-scan the box instead of the whole table
+CREATE INDEX IF NOT EXISTS users_lat_lng_idx ON users(lat, lng);
+
+-- Backfill pair_key for conversations created before the column existed. Only the
+-- oldest conversation of each pair gets the key; duplicates keep NULL, which the
+-- unique index allows, so the backfill cannot fail on pairs that were started twice.
+UPDATE conversations
+SET pair_key = keyed.pair_key
+FROM (
+    SELECT DISTINCT ON (pair_key) id, pair_key
+    FROM (
+        SELECT id, created_at,
+               LEAST(user1_id::text, user2_id::text) || ':' || GREATEST(user1_id::text, user2_id::text) AS pair_key
+        FROM conversations
+        WHERE pair_key IS NULL
+    ) unkeyed
+    ORDER BY pair_key, created_at, id
+) keyed
+WHERE conversations.id = keyed.id
+  AND NOT EXISTS (SELECT 1 FROM conversations taken WHERE taken.pair_key = keyed.pair_key);
+
+-- Record a people swipe and, for a like, the match and (when mutual) the
+-- conversation in one transaction. Returns {"is_mutual", "conversation_id"}.
+CREATE OR REPLACE FUNCTION record_people_swipe(p_swiper_id UUID, p_swiped_id UUID, p_is_like BOOLEAN)
+RETURNS JSON AS $$
+DECLARE
+    v_pair_key TEXT := LEAST(p_swiper_id::text, p_swiped_id::text) || ':' || GREATEST(p_swiper_id::text, p_swiped_id::text);
+    v_is_mutual BOOLEAN := FALSE;
+    v_conversation_id UUID;
+BEGIN
+    -- Serialize swipes on the same pair so two simultaneous likes cannot both miss each other
+    PERFORM pg_advisory_xact_lock(hashtext(v_pair_key));
+
+    INSERT INTO people_swipes (swiper_id, swiped_id, is_like)
+    VALUES (p_swiper_id, p_swiped_id, p_is_like)
+    ON CONFLICT (swiper_id, swiped_id) DO UPDATE SET is_like = EXCLUDED.is_like;
+
+    IF NOT p_is_like THEN
+        RETURN json_build_object('is_mutual', FALSE, 'conversation_id', NULL);
+    END IF;
+
+    SELECT EXISTS (
+        SELECT 1 FROM people_swipes
+        WHERE swiper_id = p_swiped_id AND swiped_id = p_swiper_id AND is_like
+    ) INTO v_is_mutual;
+
+    INSERT INTO people_matches (user1_id, user2_id)
+    VALUES (p_swiper_id, p_swiped_id)
+    ON CONFLICT (user1_id, user2_id) DO NOTHING;
+
+    IF v_is_mutual THEN
+        INSERT INTO conversations (user1_id, user2_id, pair_key)
+        VALUES (p_swiper_id, p_swiped_id, v_pair_key)
+        ON CONFLICT (pair_key) DO NOTHING;
+        SELECT id INTO v_conversation_id FROM conversations WHERE pair_key = v_pair_key;
+    END IF;
+
+    RETURN json_build_object('is_mutual', v_is_mutual, 'conversation_id', v_conversation_id);
+END;
+$$ LANGUAGE plpgsql;
+
 -- Enable Row Level Security (RLS)
 ALTER TABLE users ENABLE ROW LEVEL SECURITY;
 ALTER TABLE apartments ENABLE ROW LEVEL SECURITY;
@@ -198,10 +318,14 @@ ALTER TABLE people_matches ENABLE ROW LEVEL SECURITY;
 ALTER TABLE spot_matches ENABLE ROW LEVEL SECURITY;
 ALTER TABLE conversations ENABLE ROW LEVEL SECURITY;
 ALTER TABLE messages ENABLE ROW LEVEL SECURITY;
+ALTER TABLE user_features ENABLE ROW LEVEL SECURITY;
+ALTER TABLE feed_cache ENABLE ROW LEVEL SECURITY;
+ALTER TABLE listing_cache ENABLE ROW LEVEL SECURITY;
 """
-    
+
+def run_sql_schema():
     print("SQL Schema:")
-    print(sql_schema)
+    print(SQL_SCHEMA)
     print("\nPlease copy and run this SQL in your Supabase SQL Editor")
     input("Press Enter when you've created the tables...")
 
@@ -0,0 +1,150 @@
+import threading
+
+import pytest
+from flask_jwt_extended import create_access_token
+from services.google_auth import GoogleAuthService
+from services.supabase_client import SupabaseService
+
+THREADS = 16
+
+def run_concurrently(call):
+    """Start THREADS calls at the same instant and collect their results."""
+    barrier = threading.Barrier(THREADS)
+    results = [None] * THREADS
+    
+    def worker(i):
+        barrier.wait()
+        results[i] = call(i)
+    
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+def test_concurrent_registrations_create_one_user(client):
+    responses = run_concurrently(lambda i: client.post('/api/auth/register', json={
+        'name': f'Racer {i}', 'email': 'racer@example.com', 'password': 'secret'
+    }))
+    
+    assert sorted(response.status_code for response in responses) == [200] + [400] * (THREADS - 1)
+    assert len(SupabaseService.get_data('users', {'email': 'racer@example.com'})['data']) == 1
+
+def test_concurrent_google_logins_create_one_user(client, monkeypatch):
+    monkeypatch.setattr(GoogleAuthService, 'exchange_code_for_token',
+                        staticmethod(lambda code, redirect_uri: {'success': True, 'access_token': code}))
+    monkeypatch.setattr(GoogleAuthService, 'get_user_info_from_access_token', staticmethod(
+        lambda access_token: {'success': True, 'user_info': {'email': 'g@example.com', 'name': 'G'}}))
+    
+    responses = run_concurrently(lambda i: client.post('/api/auth/google-callback', json={'code': f'code-{i}'}))
+    messages = sorted(response.get_json()['message'] for response in responses)
+    
+    assert messages == ['Login successful'] * (THREADS - 1) + ['User created successfully']
+    assert len({response.get_json()['user_id'] for response in responses}) == 1
+    assert len(SupabaseService.get_data('users', {'email': 'g@example.com'})['data']) == 1
+
+def test_concurrent_starts_share_one_conversation(client):
+    users = [{'id': f'user-{i}', 'email': f'user{i}@example.com'} for i in range(2)]
+    SupabaseService.insert_data('users', users)
+    with client.application.app_context():
+        tokens = [create_access_token(identity=user['id']) for user in users]
+    
+    # Both sides of the pair start the conversation at once
+    responses = run_concurrently(lambda i: client.post(
+        '/api/chat/start',
+        json={'user_id': users[1 - i % 2]['id']},
+        headers={'Authorization': f'Bearer {tokens[i % 2]}'}
+    ))
+    
+    assert all(response.status_code == 200 for response in responses)
+    assert len({response.get_json()['conversation_id'] for response in responses}) == 1
+    assert [response.get_json()['message'] for response in responses].count('Conversation started') == 1
+    assert len(SupabaseService.get_data('conversations')['data']) == 1
+
+def test_concurrent_landlord_chats_create_one_landlord(client):
+    SupabaseService.insert_data('users', {'id': 'renter', 'email': 'renter@example.com'})
+    with client.application.app_context():
+        token = create_access_token(identity='renter')
+    
+    responses = run_concurrently(lambda i: client.post(
+        '/api/chat/start',
+        json={'user_id': 'apartment-7', 'match_type': 'apartment'},
+        headers={'Authorization': f'Bearer {token}'}
+    ))
+    
+    assert all(response.status_code == 200 for response in responses)
+    landlords = SupabaseService.get_data('users', {'name': 'Property Manager'})['data']
+    assert len(landlords) == 1
+    assert len(SupabaseService.get_data('conversations', {'user2_id': landlords[0]['id']})['data']) == 1
+
+def test_simultaneous_likes_detect_one_mutual_match_per_pair(client):
+    users = [{'id': f'user-{i:02d}', 'email': f'user{i}@example.com'} for i in range(THREADS)]
+    SupabaseService.insert_data('users', users)
+    with client.application.app_context():
+        tokens = [create_access_token(identity=user['id']) for user in users]
+    
+    # Users 2k and 2k+1 like each other at the same instant
+    responses = run_concurrently(lambda i: client.post(
+        '/api/people/swipe',
+        json={'person_id': users[i ^ 1]['id'], 'direction': 'right'},
+        headers={'Authorization': f'Bearer {tokens[i]}'}
+    ))
+    
+    assert all(response.status_code == 200 for response in responses)
+    assert sum(response.get_json()['is_mutual'] for response in responses) == THREADS // 2
+    assert len(SupabaseService.get_data('people_matches')['data']) == THREADS
+    assert len(SupabaseService.get_data('conversations')['data']) == THREADS // 2
+
+def test_pass_records_swipe_without_match(client):
+    SupabaseService.insert_data('users', {'id': 'user-a', 'email': 'a@example.com'})
+    with client.application.app_context():
+        token = create_access_token(identity='user-a')
+    
+    response = client.post('/api/people/swipe', json={'person_id': 'user-b', 'direction': 'left'},
+                           headers={'Authorization': f'Bearer {token}'})
+    
+    assert response.get_json()['match'] is False
+    assert [row['is_like'] for row in SupabaseService.get_data('people_swipes')['data']] == [False]
+    assert SupabaseService.get_data('people_matches')['data'] == []
+
+def test_repeated_starts_return_the_existing_conversation(client):
+    users = [{'id': f'user-{i}', 'email': f'user{i}@example.com'} for i in range(2)]
+    SupabaseService.insert_data('users', users)
+    with client.application.app_context():
+        tokens = [create_access_token(identity=user['id']) for user in users]
+    
+    first = client.post('/api/chat/start', json={'user_id': 'user-1'},
+                        headers={'Authorization': f'Bearer {tokens[0]}'}).get_json()
+    # Started again from the other side of the pair
+    second = client.post('/api/chat/start', json={'user_id': 'user-0'},
+                         headers={'Authorization': f'Bearer {tokens[1]}'}).get_json()
+    
+    assert first['message'] == 'Conversation started'
+    assert second['message'] == 'Conversation already exists'
+    assert second['conversation_id'] == first['conversation_id']
+    assert len(SupabaseService.get_data('conversations')['data']) == 1
+
+def test_insert_or_get_reports_whether_it_created_the_row(client):
+    SupabaseService.insert_data('users', [{'id': 'user-0', 'email': 'a@example.com'},
+                                          {'id': 'user-1', 'email': 'b@example.com'}])
+    row = {'user1_id': 'user-0', 'user2_id': 'user-1', 'pair_key': 'user-0:user-1'}
+    
+    created = SupabaseService.insert_or_get('conversations', dict(row, id='conv-a'), on_conflict='pair_key')
+    existing = SupabaseService.insert_or_get('conversations', dict(row, id='conv-b'), on_conflict='pair_key')
+    
+    assert created['created'] is True and created['data']['id'] == 'conv-a'
+    assert existing['created'] is False and existing['data']['id'] == 'conv-a'
+
+def test_repeated_mutual_likes_keep_one_conversation(client):
+    SupabaseService.insert_data('users', [{'id': 'user-0', 'email': 'a@example.com'},
+                                          {'id': 'user-1', 'email': 'b@example.com'}])
+    SupabaseService.insert_data('people', [{'id': 'user-0', 'name': 'A'}, {'id': 'user-1', 'name': 'B'}])
+    
+    outcomes = [SupabaseService.rpc('record_people_swipe', {'p_swiper_id': swiper, 'p_swiped_id': swiped,
+                                                            'p_is_like': True})
+                for swiper, swiped in [('user-0', 'user-1'), ('user-1', 'user-0'), ('user-0', 'user-1')]]
+    
+    assert [outcome['data']['is_mutual'] for outcome in outcomes] == [False, True, True]
+    assert outcomes[1]['data']['conversation_id'] == outcomes[2]['data']['conversation_id']
+    assert len(SupabaseService.get_data('conversations')['data']) == 1
@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+from benchmarks.synthetic import generate_users
+from config import Config
+from services.feature_store import FeatureStore
+from services.supabase_client import SupabaseService
+
+pytestmark = pytest.mark.usefixtures('local_db')
+
+def count_encodes(store):
+    encoded = []
+    real_encode = store._encode
+    
+    def counting_encode(user):
+        encoded.append(user['id'])
+        return real_encode(user)
+    
+    store._encode = counting_encode
+    return encoded
+
+def test_vectors_and_candidates_match_the_ml_engine():
+    store = FeatureStore()
+    users = generate_users(4)
+    
+    vectors = store.get_vectors(users)
+    expected = np.array([store.ml_engine.create_user_vector(user) for user in users], dtype=np.float32)
+    assert vectors.dtype == np.float32 and np.allclose(vectors, expected)
+    
+    matrix, masks = store.candidates(users)
+    assert np.allclose(matrix[:, :2], expected[:, :2])
+    assert np.allclose(matrix[:, 2:], [[user['lat'], user['lng']] for user in users])
+    assert list(masks) == [store.ml_engine.encode_interest_mask(user['interests']) for user in users]
+    
+    # The stored users.interest_mask column is used as is
+    _, masks = store.candidates([dict(users[0], interest_mask=0b101)])
+    assert list(masks) == [0b101]
+
+def test_only_rows_with_a_new_updated_at_are_reencoded():
+    store = FeatureStore()
+    encoded = count_encodes(store)
+    users = generate_users(3)
+    
+    store.get_vectors(users)
+    store.get_vectors(users)
+    assert encoded == ['user-0', 'user-1', 'user-2']
+    
+    changed = dict(users[1], age=50, updated_at='2025-02-01T00:00:00+00:00')
+    vector = store.get_vector(changed)
+    assert encoded[3:] == ['user-1']
+    assert np.allclose(vector, store.ml_engine.create_user_vector(changed))
+
+def test_reencoded_vectors_are_written_on_flush_not_in_the_request():
+    store = FeatureStore(flush_seconds=3600)
+    users = generate_users(3)
+    
+    store.get_vectors(users)
+    assert SupabaseService.get_data('user_features')['data'] == []
+    
+    assert store.flush() == 3
+    rows = {row['user_id']: row for row in SupabaseService.get_data('user_features')['data']}
+    assert set(rows) == {'user-0', 'user-1', 'user-2'}
+    assert rows['user-2']['updated_at'] == users[2]['updated_at']
+    assert store.flush() == 0
+
+def test_stored_vectors_are_streamed_in_on_first_use(monkeypatch):
+    monkeypatch.setattr(Config, 'FEED_STREAM_PAGE_SIZE', 2)
+    users = generate_users(5)
+    SupabaseService.insert_data('user_features', [
+        {'user_id': user['id'], 'vector': [float(i)] * 14, 'updated_at': user['updated_at']}
+        for i, user in enumerate(users)
+    ])
+    store = FeatureStore()
+    encoded = count_encodes(store)
+    
+    vectors = store.get_vectors(users)
+    assert encoded == []
+    assert [row[0] for row in vectors] == [0.0, 1.0, 2.0, 3.0, 4.0]
+
+def test_least_recently_used_entries_are_evicted(monkeypatch):
+    monkeypatch.setattr(Config, 'FEED_STREAM_PAGE_SIZE', 2)
+    users = generate_users(6)
+    SupabaseService.insert_data('user_features', [
+        {'user_id': user['id'], 'vector': [0.0] * 14, 'updated_at': user['updated_at']} for user in users
+    ])
+    store = FeatureStore(max_entries=3)
+    encoded = count_encodes(store)
+    
+    # The load stops once the map is full
+    store.get_vectors(users[:2])
+    assert encoded == [] and len(store._entries) == 3
+    
+    store.get_vectors(users[3:5])
+    assert encoded == ['user-3', 'user-4']
+    assert list(store._entries) == ['user-1', 'user-3', 'user-4']
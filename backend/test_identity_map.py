@@ -0,0 +1,76 @@
+import sys
+
+import pytest
+from flask import g
+from services.concurrency import run_parallel
+from services.supabase_client import SupabaseService
+
+@pytest.fixture
+def selects(local_db, monkeypatch):
+    SupabaseService.insert_data('users', [{'id': f'user-{i}', 'email': f'user{i}@example.com'} for i in range(3)])
+    calls = []
+    real_select = SupabaseService._select
+    
+    def counting_select(table, **kwargs):
+        calls.append(table)
+        return real_select(table, **kwargs)
+    
+    monkeypatch.setattr(SupabaseService, '_select', staticmethod(counting_select))
+    return calls
+
+def test_identical_reads_hit_the_database_once(app, selects):
+    with app.test_request_context('/'):
+        app.preprocess_request()
+        first = SupabaseService.get_data('users', {'id': 'user-1'})
+        first['data'].append('mutated')
+        second = SupabaseService.get_data('users', {'id': 'user-1'})
+        
+        assert [row['id'] for row in second['data']] == ['user-1']
+        assert selects == ['users']
+        assert (g.identity_map_reads, g.identity_map_absorbed) == (2, 1)
+
+def test_writes_drop_the_written_table(app, selects):
+    with app.test_request_context('/'):
+        app.preprocess_request()
+        SupabaseService.get_data('users')
+        SupabaseService.get_data('spots')
+        SupabaseService.insert_data('users', {'id': 'user-9', 'email': 'user9@example.com'})
+        
+        assert len(SupabaseService.get_data('users')['data']) == 4
+        SupabaseService.get_data('spots')
+        assert selects == ['users', 'spots', 'users']
+
+def test_pool_threads_share_one_map(app, selects):
+    with app.test_request_context('/'):
+        app.preprocess_request()
+        results = run_parallel({i: (SupabaseService.get_data, 'users', {'id': 'user-2'}) for i in range(16)})
+        
+        assert all([row['id'] for row in result['data']] == ['user-2'] for result in results.values())
+        assert g.identity_map_reads == 16 and g.identity_map_absorbed == 16 - len(selects)
+        
+        # Reads from the pool are visible to the request thread, and writes from the pool invalidate them
+        SupabaseService.get_data('users', {'id': 'user-2'})
+        assert g.identity_map_absorbed == 17 - len(selects)
+        run_parallel({'write': (SupabaseService.update_data, 'users', {'name': 'Two'}, {'id': 'user-2'}),
+                      'other': (SupabaseService.get_data, 'spots')})
+        assert SupabaseService.get_data('users', {'id': 'user-2'})['data'][0]['name'] == 'Two'
+
+def test_concurrent_reads_and_writes_keep_the_map_consistent(app, selects):
+    def churn(worker):
+        for i in range(200):
+            SupabaseService.get_data('users', {'id': f'user-{i % 3}'})
+            SupabaseService.get_data('spots', {'id': f'spot-{worker}-{i % 5}'})
+            if i % 10 == 0:
+                SupabaseService.update_data('users', {'name': f'{worker}-{i}'}, {'id': f'user-{i % 3}'})
+        return True
+    
+    with app.test_request_context('/'):
+        app.preprocess_request()
+        # Switch threads as often as possible so unguarded counter and map updates interleave
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            assert all(run_parallel({worker: (churn, worker) for worker in range(8)}).values())
+        finally:
+            sys.setswitchinterval(interval)
+        assert g.identity_map_reads == 8 * 200 * 2
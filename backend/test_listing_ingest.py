@@ -0,0 +1,116 @@
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from flask_jwt_extended import create_access_token
+from config import Config
+from services.listing_ingest import ListingStore, format_listings, listing_ingestor
+from services.supabase_client import SupabaseService
+
+RAW_LISTINGS = [
+    {'price': '$1,850/mo', 'address': '12 Elm St, Austin, TX', 'bedrooms': 2, 'bathrooms': 1, 'sqft': 900},
+    {'price': 'Contact for price', 'address': '14 Elm St, Austin, TX'},
+    {'price': '$2,400+', 'address': '3 Oak Ave, Austin, TX', 'bedrooms': None},
+]
+
+@pytest.fixture
+def scrapes(local_db, monkeypatch):
+    monkeypatch.setattr(Config, 'LISTING_INGEST_IN_PROCESS', False)
+    calls = []
+    
+    def fake_scrape(location, max_listings):
+        calls.append(location)
+        return RAW_LISTINGS
+    
+    monkeypatch.setattr(listing_ingestor, '_scrape', fake_scrape)
+    # Queued requests are flushed by the tests themselves rather than the sender thread
+    monkeypatch.setattr(listing_ingestor, '_sender', threading.current_thread())
+    listing_ingestor._requested.clear()
+    listing_ingestor._unsent.clear()
+    yield calls
+    listing_ingestor._requested.clear()
+    listing_ingestor._unsent.clear()
+
+def get_feed(client, user_id):
+    with client.application.app_context():
+        token = create_access_token(identity=user_id)
+    return client.get('/api/apartments/feed', headers={'Authorization': f'Bearer {token}'}).get_json()
+
+def test_format_listings_drops_unpriced_and_keeps_stable_ids():
+    listings = format_listings(RAW_LISTINGS, 'Austin, TX')
+    
+    assert [listing['price'] for listing in listings] == [1850, 2400]
+    assert listings[1]['title'] == 'Studio, 1 Austin'
+    assert listings[0]['id'] == format_listings(RAW_LISTINGS, 'Austin, TX')[0]['id']
+
+def test_feed_reads_the_store_and_never_scrapes(scrapes, client):
+    SupabaseService.insert_data('users', {'id': 'user-1', 'email': 'a@example.com', 'city': 'Austin', 'state': 'TX',
+                                         'lat': 30.27, 'lng': -97.74})
+    
+    # Nothing stored yet: the feed queues the city without writing or inventing listings
+    first = get_feed(client, 'user-1')
+    assert first['status'] == 'pending' and first['apartments'] == []
+    assert SupabaseService.get_data('listing_cache')['data'] == []
+    assert SupabaseService.get_data('apartments')['data'] == []
+    
+    assert listing_ingestor.flush_requests() == 1
+    assert ListingStore.due(Config.LISTING_REFRESH_SECONDS, Config.LISTING_ACTIVE_SECONDS) == ['Austin, TX']
+    assert scrapes == []
+    
+    assert listing_ingestor.run_once() == 1
+    assert scrapes == ['Austin, TX']
+    
+    second = get_feed(client, 'user-1')
+    assert second['data_source'] == 'redfin_scraper' and second['listings_refreshed_at']
+    assert sorted(apt['address'] for apt in second['apartments']) == ['12 Elm St, Austin, TX', '3 Oak Ave, Austin, TX']
+    assert all(apt['lat'] is not None for apt in second['apartments'])
+    assert scrapes == ['Austin, TX']
+
+def test_schedule_skips_fresh_and_abandoned_cities(scrapes):
+    now = datetime.now(timezone.utc)
+    SupabaseService.insert_data('listing_cache', [
+        {'city_key': 'fresh', 'location': 'Fresh', 'refreshed_at': now.isoformat(), 'requested_at': now.isoformat()},
+        {'city_key': 'stale', 'location': 'Stale', 'refreshed_at': (now - timedelta(days=1)).isoformat(),
+         'requested_at': now.isoformat()},
+        {'city_key': 'abandoned', 'location': 'Abandoned', 'refreshed_at': None,
+         'requested_at': (now - timedelta(days=30)).isoformat()},
+        {'city_key': 'new', 'location': 'New', 'refreshed_at': None, 'requested_at': now.isoformat()},
+    ])
+    
+    assert ListingStore.due(6 * 60 * 60, 7 * 24 * 60 * 60) == ['New', 'Stale']
+
+def test_failed_scrape_keeps_previous_listings(scrapes, monkeypatch):
+    listing_ingestor.refresh('Austin, TX')
+    
+    def broken_scrape(location, max_listings):
+        raise TimeoutError("Redfin did not load")
+    
+    monkeypatch.setattr(listing_ingestor, '_scrape', broken_scrape)
+    assert listing_ingestor.refresh('Austin, TX') == 0
+    
+    row = SupabaseService.get_data('listing_cache', {'city_key': 'austin tx'})['data'][0]
+    assert row['last_error'] == 'Redfin did not load' and len(row['listings']) == 2
+
+def test_failing_cities_back_off_exponentially(scrapes, monkeypatch):
+    def broken_scrape(location, max_listings):
+        raise TimeoutError("Redfin did not load")
+    
+    monkeypatch.setattr(listing_ingestor, '_scrape', broken_scrape)
+    listing_ingestor.request('Austin, TX')
+    assert listing_ingestor.run_once() == 1
+    assert listing_ingestor.run_once() == 0
+    
+    def failed(minutes_ago, failures):
+        failed_at = (datetime.now(timezone.utc) - timedelta(minutes=minutes_ago)).isoformat()
+        SupabaseService.update_data('listing_cache', {'failed_at': failed_at, 'failures': failures},
+                                    {'city_key': 'austin tx'})
+        return ListingStore.due(6 * 60 * 60, 7 * 24 * 60 * 60, retry_seconds=5 * 60)
+    
+    assert failed(minutes_ago=6, failures=1) == ['Austin, TX']
+    assert failed(minutes_ago=6, failures=2) == []
+    assert failed(minutes_ago=11, failures=2) == ['Austin, TX']
+    # Never longer than a normal refresh
+    assert failed(minutes_ago=6 * 60 + 1, failures=20) == ['Austin, TX']
+    
+    listing_ingestor.refresh('Austin, TX')
+    assert SupabaseService.get_data('listing_cache')['data'][0]['failures'] == 21
@@ -0,0 +1,98 @@
+import pytest
+from services.supabase_client import SupabaseService
+
+pytestmark = pytest.mark.usefixtures('local_db')
+
+def add_users(count):
+    users = [{'id': f'user-{i:03d}', 'email': f'user{i}@example.com', 'name': f'User {i}',
+              'age': 20 + i % 10, 'city': 'Austin' if i % 2 else 'Seattle'} for i in range(count)]
+    assert SupabaseService.insert_data('users', users)['success']
+    return users
+
+def test_schema_tables_and_indexes(local_db):
+    assert 'people_swipes' in local_db.tables
+    assert local_db.tables['feed_cache'].primary_key == ('user_id', 'feed_type')
+    assert {'swiper_id', 'swiped_id'} <= set(local_db.tables['people_swipes'].indexes)
+    assert {'user1_id', 'user2_id', 'pair_key'} <= set(local_db.tables['conversations'].indexes)
+    assert 'lat' in local_db.tables['users'].indexes
+
+def test_crud_envelopes_and_defaults():
+    add_users(5)
+    
+    row = SupabaseService.get_data('users', {'id': 'user-003'})['data'][0]
+    assert row['onboarding_complete'] is False and row['created_at']
+    
+    assert SupabaseService.update_data('users', {'city': 'Denver'}, {'id': 'user-003'})['success']
+    assert [u['id'] for u in SupabaseService.get_data('users', {'city': 'Denver'})['data']] == ['user-003']
+    
+    assert SupabaseService.delete_data('users', {'id': 'user-003'})['data'][0]['id'] == 'user-003'
+    assert SupabaseService.get_data('users', {'id': 'user-003'})['data'] == []
+    
+    missing = SupabaseService.get_data('no_such_table')
+    assert not missing['success'] and 'does not exist' in missing['error']
+
+def test_unique_constraints_reject_whole_batch():
+    add_users(2)
+    duplicate = SupabaseService.insert_data('users', [
+        {'id': 'user-new', 'email': 'new@example.com'},
+        {'id': 'user-other', 'email': 'user1@example.com'},
+    ])
+    assert not duplicate['success'] and 'users_email_key' in duplicate['error']
+    assert SupabaseService.get_data('users', {'id': 'user-new'})['data'] == []
+
+def test_upsert_on_conflict():
+    row = {'user_id': 'user-001', 'feed_type': 'people', 'items': [1, 2]}
+    assert SupabaseService.upsert_data('feed_cache', row, on_conflict='user_id,feed_type')['success']
+    assert SupabaseService.upsert_data('feed_cache', dict(row, items=[3]), on_conflict='user_id,feed_type')['success']
+    
+    rows = SupabaseService.get_data('feed_cache', {'user_id': 'user-001'})['data']
+    assert len(rows) == 1 and rows[0]['items'] == [3]
+
+def test_filters_ordering_paging_and_or():
+    add_users(30)
+    
+    result = SupabaseService.get_data(
+        'users', columns=['id', 'age'], in_filters={'city': ['Austin']}, range_filters={'age': {'gte': 25}},
+        order_by='age', desc=True, limit=3, offset=1
+    )
+    assert [row['age'] for row in result['data']] == [29, 29, 27]
+    assert set(result['data'][0]) == {'id', 'age'}
+    
+    either = SupabaseService.get_data('users', or_filters=[{'id': 'user-001'}, {'city': 'Seattle', 'age': 20}])
+    assert sorted(row['id'] for row in either['data']) == ['user-000', 'user-001', 'user-010', 'user-020']
+
+def test_stream_data_visits_every_row_once():
+    users = add_users(23)
+    pages = list(SupabaseService.stream_data('users', columns=['city'], page_size=5))
+    
+    assert [len(page) for page in pages] == [5, 5, 5, 5, 3]
+    assert [row['id'] for page in pages for row in page] == sorted(u['id'] for u in users)
+
+def test_interest_mask_backfill_matches_ml_engine_bits():
+    import re
+    from setup import SQL_SCHEMA
+    from services.ml_engine import MLEngine
+    
+    assert 'ALTER TABLE users ADD COLUMN IF NOT EXISTS interest_mask SMALLINT;' in SQL_SCHEMA
+    backfill = SQL_SCHEMA[SQL_SCHEMA.index('Backfill interest_mask'):]
+    categories = re.findall(r"'(\w+)'", backfill[:backfill.index('WITH ORDINALITY')])
+    assert categories == MLEngine().interest_categories
+
+def test_upgrade_block_creates_tables_added_after_the_first_release():
+    from setup import SQL_SCHEMA
+    upgrade = SQL_SCHEMA[SQL_SCHEMA.index('Everything below was added after the first release'):]
+    
+    for table in ('user_features', 'feed_cache', 'listing_cache'):
+        assert f'CREATE TABLE IF NOT EXISTS {table} (' in upgrade
+
+def test_upgrade_block_is_safe_to_rerun():
+    import re
+    from setup import SQL_SCHEMA
+    upgrade = SQL_SCHEMA[SQL_SCHEMA.index('Everything below was added after the first release'):]
+    
+    creates = re.findall(r'CREATE (?:UNIQUE )?(?:TABLE|INDEX)\b(?! IF NOT EXISTS)[^\n]*', upgrade)
+    assert creates == []
+    assert len(re.findall(r'ALTER TABLE \w+ ADD COLUMN (?!IF NOT EXISTS)', upgrade)) == 0
+
+def test_pair_key_has_a_single_unique_constraint(local_db):
+    assert local_db.tables['conversations'].unique == [('pair_key',)]
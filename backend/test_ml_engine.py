@@ -0,0 +1,175 @@
+import random
+
+import numpy as np
+from benchmarks.synthetic import generate_spots, generate_users
+from services.geo import bounding_box, haversine_km
+from services.ml_engine import MLEngine, top_k_indices
+
+def test_people_batch_matches_loop():
+    ml_engine = MLEngine()
+    people = generate_users(500, seed=7)
+    # Profiles with unset fields go through the same defaults on both paths
+    for person in people[::17]:
+        person.update(age=None, budget_max=None, lat=None)
+    user = {'age': 27, 'budget_max': 2200, 'interests': ['coffee', 'tech', 'music', 'hiking']}
+    user_vector = ml_engine.create_user_vector(user)
+    user_location = [30.2672, -97.7431]
+    
+    expected = ml_engine.people_recommendations(user_vector, people, user_location)
+    actual = ml_engine.people_recommendations_batch(user_vector, people, user_location)
+    
+    assert [r['person_id'] for r in actual] == [r['person_id'] for r in expected]
+    for a, e in zip(actual, expected):
+        assert abs(a['score'] - e['score']) < 1e-4
+        assert abs(a['interest_similarity'] - e['interest_similarity']) < 1e-4
+
+def test_people_batch_handles_missing_user_location():
+    ml_engine = MLEngine()
+    people = generate_users(50, seed=3)
+    user_vector = ml_engine.create_user_vector({'interests': ['art']})
+    
+    expected = ml_engine.people_recommendations(user_vector, people, [None, None])
+    actual = ml_engine.people_recommendations_batch(user_vector, people, [None, None])
+    
+    assert [r['person_id'] for r in actual] == [r['person_id'] for r in expected]
+
+def test_haversine_distance_and_missing_mask():
+    coords = np.array([[40.7128, -74.0060], [np.nan, -122.3321], [30.2672, -97.7431]])
+    distances = haversine_km([30.2672, -97.7431], coords)
+    
+    assert abs(distances[0] - 2430) < 10
+    assert distances[1] == 20.0
+    assert distances[2] == 0.0
+    assert (haversine_km([None, None], coords) == 20.0).all()
+
+def test_top_k_matches_stable_sort():
+    rng = np.random.default_rng(11)
+    scores = rng.integers(0, 5, size=300).astype(np.float64)
+    expected = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)
+    
+    for k in (1, 7, 20, 300, 500):
+        assert top_k_indices(scores, k).tolist() == expected[:k]
+    assert top_k_indices(scores, 0).tolist() == []
+    assert top_k_indices([], 5).tolist() == []
+
+def test_interest_masks_match_vector_encoding():
+    ml_engine = MLEngine()
+    people = generate_users(200, seed=5)
+    masks = ml_engine.build_interest_masks(people)
+    
+    for person, mask in zip(people, masks):
+        vector = ml_engine.create_user_vector(person)
+        assert ml_engine.mask_from_vector(vector) == mask
+    
+    user_mask = ml_engine.encode_interest_mask(['coffee', 'tech', 'art'])
+    jaccard = ml_engine.interest_similarity(user_mask, masks, metric='jaccard')
+    for person, score in zip(people, jaccard):
+        mine, theirs = {'coffee', 'tech', 'art'}, set(person['interests'])
+        expected = len(mine & theirs) / len(mine | theirs) if mine | theirs else 0
+        assert abs(score - expected) < 1e-6
+
+def test_spot_category_mask_matches_substring_rule():
+    ml_engine = MLEngine()
+    spots = [
+        {'id': 's1', 'category': 'Coffee Shop', 'rating': 4.0, 'lat': 30.27, 'lng': -97.74},
+        {'id': 's2', 'category': 'Park', 'rating': 4.5, 'lat': 30.27, 'lng': -97.74},
+        {'id': 's3', 'category': 'Art Museum', 'rating': None, 'lat': None, 'lng': None},
+    ]
+    user_vector = ml_engine.create_user_vector({})
+    recs = ml_engine.spot_recommendations(user_vector, spots, [30.27, -97.74], ['coffee', 'park'])
+    scores = {rec['spot_id']: rec['score'] for rec in recs}
+    
+    assert abs(scores['s1'] - (0.8 * 0.4 + 0.8 * 0.3 + 0.3)) < 1e-6
+    assert abs(scores['s2'] - (0.8 * 0.4 + 0.9 * 0.3 + 0.3)) < 1e-6
+    assert abs(scores['s3'] - 0.6 * 0.3) < 1e-6
+
+def test_people_matrix_matches_single_user_batch():
+    ml_engine = MLEngine()
+    people = generate_users(300, seed=9)
+    users = generate_users(12, seed=21)
+    candidate_matrix = ml_engine.build_candidate_matrix(people)
+    interest_masks = ml_engine.build_interest_masks(people)
+    user_vectors, user_locations, user_masks = ml_engine.build_user_matrices(users)
+    
+    indices, scores, similarity = ml_engine.score_people_matrix(
+        user_vectors, user_locations, user_masks, candidate_matrix, interest_masks, k=15, chunk_size=64
+    )
+    
+    for row, user in enumerate(users):
+        expected = ml_engine.people_recommendations_batch(
+            ml_engine.create_user_vector(user), people, [user['lat'], user['lng']], k=15
+        )
+        assert [people[i]['id'] for i in indices[row]] == [rec['person_id'] for rec in expected]
+        assert np.allclose(scores[row], [rec['score'] for rec in expected], atol=1e-5)
+        assert np.allclose(similarity[row], [rec['interest_similarity'] for rec in expected], atol=1e-5)
+
+def test_apartments_matrix_matches_single_user():
+    ml_engine = MLEngine()
+    rng = random.Random(4)
+    apartments = [{'id': f'apt-{i}', 'price': rng.randint(900, 4000), 'amenities': ['Gym'] * rng.randint(0, 5),
+                   'lat': 30.2 + rng.uniform(0, 0.3), 'lng': -97.8 + rng.uniform(0, 0.3)} for i in range(250)]
+    users = generate_users(6, seed=2)
+    user_vectors, user_locations, _ = ml_engine.build_user_matrices(users)
+    
+    indices, scores, distances = ml_engine.score_apartments_matrix(
+        user_vectors, user_locations, ml_engine.build_apartment_matrix(apartments), k=10, chunk_size=50
+    )
+    
+    for row, user in enumerate(users):
+        expected = ml_engine.apartment_recommendations(user_vectors[row].tolist(), apartments, [user['lat'], user['lng']], k=10)
+        assert np.allclose(scores[row], [rec['score'] for rec in expected], atol=1e-4)
+        assert np.allclose(distances[row], [rec['distance'] for rec in expected], atol=1e-2)
+
+def test_spots_matrix_matches_single_user():
+    ml_engine = MLEngine()
+    spots = generate_spots(300, seed=4)
+    spots[7]['rating'] = None
+    users = generate_users(8, seed=6)
+    # A free-form interest outside the known categories, matched by substring
+    users[3]['interests'] = users[3]['interests'] + ['park']
+    user_vectors, user_locations, user_masks = ml_engine.build_user_matrices(users)
+    spot_matrix, spot_masks = ml_engine.build_spot_matrix(spots)
+    categories = [spot['category'].lower() for spot in spots]
+    extra_matches = {3: ml_engine.extra_interest_matches(users[3]['interests'], categories)}
+    
+    indices, scores, distances = ml_engine.score_spots_matrix(
+        user_masks, user_locations, spot_matrix, spot_masks, k=12, chunk_size=64, extra_matches=extra_matches
+    )
+    
+    for row, user in enumerate(users):
+        expected = ml_engine.spot_recommendations(
+            user_vectors[row], spots, [user['lat'], user['lng']], user['interests'], k=len(spots)
+        )
+        by_id = {rec['spot_id']: rec for rec in expected}
+        # Discrete ratings tie often, so compare scores rather than the order within a tie
+        assert np.allclose(scores[row], [rec['score'] for rec in expected[:12]], atol=1e-4)
+        assert np.allclose(scores[row], [by_id[spots[i]['id']]['score'] for i in indices[row]], atol=1e-4)
+        assert np.allclose(distances[row], [by_id[spots[i]['id']]['distance'] for i in indices[row]], atol=1e-2)
+
+def test_streamed_people_match_batch():
+    ml_engine = MLEngine()
+    people = generate_users(400, seed=5)
+    user = {'age': 31, 'budget_max': 1800, 'interests': ['food', 'art', 'travel']}
+    user_vector = ml_engine.create_user_vector(user)
+    user_location = [30.2672, -97.7431]
+    excluded = {'user-3', 'user-40'}
+    
+    remaining = [person for person in people if person['id'] not in excluded]
+    expected = ml_engine.people_recommendations_batch(user_vector, remaining, user_location, k=10)
+    pages = (people[start:start + 37] for start in range(0, len(people), 37))
+    actual, scanned = ml_engine.stream_people_recommendations(user_vector, pages, user_location, k=10, exclude=excluded)
+    
+    assert scanned == len(remaining)
+    assert [rec['person_id'] for rec in actual] == [rec['person_id'] for rec in expected]
+    assert np.allclose([rec['score'] for rec in actual], [rec['score'] for rec in expected])
+
+def test_bounding_box_encloses_radius():
+    box = bounding_box(30.2672, -97.7431, 25)
+    rng = random.Random(3)
+    points = np.array([(30.2672 + rng.uniform(-1, 1), -97.7431 + rng.uniform(-1, 1)) for _ in range(2000)])
+    inside = haversine_km([30.2672, -97.7431], points) <= 25
+    
+    in_box = ((points[:, 0] >= box['lat']['gte']) & (points[:, 0] <= box['lat']['lte']) &
+              (points[:, 1] >= box['lng']['gte']) & (points[:, 1] <= box['lng']['lte']))
+    assert inside.any() and not (inside & ~in_box).any()
+    assert 'lng' not in bounding_box(89.9, 10.0, 25)
@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from benchmarks.synthetic import generate_users
+from config import Config
+from services.feed_cache import FeedCache
+from services.ml_engine import MLEngine
+from services.supabase_client import SupabaseService
+import precompute_feeds
+
+pytestmark = pytest.mark.usefixtures('local_db')
+
+def test_score_chunk_matches_the_live_people_ranking():
+    people = generate_users(120, seed=3)
+    # Two of the scored users have no location
+    for person in (people[0], people[9]):
+        person.update(lat=None, lng=None)
+    precompute_feeds._init_worker(people, [], [], 10)
+    users = [people[0], people[5], people[9], people[42]]
+    
+    rows = precompute_feeds.score_chunk(users)
+    feeds = {row['user_id']: row['items'] for row in rows if row['feed_type'] == 'people'}
+    
+    ml_engine = MLEngine()
+    for user in users:
+        others = [person for person in people if person['id'] != user['id']]
+        expected = ml_engine.people_recommendations(
+            ml_engine.create_user_vector(user), others, [user['lat'], user['lng']], k=len(others)
+        )
+        scores = {rec['person_id']: rec['score'] for rec in expected}
+        actual = feeds[user['id']]
+        # Integer ages and budgets leave exact ties, which float32 and float64 may order differently
+        assert [item['match_score'] for item in actual] == pytest.approx([rec['score'] for rec in expected[:10]], abs=1e-4)
+        assert [item['match_score'] for item in actual] == pytest.approx([scores[item['id']] for item in actual], abs=1e-4)
+
+def test_score_chunk_writes_every_feed_type_with_card_fields():
+    people = generate_users(20, seed=3)
+    apartments = [{'id': f'apt-{i}', 'title': f'Apt {i}', 'price': 1200 + 100 * i, 'amenities': ['Pool'],
+                   'lat': 30.27, 'lng': -97.74, 'internal': 'x'} for i in range(5)]
+    spots = [{'id': 'spot-1', 'name': 'Cafe', 'category': 'Coffee Shop', 'rating': 4.5, 'lat': 30.27, 'lng': -97.74}]
+    precompute_feeds._init_worker(people, apartments, spots, 3)
+    
+    rows = precompute_feeds.score_chunk(people[:2])
+    
+    assert sorted((row['user_id'], row['feed_type']) for row in rows) == sorted(
+        (person['id'], feed_type) for person in people[:2] for feed_type in FeedCache.FEED_TYPES
+    )
+    for row in rows:
+        assert len(row['items']) == {'people': 3, 'apartments': 3, 'spots': 1}[row['feed_type']]
+        for item in row['items']:
+            assert set(item) - {'match_score', 'interest_similarity', 'distance'} <= set(FeedCache.CARD_FIELDS[row['feed_type']])
+
+def test_load_table_streams_past_one_page(monkeypatch):
+    monkeypatch.setattr(Config, 'FEED_STREAM_PAGE_SIZE', 7)
+    SupabaseService.insert_data('spots', [{'id': f'spot-{i:02d}', 'name': f'Spot {i}'} for i in range(30)])
+    
+    assert sorted(row['id'] for row in precompute_feeds.load_table('spots')) == [f'spot-{i:02d}' for i in range(30)]
+
+def test_feed_cache_round_trip_and_max_age():
+    SupabaseService.insert_data('users', {'id': 'user-1', 'email': 'a@example.com'})
+    fresh = datetime.now(timezone.utc).isoformat()
+    stale = (datetime.now(timezone.utc) - timedelta(hours=2)).isoformat()
+    
+    assert FeedCache.save([{'user_id': 'user-1', 'feed_type': 'people', 'items': [{'id': 'a'}], 'computed_at': fresh},
+                           {'user_id': 'user-1', 'feed_type': 'spots', 'items': [], 'computed_at': stale}])['success']
+    
+    assert FeedCache.get('user-1', 'people', max_age_seconds=60)['items'] == [{'id': 'a'}]
+    assert FeedCache.get('user-1', 'spots', max_age_seconds=60) is None
+    assert FeedCache.get('user-1', 'spots')['items'] == []
+    assert FeedCache.get('user-1', 'apartments') is None
+    
+    # A rerun replaces the row instead of adding one
+    FeedCache.save([{'user_id': 'user-1', 'feed_type': 'people', 'items': [{'id': 'b'}], 'computed_at': fresh}])
+    assert FeedCache.get('user-1', 'people')['items'] == [{'id': 'b'}]
@@ -0,0 +1,57 @@
+import time
+
+from services.query_cache import QueryCache
+
+def cached(cache, table, **query):
+    key = QueryCache.make_key(table, **query)
+    cache.set(key, {"success": True, "data": [query]}, filters=query.get('filters'), in_filters=query.get('in_filters'))
+    return key
+
+def test_hits_misses_and_copies():
+    cache = QueryCache({'users': 30})
+    key = cached(cache, 'users', filters={'id': 'a'})
+    
+    result = cache.get(key)
+    result['data'].append('mutated')
+    
+    assert cache.get(key)['data'] == [{'filters': {'id': 'a'}}]
+    assert cache.get(QueryCache.make_key('users', filters={'id': 'b'})) is None
+    assert cache.stats()['hits'] == 2
+    assert cache.stats()['misses'] == 1
+    assert not cache.is_cacheable('people_swipes')
+
+def test_ttl_and_lru_bounds():
+    cache = QueryCache({'users': 30, 'spots': 0.01}, max_entries=2)
+    spot_key = cached(cache, 'spots', filters={'id': 's'})
+    time.sleep(0.02)
+    assert cache.get(spot_key) is None
+    
+    first = cached(cache, 'users', filters={'id': 'a'})
+    cached(cache, 'users', filters={'id': 'b'})
+    cached(cache, 'users', filters={'id': 'c'})
+    assert cache.get(first) is None
+    assert cache.stats()['evictions'] == 1
+
+def test_writes_invalidate_only_matching_queries():
+    cache = QueryCache({'users': 30})
+    by_a = cached(cache, 'users', filters={'id': 'a'})
+    by_b = cached(cache, 'users', filters={'id': 'b'})
+    by_email = cached(cache, 'users', filters={'email': 'x@example.com'})
+    listing = cached(cache, 'users', in_filters={'id': ['a', 'c']})
+    
+    cache.invalidate('users', filters={'id': 'b'}, changed_columns=['name'])
+    assert cache.get(by_a) is not None
+    assert cache.get(by_b) is None
+    # User b may be the one with that email, so the email query goes too
+    assert cache.get(by_email) is None
+    assert cache.get(listing) is not None
+    
+    cache.invalidate('users', filters={'id': 'a'}, changed_columns=['id'])
+    assert cache.get(by_a) is None
+    assert cache.get(listing) is None
+    
+    kept = cached(cache, 'users', filters={'id': 'a'})
+    cache.invalidate('users', rows=[{'id': 'z', 'email': 'z@example.com'}])
+    assert cache.get(kept) is not None
+    cache.invalidate('users')
+    assert cache.get(kept) is None
@@ -0,0 +1,52 @@
+import pytest
+from flask import Flask, g
+from config import Config
+from services import query_trace
+from services.supabase_client import SupabaseService
+
+@pytest.fixture
+def app(local_db, monkeypatch):
+    monkeypatch.setattr(Config, 'QUERY_TRACE_ENABLED', True)
+    query_trace.reset()
+    
+    app = Flask(__name__)
+    query_trace.init_app(app, expose_header=True)
+    
+    @app.route('/loop')
+    def loop():
+        SupabaseService.insert_data('users', [{'id': f'u{i}', 'email': f'u{i}@example.com'} for i in range(5)])
+        for i in range(5):
+            SupabaseService.get_data('users', {'id': f'u{i}'})
+        SupabaseService.get_data('users', {'id': 'u0'})
+        return 'ok'
+    
+    @app.route('/batched')
+    def batched():
+        SupabaseService.get_by_ids('users', ['u0', 'u1'])
+        return 'ok'
+    return app
+
+def test_trace_summary_flags_repeated_shapes(app):
+    response = app.test_client().get('/loop')
+    header = response.headers['X-Query-Trace']
+    
+    assert header.startswith('queries=6; absorbed=1;')
+    assert 'users.select(id) x5' in header
+    
+    totals = query_trace.report()['endpoints']['loop']
+    assert totals['requests'] == 1 and totals['queries'] == 6 and totals['rows'] == 10
+    assert totals['repeated'] == {'users.select(id)': 1}
+
+def test_batched_reads_are_not_flagged(app):
+    response = app.test_client().get('/batched')
+    assert response.headers['X-Query-Trace'].startswith('queries=1;')
+    assert 'repeated' not in response.headers['X-Query-Trace']
+    
+    entry = query_trace.report()['recent'][-1]['trace'][0]
+    assert entry['filters'] == ['id IN'] and entry['source'] == 'db'
+
+def test_disabled_trace_records_nothing(app, monkeypatch):
+    monkeypatch.setattr(Config, 'QUERY_TRACE_ENABLED', False)
+    response = app.test_client().get('/loop')
+    assert 'X-Query-Trace' not in response.headers
+    assert query_trace.report()['endpoints'] == {}
@@ -0,0 +1,76 @@
+import pytest
+from flask_jwt_extended import create_access_token
+from routes import apartments, spots
+from services.supabase_client import SupabaseService
+from services.swipe_index import swipe_index
+
+def post_batch(client, user_id, swipes):
+    with client.application.app_context():
+        token = create_access_token(identity=user_id)
+    return client.post('/api/swipes/batch', json={'swipes': swipes}, headers={'Authorization': f'Bearer {token}'})
+
+def test_mixed_batch_returns_results_in_seq_order(client):
+    SupabaseService.insert_data('people_swipes', {'swiper_id': 'user-2', 'swiped_id': 'user-1', 'is_like': True})
+    
+    response = post_batch(client, 'user-1', [
+        {'seq': 3, 'type': 'spot', 'spot_id': 'spot-1', 'address': '5 Oak St', 'direction': 'right'},
+        {'seq': 1, 'type': 'apartment', 'apartment_id': 'apt-1', 'address': '1 Elm St', 'direction': 'left'},
+        {'seq': 2, 'type': 'person', 'person_id': 'user-2', 'direction': 'right'},
+        {'seq': 4, 'type': 'person', 'person_id': 'user-3', 'direction': 'left'},
+    ])
+    
+    body = response.get_json()
+    assert response.status_code == 200
+    assert [result['seq'] for result in body['results']] == [1, 2, 3, 4]
+    assert [result['match'] for result in body['results']] == [False, True, True, False]
+    assert body['results'][1]['is_mutual'] is True
+    assert body['recorded'] == 4 and body['matches'] == 2
+    
+    assert len(SupabaseService.get_data('spot_matches', {'user_id': 'user-1'})['data']) == 1
+    assert len(SupabaseService.get_data('people_swipes', {'swiper_id': 'user-1'})['data']) == 2
+    assert len(SupabaseService.get_data('conversations')['data']) == 1
+    assert 'user-3' in swipe_index.get('people', 'user-1')
+    # Places are excluded from the feeds by address, not id
+    assert '1 Elm St' in swipe_index.get('apartments', 'user-1')
+    assert '5 Oak St' in swipe_index.get('spots', 'user-1')
+
+def test_invalid_items_fail_alone_and_repeats_keep_the_last_swipe(client):
+    response = post_batch(client, 'user-1', [
+        {'seq': 1, 'type': 'person', 'person_id': 'user-2', 'direction': 'right'},
+        {'seq': 2, 'type': 'boat', 'direction': 'left'},
+        {'seq': 5, 'type': 'person', 'person_id': 'user-2', 'direction': 'left'},
+        {'type': 'spot', 'spot_id': 'spot-1', 'address': '5 Oak St', 'direction': 'left'},
+    ])
+    
+    results = response.get_json()['results']
+    assert [result['seq'] for result in results] == [1, 2, 5, None]
+    assert results[0] == {'seq': 1, 'type': 'person', 'success': True, 'match': False, 'superseded_by': 5}
+    assert not results[1]['success'] and 'type must be' in results[1]['error']
+    assert results[2]['success'] and not results[2]['match']
+    assert not results[3]['success'] and 'seq' in results[3]['error']
+    
+    rows = SupabaseService.get_data('people_swipes')['data']
+    assert [row['is_like'] for row in rows] == [False]
+
+def test_malformed_batches_are_rejected(client):
+    assert post_batch(client, 'user-1', []).status_code == 400
+    duplicate = [{'seq': 1, 'type': 'person', 'person_id': f'user-{i}', 'direction': 'left'} for i in range(2)]
+    assert post_batch(client, 'user-1', duplicate).status_code == 400
+    # An invalid item still claims its seq
+    clash = [{'seq': 1, 'type': 'boat'}, {'seq': 1, 'type': 'person', 'person_id': 'user-2', 'direction': 'left'}]
+    assert post_batch(client, 'user-1', clash).status_code == 400
+
+@pytest.mark.parametrize('kind', ['apartment', 'spot'])
+def test_single_likes_write_swipe_and_match_together(client, monkeypatch, kind):
+    module = apartments if kind == 'apartment' else spots
+    writes = []
+    monkeypatch.setattr(module, 'write_swipe_rows', lambda rows: writes.append([table for table, _ in rows]) or False)
+    with client.application.app_context():
+        token = create_access_token(identity='user-1')
+    
+    response = client.post(f'/api/{kind}s/swipe', headers={'Authorization': f'Bearer {token}'},
+                           json={f'{kind}_id': f'{kind}-1', 'address': '1 Elm St', 'direction': 'right'})
+    
+    assert writes == [[f'{kind}_swipes', f'{kind}_matches']]
+    # A failed write is reported rather than answered with a match
+    assert response.status_code == 500
@@ -0,0 +1,104 @@
+import pytest
+from flask_jwt_extended import create_access_token
+from services.supabase_client import SupabaseService
+from services.swipe_index import BloomFilter, SwipedSet, SwipeIndex, swipe_index
+
+pytestmark = pytest.mark.usefixtures('local_db')
+
+def count_streams(monkeypatch):
+    calls = []
+    real_stream = SupabaseService.stream_data
+    
+    def counting_stream(table, *args, **kwargs):
+        calls.append(table)
+        return real_stream(table, *args, **kwargs)
+    
+    monkeypatch.setattr(SupabaseService, 'stream_data', staticmethod(counting_stream))
+    return calls
+
+def test_bloom_filter_has_no_false_negatives_and_few_false_positives():
+    bloom = BloomFilter(10000, false_positive_rate=0.01)
+    for i in range(10000):
+        bloom.add(f'item-{i}')
+    
+    assert all(f'item-{i}' in bloom for i in range(10000))
+    false_positives = sum(f'other-{i}' in bloom for i in range(10000))
+    assert false_positives < 200
+
+def test_swiped_set_switches_to_bloom_past_exact_limit():
+    swiped = SwipedSet(exact_limit=100)
+    swiped.update(range(100))
+    assert not swiped.approximate
+    
+    swiped.update(range(100, 500))
+    assert swiped.approximate and len(swiped) == 500
+    assert all(i in swiped for i in range(500))
+    
+    # Past the filter's capacity a larger one is stacked on instead of losing accuracy
+    swiped.update(range(500, 2000))
+    assert len(swiped._blooms) == 2 and len(swiped) == 2000
+    assert all(i in swiped for i in range(2000))
+    assert sum(i in swiped for i in range(2000, 12000)) < 100
+
+def test_long_history_is_loaded_into_a_filter_sized_for_it(monkeypatch):
+    index = SwipeIndex(exact_limit=10)
+    SupabaseService.insert_data('apartment_swipes', [
+        {'id': f'swipe-{i:04d}', 'user_id': 'user-1', 'address': f'{i} Main St', 'is_like': False}
+        for i in range(100)
+    ])
+    streams = count_streams(monkeypatch)
+    
+    swiped = index.get('apartments', 'user-1')
+    assert swiped.approximate and len(swiped._blooms) == 1 and swiped._blooms[0].capacity >= 200
+    assert all(f'{i} Main St' in swiped for i in range(100))
+    
+    # A history over four times the limit stays cached instead of reloading on every request
+    index.get('apartments', 'user-1')
+    assert streams == ['apartment_swipes'] and index.stats()['hits'] == 1
+
+def test_history_is_loaded_once_and_kept_current(monkeypatch):
+    SupabaseService.insert_data('spot_swipes', [
+        {'id': f'swipe-{i}', 'user_id': 'user-1', 'address': f'{i} Main St', 'is_like': False} for i in range(3)
+    ])
+    streams = count_streams(monkeypatch)
+    
+    swiped = swipe_index.get('spots', 'user-1')
+    assert '0 Main St' in swiped and '9 Main St' not in swiped
+    
+    swipe_index.record('spots', 'user-1', '9 Main St')
+    assert '9 Main St' in swipe_index.get('spots', 'user-1')
+    assert streams == ['spot_swipes']
+
+def test_people_set_excludes_the_user_and_reloads_after_ttl(monkeypatch):
+    index = SwipeIndex(ttl=0)
+    streams = count_streams(monkeypatch)
+    
+    assert 'user-1' in index.get('people', 'user-1')
+    index.get('people', 'user-1')
+    assert streams == ['people_swipes', 'people_swipes']
+
+def test_least_recently_used_users_are_evicted():
+    index = SwipeIndex(max_users=2)
+    for user_id in ('user-1', 'user-2', 'user-1', 'user-3'):
+        index.get('apartments', user_id)
+    
+    assert index.stats()['users'] == 2 and index.stats()['loads'] == 3
+    index.get('apartments', 'user-1')
+    assert index.stats()['hits'] == 2
+
+def test_swipe_endpoints_update_loaded_sets(client):
+    with client.application.app_context():
+        token = create_access_token(identity='user-1')
+    headers = {'Authorization': f'Bearer {token}'}
+    swipe_index.get('people', 'user-1')
+    swipe_index.get('apartments', 'user-1')
+    
+    client.post('/api/people/swipe', json={'person_id': 'user-2', 'direction': 'left'}, headers=headers)
+    client.post('/api/people/swipe', json={'person_id': 'user-3', 'direction': 'right'}, headers=headers)
+    client.post('/api/apartments/swipe', json={'apartment_id': 'apt-1', 'direction': 'left', 'address': '1 Elm St'},
+                headers=headers)
+    
+    people = swipe_index.get('people', 'user-1')
+    assert 'user-2' in people and 'user-3' in people
+    assert '1 Elm St' in swipe_index.get('apartments', 'user-1')
+    assert swipe_index.stats()['loads'] == 2
@@ -0,0 +1,105 @@
+import atexit
+import json
+import multiprocessing
+import os
+import time
+
+import pytest
+from services.supabase_client import SupabaseService
+from services.write_buffer import WriteBuffer
+
+pytestmark = pytest.mark.usefixtures('local_db')
+
+def swipe(i):
+    return ('spot_swipes', {'id': f'swipe-{i}', 'user_id': 'user-1', 'spot_id': f'spot-{i}', 'is_like': True})
+
+def spill_files(directory):
+    return sorted(os.listdir(directory)) if os.path.isdir(directory) else []
+
+def test_rows_are_batched_until_flush(tmp_path):
+    buffer = WriteBuffer(flush_interval_ms=60000, spill_dir=str(tmp_path))
+    buffer.write([swipe(i) for i in range(3)])
+    
+    assert SupabaseService.get_data('spot_swipes')['data'] == []
+    assert len(buffer.find('spot_swipes', user_id='user-1')) == 3
+    
+    buffer.flush()
+    assert len(SupabaseService.get_data('spot_swipes')['data']) == 3
+    assert buffer.stats()['pending'] == 0 and buffer.stats()['flushed'] == 3
+    
+    buffer.close()
+    assert spill_files(str(tmp_path)) == []
+
+def test_max_rows_wakes_the_flusher(tmp_path):
+    buffer = WriteBuffer(flush_interval_ms=60000, max_rows=5, spill_dir=str(tmp_path))
+    buffer.write([swipe(i) for i in range(5)])
+    
+    deadline = time.time() + 2
+    while buffer.stats()['pending'] and time.time() < deadline:
+        time.sleep(0.01)
+    assert len(SupabaseService.get_data('spot_swipes')['data']) == 5
+    buffer.close()
+
+def test_spill_file_is_replayed_after_a_crash(tmp_path):
+    crashed = WriteBuffer(flush_interval_ms=60000, spill_dir=str(tmp_path))
+    crashed.write([swipe(i) for i in range(4)])
+    # The first row made it to the database before the crash
+    SupabaseService.insert_data(*swipe(0))
+    crashed._stopped = True
+    crashed._wake.set()
+    atexit.unregister(crashed.close)
+    
+    restarted = WriteBuffer(flush_interval_ms=60000, spill_dir=str(tmp_path))
+    restarted.write([swipe(4)])
+    restarted.flush()
+    
+    assert sorted(row['id'] for row in SupabaseService.get_data('spot_swipes')['data']) == \
+        [f'swipe-{i}' for i in range(5)]
+    assert restarted.stats()['dropped'] == 1
+    restarted.close()
+
+def test_write_fsyncs_the_spill_file(tmp_path, monkeypatch):
+    synced = []
+    monkeypatch.setattr(os, 'fsync', synced.append)
+    buffer = WriteBuffer(flush_interval_ms=60000, spill_dir=str(tmp_path))
+    
+    buffer.write([swipe(0)])
+    assert synced[-1] == buffer._spill.fileno()
+    buffer.close()
+
+def _recover_after(barrier, spill_dir, results):
+    barrier.wait()
+    recovered, _ = WriteBuffer(spill_dir=spill_dir)._recover()
+    results.put(len(recovered))
+
+def test_each_orphan_is_replayed_by_one_process(tmp_path):
+    # Above any pid the kernel hands out, so the owner is never running
+    dead_pid = 4194305
+    for orphan in range(5):
+        with open(tmp_path / f"writes-{dead_pid}.jsonl.{orphan}", 'w', encoding='utf-8') as spill:
+            for i in range(100):
+                spill.write(json.dumps({'table': 'spot_swipes', 'row': swipe(orphan * 100 + i)[1]}) + '\n')
+    
+    context = multiprocessing.get_context('fork')
+    barrier, results = context.Barrier(4), context.Queue()
+    workers = [context.Process(target=_recover_after, args=(barrier, str(tmp_path), results)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    
+    assert sum(results.get() for _ in workers) == 500
+    assert not [name for name in spill_files(str(tmp_path)) if str(dead_pid) in name]
+
+def test_orphan_claimed_elsewhere_is_skipped(tmp_path, monkeypatch):
+    orphan = tmp_path / "writes-4194305.jsonl"
+    orphan.write_text(json.dumps({'table': 'spot_swipes', 'row': swipe(0)[1]}) + '\n', encoding='utf-8')
+    real_replace = os.replace
+    
+    def claimed_first(source, destination):
+        # Another process renames the file between our glob and our rename
+        real_replace(source, str(tmp_path / "writes-1.jsonl.claimed-0"))
+        return real_replace(source, destination)
+    
+    monkeypatch.setattr(os, 'replace', claimed_first)
+    assert WriteBuffer(spill_dir=str(tmp_path))._recover() == ([], [])